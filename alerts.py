@@ -0,0 +1,312 @@
+"""
+Failure alert detection for the Truck Fleet Monitoring dashboard.
+
+An alert is the first reading in the selected window where a truck's failure
+probability exceeds the alert threshold. Detection works on whole columns at
+once instead of iterating over rows, so its cost is dominated by the readings
+that are actually over the threshold.
+"""
+import numpy as np
+import pandas as pd
+
+# Failure probability above which a truck is considered in alert
+ALERT_THRESHOLD = 0.5
+
+
+def detect_first_alerts(df, threshold=ALERT_THRESHOLD, prob_col="FAILURE_PROB"):
+    """
+    Find the first time each truck exceeds the failure probability threshold.
+
+    Args:
+        df: DataFrame with TRUCK_ID, TIMESTAMP and the probability column
+        threshold: Alert when probability is strictly greater than this
+        prob_col: Name of the failure probability column
+
+    Returns:
+        Tuple of (alerts, first_failure_times) where alerts is a list of
+        {'truck_id', 'timestamp', 'failure_prob'} dicts and first_failure_times
+        maps truck_id -> timestamp, both ordered by alert time
+    """
+    if df.empty:
+        return [], {}
+
+    prob = df[prob_col].to_numpy()
+    over = np.flatnonzero(prob > threshold)
+    if over.size == 0:
+        return [], {}
+
+    trucks = df["TRUCK_ID"].to_numpy()[over]
+    times = df["TIMESTAMP"].to_numpy()[over]
+    probs = prob[over]
+
+    # Sort the (usually small) over-threshold subset by truck then time and
+    # keep the first row of each truck
+    order = np.lexsort((times, trucks))
+    trucks, times, probs = trucks[order], times[order], probs[order]
+    first = np.ones(len(trucks), dtype=bool)
+    first[1:] = trucks[1:] != trucks[:-1]
+
+    return _build_alerts(trucks[first], times[first], probs[first])
+
+
+def alerts_from_frame(first_alerts_df, prob_col="FAILURE_PROB"):
+    """
+    Convert one-row-per-truck alert results (TRUCK_ID, TIMESTAMP and the
+    probability column) into the structure returned by detect_first_alerts.
+    """
+    if first_alerts_df.empty:
+        return [], {}
+    return _build_alerts(
+        first_alerts_df["TRUCK_ID"].to_numpy(),
+        pd.to_datetime(first_alerts_df["TIMESTAMP"]).to_numpy(),
+        first_alerts_df[prob_col].to_numpy(),
+    )
+
+
+def _build_alerts(trucks, times, probs):
+    order = np.argsort(times, kind="stable")
+    alerts = []
+    first_failure_times = {}
+    for truck_id, timestamp, failure_prob in zip(trucks[order], times[order], probs[order]):
+        truck_id = truck_id.item() if hasattr(truck_id, "item") else truck_id
+        timestamp = pd.Timestamp(timestamp)
+        alerts.append({
+            "truck_id": truck_id,
+            "timestamp": timestamp,
+            "failure_prob": float(failure_prob),
+        })
+        first_failure_times[truck_id] = timestamp
+    return alerts, first_failure_times
+
+
+# Columns of the alert episode table maintained by the scoring notebook
+EPISODE_COLUMNS = ["TRUCK_ID", "ONSET_TIME", "ONSET_PROB", "PEAK_PROB", "PEAK_TIME", "CLEAR_TIME"]
+
+
+def update_alert_episodes(episodes, readings, threshold=ALERT_THRESHOLD, prob_col="FAILURE_PROB"):
+    """
+    Extend the alert episode table with newly scored readings.
+
+    An episode is a run of consecutive readings of one truck above the
+    threshold. It records the onset (first reading over the threshold), the
+    peak probability and when it occurred, and the clear time (first reading
+    back at or below the threshold; NaT while the episode is still open).
+
+    Only readings newer than the same truck's readings already folded into
+    `episodes` should be passed in (other trucks may be behind or ahead).
+    Open episodes are continued or closed by the new readings, so repeated
+    calls give the same result as one call over the full history. For
+    readings that land earlier, rewind first (refresh_alert_episodes()).
+
+    Args:
+        episodes: Existing episode table (EPISODE_COLUMNS), may be empty
+        readings: New readings with TRUCK_ID, TIMESTAMP and the probability column
+        threshold: Alert when probability is strictly greater than this
+        prob_col: Name of the failure probability column
+
+    Returns:
+        Updated episode table ordered by ONSET_TIME
+    """
+    episodes = _empty_episodes() if episodes is None or episodes.empty else episodes[EPISODE_COLUMNS].copy()
+    if readings.empty:
+        return episodes
+
+    readings = readings.sort_values(["TRUCK_ID", "TIMESTAMP"], kind="stable")
+    trucks = readings["TRUCK_ID"].to_numpy()
+    times = pd.to_datetime(readings["TIMESTAMP"]).to_numpy()
+    probs = readings[prob_col].to_numpy(dtype=float)
+    over = probs > threshold
+
+    # Run boundaries: first row of each truck, and every change of over/under
+    new_truck = np.ones(len(trucks), dtype=bool)
+    new_truck[1:] = trucks[1:] != trucks[:-1]
+    run_start = new_truck.copy()
+    run_start[1:] |= over[1:] != over[:-1]
+    run_id = np.cumsum(run_start) - 1
+
+    runs = pd.DataFrame({
+        "RUN": run_id[over],
+        "TRUCK_ID": trucks[over],
+        "TIMESTAMP": times[over],
+        "PROB": probs[over],
+        "POS": np.flatnonzero(over),
+    })
+    grouped = runs.groupby("RUN", sort=True)
+    peak_rows = runs.loc[grouped["PROB"].idxmax()]
+    last_pos = grouped["POS"].max().to_numpy()
+    new_episodes = pd.DataFrame({
+        "TRUCK_ID": grouped["TRUCK_ID"].first().to_numpy(),
+        "ONSET_TIME": grouped["TIMESTAMP"].first().to_numpy(),
+        "ONSET_PROB": grouped["PROB"].first().to_numpy(),
+        "PEAK_PROB": peak_rows["PROB"].to_numpy(),
+        "PEAK_TIME": peak_rows["TIMESTAMP"].to_numpy(),
+        "CLEAR_TIME": pd.NaT,
+    })
+    # An episode clears on the next reading of the same truck, if there is one
+    next_pos = last_pos + 1
+    has_next = next_pos < len(trucks)
+    has_next[has_next] = trucks[next_pos[has_next]] == new_episodes["TRUCK_ID"].to_numpy()[has_next]
+    clear = np.full(len(new_episodes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    clear[has_next] = times[next_pos[has_next]]
+    new_episodes["CLEAR_TIME"] = clear
+
+    # Continue or close episodes left open by the previous update
+    first_rows = pd.DataFrame({
+        "TRUCK_ID": trucks[new_truck],
+        "FIRST_TIME": times[new_truck],
+        "FIRST_OVER": over[new_truck],
+    })
+    open_mask = episodes["CLEAR_TIME"].isna()
+    carried = episodes[open_mask].merge(first_rows, on="TRUCK_ID", how="inner")
+    if not carried.empty:
+        episodes = episodes.set_index(["TRUCK_ID", "ONSET_TIME"])
+        for row in carried.itertuples(index=False):
+            key = (row.TRUCK_ID, row.ONSET_TIME)
+            if not row.FIRST_OVER:
+                episodes.loc[key, "CLEAR_TIME"] = row.FIRST_TIME
+                continue
+            # The truck's first new run starts at its first new reading and
+            # is the continuation of the open episode
+            match = (new_episodes["TRUCK_ID"] == row.TRUCK_ID) & (new_episodes["ONSET_TIME"] == row.FIRST_TIME)
+            run = new_episodes[match].iloc[0]
+            if run["PEAK_PROB"] > episodes.loc[key, "PEAK_PROB"]:
+                episodes.loc[key, "PEAK_PROB"] = run["PEAK_PROB"]
+                episodes.loc[key, "PEAK_TIME"] = run["PEAK_TIME"]
+            episodes.loc[key, "CLEAR_TIME"] = run["CLEAR_TIME"]
+            new_episodes = new_episodes[~match]
+        episodes = episodes.reset_index()[EPISODE_COLUMNS]
+
+    result = pd.concat([episodes, new_episodes[EPISODE_COLUMNS]], ignore_index=True)
+    return result.sort_values(["ONSET_TIME", "TRUCK_ID"], kind="stable").reset_index(drop=True)
+
+
+def rewind_alert_episodes(episodes, changed_from):
+    """
+    Drop the episodes that predictions written at or after `changed_from` can alter.
+
+    A truck's episodes that are still open or clear at or after its earliest
+    changed reading are removed. Folding the truck's readings from the
+    returned FROM_TIME onwards back in with update_alert_episodes() then
+    recreates them: FROM_TIME is the earlier of the change and the onset of
+    the first removed episode, so the reading before it is never in an alert.
+
+    Args:
+        episodes: Episode table (EPISODE_COLUMNS)
+        changed_from: TRUCK_ID and CHANGED_FROM, the earliest reading written
+                      or rewritten per truck (repeated trucks allowed)
+
+    Returns:
+        Tuple of (kept episodes, DataFrame of TRUCK_ID and FROM_TIME per changed truck)
+    """
+    episodes = _empty_episodes() if episodes is None or episodes.empty else episodes[EPISODE_COLUMNS]
+    changed = (changed_from.assign(TRUCK_ID=changed_from["TRUCK_ID"].astype("int64"),
+                                   CHANGED_FROM=pd.to_datetime(changed_from["CHANGED_FROM"]))
+               .groupby("TRUCK_ID", as_index=False)["CHANGED_FROM"].min())
+    merged = episodes.merge(changed, on="TRUCK_ID", how="left")
+    clear = pd.to_datetime(merged["CLEAR_TIME"])
+    affected = (merged["CHANGED_FROM"].notna() & (clear.isna() | (clear >= merged["CHANGED_FROM"]))).to_numpy()
+
+    onsets = (merged[affected].assign(ONSET_TIME=pd.to_datetime(merged["ONSET_TIME"]))
+              .groupby("TRUCK_ID", as_index=False)["ONSET_TIME"].min())
+    refold_from = changed.merge(onsets, on="TRUCK_ID", how="left")
+    refold_from["FROM_TIME"] = refold_from[["CHANGED_FROM", "ONSET_TIME"]].min(axis=1)
+    return episodes[~affected].reset_index(drop=True), refold_from[["TRUCK_ID", "FROM_TIME"]]
+
+
+def refresh_alert_episodes(episodes, changed_from, read_readings, threshold=ALERT_THRESHOLD,
+                           prob_col="FAILURE_PROB"):
+    """
+    Bring the episode table up to date with predictions written since the last refresh.
+
+    Each changed truck is rewound (rewind_alert_episodes()) and its readings
+    from there on are folded back in, so readings that arrive late, out of
+    order across trucks or inside an already closed episode give the same
+    episodes as one pass over the full history. Repeating a refresh is
+    harmless.
+
+    Args:
+        episodes: Current episode table, may be empty
+        changed_from: TRUCK_ID and CHANGED_FROM per truck with new or rewritten readings
+        read_readings: Callable read_readings(refold_from) returning an iterable of
+                       reading batches (TRUCK_ID, TIMESTAMP, the probability column)
+                       of each truck in `refold_from` from its FROM_TIME onwards,
+                       ordered by TIMESTAMP across batches
+        threshold: Alert when probability is strictly greater than this
+        prob_col: Name of the failure probability column
+
+    Returns:
+        Tuple of (updated episode table, number of readings folded)
+    """
+    episodes, refold_from = rewind_alert_episodes(episodes, changed_from)
+    folded = 0
+    if refold_from.empty:
+        return episodes, folded
+    # Batches only hold readings newer than the previous batch's, so folding
+    # them one by one matches a single call while one batch is in memory
+    for batch in read_readings(refold_from):
+        episodes = update_alert_episodes(episodes, batch, threshold=threshold, prob_col=prob_col)
+        folded += len(batch)
+    return episodes, folded
+
+
+def first_alerts_from_episodes(episodes, start, end, df=None, threshold=ALERT_THRESHOLD,
+                               prob_col="FAILURE_PROB"):
+    """
+    Derive the first alert per truck in a window from the episode table.
+
+    Episodes that start inside the window give the alert directly. Episodes
+    that were already open at `start` need the first reading in the window,
+    which is looked up in `df` for just those trucks.
+
+    Args:
+        episodes: Episodes overlapping the window (see load_alert_episodes)
+        start: Window start
+        end: Window end
+        df: Readings in the window, used only for episodes open at `start`
+        threshold: Alert threshold used for the fallback lookup
+        prob_col: Name of the failure probability column
+
+    Returns:
+        Same structure as detect_first_alerts
+    """
+    if episodes.empty:
+        return [], {}
+
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    onset = pd.to_datetime(episodes["ONSET_TIME"])
+    in_window = ((onset >= start) & (onset <= end)).to_numpy()
+    candidates = [pd.DataFrame({
+        "TRUCK_ID": episodes["TRUCK_ID"].to_numpy()[in_window],
+        "TIMESTAMP": onset.to_numpy()[in_window],
+        prob_col: episodes["ONSET_PROB"].to_numpy()[in_window],
+    })]
+
+    carried_trucks = episodes["TRUCK_ID"][onset < start].unique()
+    if len(carried_trucks) and df is not None and not df.empty:
+        carried_alerts, _ = detect_first_alerts(
+            df[df["TRUCK_ID"].isin(carried_trucks)], threshold=threshold, prob_col=prob_col
+        )
+        candidates.append(pd.DataFrame({
+            "TRUCK_ID": [a["truck_id"] for a in carried_alerts],
+            "TIMESTAMP": [a["timestamp"] for a in carried_alerts],
+            prob_col: [a["failure_prob"] for a in carried_alerts],
+        }))
+
+    combined = pd.concat(candidates, ignore_index=True)
+    if combined.empty:
+        return [], {}
+    combined = combined.sort_values(["TRUCK_ID", "TIMESTAMP"], kind="stable")
+    first = combined.drop_duplicates("TRUCK_ID", keep="first")
+    return alerts_from_frame(first, prob_col=prob_col)
+
+
+def _empty_episodes():
+    return pd.DataFrame({
+        "TRUCK_ID": pd.Series(dtype="int64"),
+        "ONSET_TIME": pd.Series(dtype="datetime64[ns]"),
+        "ONSET_PROB": pd.Series(dtype="float64"),
+        "PEAK_PROB": pd.Series(dtype="float64"),
+        "PEAK_TIME": pd.Series(dtype="datetime64[ns]"),
+        "CLEAR_TIME": pd.Series(dtype="datetime64[ns]"),
+    })
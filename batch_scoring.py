@@ -0,0 +1,288 @@
+"""
+Local batch scoring of production readings, outside the warehouse.
+
+Streams TURBO_DATA_PRODUCTION-shaped readings (a CSV or Parquet file, or a
+directory of them such as fleet_generator.py output) in chunks of at most
+CHUNK_ROWS, computes the 30 features with features.compute_features(), scores
+them with the trained XGBoost model and writes rows in the
+TURBO_DATA_PREDICTIONS_NEW schema (the feature columns plus PREDICT_PROBA_0/1)
+to one Parquet or CSV file.
+
+Each truck's last WINDOW_ROWS readings are carried from one chunk to the
+next and prepended to its new readings, so lags and rolling windows across
+chunk boundaries match a single pass over the whole input. Memory is bounded
+by the chunk size (two chunks are in flight: one being scored while the next
+is read) plus the carried rows, whatever the input length. Each truck's
+readings must arrive in time order across chunks (true for per-day files or
+input sorted by truck); within a chunk any order is fine.
+
+With workers > 1 every chunk is split by TRUCK_ID % workers over a process
+pool; each partition carries only its own trucks' state, and each worker
+loads the model once.
+
+The model is a native XGBoost file (JSON or UBJSON) or an artifact directory
+exported by the notebook (section 14, see model_artifact.py). Scoring needs
+xgboost, Parquet input or output needs pyarrow.
+
+    python batch_scoring.py production/ predictions.parquet --model model.json --workers 4
+"""
+import argparse
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, OUTPUT_COLUMNS, STATE_COLUMNS, WINDOW_ROWS, compute_features
+
+# Columns of the prediction table: features, then the model's class probabilities
+PREDICTION_COLUMNS = OUTPUT_COLUMNS + ["PREDICT_PROBA_0", "PREDICT_PROBA_1"]
+
+# Readings read and scored at a time
+CHUNK_ROWS = 250_000
+
+# Model loaded by each pool worker (see _init_worker)
+_worker_model = None
+
+
+def load_model(path):
+    """Load a native XGBoost model file, or a model_artifact.py artifact directory, as a Booster."""
+    if os.path.isdir(path):
+        from model_artifact import load_artifact
+
+        return load_artifact(path).booster
+    import xgboost
+
+    booster = xgboost.Booster()
+    booster.load_model(path)
+    return booster
+
+
+def predict_proba(model, features):
+    """
+    Class probabilities for feature rows, in large vectorized calls.
+
+    Args:
+        model: xgboost.Booster with a binary:logistic (or 2-class softprob) objective
+        features: DataFrame or dict of arrays holding FEATURE_COLUMNS
+
+    Returns:
+        Array of shape (rows, 2): probability of no failure, of failure
+    """
+    # Feed the columns in the order the model was trained with, when it recorded them
+    columns = model.feature_names or FEATURE_COLUMNS
+    matrix = np.column_stack([np.asarray(features[c], dtype=np.float32) for c in columns])
+    if not len(matrix):
+        return np.empty((0, 2))
+    proba = model.inplace_predict(matrix)
+    if proba.ndim == 2:
+        return proba
+    return np.column_stack([1 - proba, proba])
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Yield readings from CSV/Parquet files in chunks of at most chunk_rows.
+
+    Args:
+        path: A .csv or .parquet file, or a directory of them (read in file name order)
+
+    Yields:
+        DataFrames with upper-case columns, TIMESTAMP as datetime and TRUCK_ID as int
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.endswith((".csv", ".parquet")))
+    else:
+        files = [path]
+    for file_name in files:
+        if file_name.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            batches = (batch.to_pandas() for batch in pq.ParquetFile(file_name).iter_batches(chunk_rows))
+        else:
+            batches = pd.read_csv(file_name, chunksize=chunk_rows)
+        for df in batches:
+            df.columns = [c.upper() for c in df.columns]
+            df["TIMESTAMP"] = pd.to_datetime(df["TIMESTAMP"])
+            df["TRUCK_ID"] = df["TRUCK_ID"].astype(np.int64)
+            yield df
+
+
+def carry_features(readings, state):
+    """
+    Features for new readings, with each truck's carried rows prepended.
+
+    Args:
+        readings: New readings (STATE_COLUMNS, any order)
+        state: Each truck's last WINDOW_ROWS earlier readings (STATE_COLUMNS), or None
+
+    Returns:
+        (features, state): OUTPUT_COLUMNS for the new readings ordered by
+        (TRUCK_ID, TIMESTAMP), and the state to carry into the next chunk
+    """
+    readings = readings[STATE_COLUMNS]
+    if state is not None and len(state):
+        combined = pd.concat([state, readings], ignore_index=True)
+        carried = np.zeros(len(combined), dtype=bool)
+        carried[:len(state)] = True
+    else:
+        combined, carried = readings.reset_index(drop=True), np.zeros(len(readings), dtype=bool)
+    # Stable sort, so a new reading at a carried TIMESTAMP sorts after it and is caught below
+    order = np.lexsort((combined["TIMESTAMP"].to_numpy(), combined["TRUCK_ID"].to_numpy()))
+    combined, carried = combined.iloc[order].reset_index(drop=True), carried[order]
+
+    trucks = combined["TRUCK_ID"].to_numpy()
+    late = carried[1:] & ~carried[:-1] & (trucks[1:] == trucks[:-1])
+    if late.any():
+        raise ValueError(f"truck {trucks[1:][late][0]} has readings older than an earlier chunk's")
+
+    features = pd.DataFrame(compute_features(combined))
+    features = features[~carried].reset_index(drop=True)
+    # The last WINDOW_ROWS rows per truck: those with fewer than WINDOW_ROWS rows of the same truck after them
+    last = np.r_[trucks[1:] != trucks[:-1], True]
+    rows_to_end = _rows_to_segment_end(last)
+    return features, combined[rows_to_end < WINDOW_ROWS].reset_index(drop=True)
+
+
+def score_readings(model, readings, state=None):
+    """
+    Score one chunk of readings in-process.
+
+    Returns:
+        (predictions, state): rows in PREDICTION_COLUMNS, and the state to carry
+    """
+    features, state = carry_features(readings, state)
+    proba = predict_proba(model, features)
+    features["PREDICT_PROBA_0"] = proba[:, 0]
+    features["PREDICT_PROBA_1"] = proba[:, 1]
+    return features[PREDICTION_COLUMNS], state
+
+
+def score_files(source, output, model_path, workers=1, chunk_rows=CHUNK_ROWS):
+    """
+    Stream readings from `source` through the model into `output`.
+
+    Args:
+        source: CSV/Parquet file or directory of them (see read_chunks())
+        output: .parquet or .csv file the predictions are written to (replaced)
+        model_path: Native XGBoost model file (.json or .ubj) or a model_artifact.py
+                    artifact directory, as accepted by load_model()
+        workers: Processes to score in, partitioned by TRUCK_ID; 1 scores in this process
+        chunk_rows: Readings per chunk
+
+    Returns:
+        Dict with rows scored, seconds, rows per second and peak RSS in MB
+    """
+    started = time.perf_counter()
+    rows = 0
+    writer = PredictionWriter(output)
+    states = [None] * workers
+    pool = None if workers == 1 else ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                         initargs=(model_path,))
+    model = load_model(model_path) if pool is None else None
+
+    def collect(pending):
+        parts = []
+        for partition, future in pending:
+            predictions, states[partition] = future.result()
+            parts.append(predictions)
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+    try:
+        pending = None
+        # The next chunk is read while the pool scores the previous one
+        for chunk in read_chunks(source, chunk_rows):
+            if pending is not None:
+                rows += writer.write(collect(pending))
+            if pool is None:
+                predictions, states[0] = score_readings(model, chunk, states[0])
+                rows += writer.write(predictions)
+                continue
+            partitions = chunk["TRUCK_ID"].to_numpy() % workers
+            pending = [(p, pool.submit(_score_partition, chunk[partitions == p], states[p]))
+                       for p in range(workers)]
+        if pending is not None:
+            rows += writer.write(collect(pending))
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+class PredictionWriter:
+    """Append prediction chunks to one Parquet or CSV file."""
+
+    def __init__(self, path):
+        if not path.endswith((".parquet", ".csv")):
+            raise ValueError(f"Output must be a .parquet or .csv file: {path}")
+        self.path = path
+        self._writer = None
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df):
+        """Write one chunk; returns its row count."""
+        if not len(df):
+            return 0
+        if self.path.endswith(".csv"):
+            df.to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False,
+                      date_format="%Y-%m-%d %H:%M:%S")
+            return len(df)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        return len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = load_model(model_path)
+
+
+def _score_partition(readings, state):
+    return score_readings(_worker_model, readings, state)
+
+
+def _rows_to_segment_end(last):
+    """For each row, how many rows follow it before the end of its segment (`last` marks segment ends)."""
+    index = np.arange(len(last))
+    ends = np.flatnonzero(last)
+    return ends[np.searchsorted(ends, index)] - index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score production readings locally with an XGBoost model.")
+    parser.add_argument("source", help="CSV/Parquet file or directory of them (e.g. fleet_generator.py output)")
+    parser.add_argument("output", help="Predictions file (.parquet or .csv)")
+    parser.add_argument("--model", required=True, help="Native XGBoost model file (.json or .ubj) or artifact directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    stats = score_files(args.source, args.output, args.model, args.workers, args.chunk_rows)
+    print(f"Scored {stats['rows']} rows into {args.output} in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s, peak RSS {stats['peak_rss_mb']:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
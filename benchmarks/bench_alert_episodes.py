@@ -0,0 +1,266 @@
+"""
+Check that alert episodes refreshed after every scoring run match one pass over the full history.
+
+Production readings arrive over --runs scoring runs, out of order across
+trucks: --late-fraction of the trucks go offline for hours to days and then
+upload their backlog at once, while the rest report on time. Each run writes
+predictions with features.run_incremental() on a LocalSession (the logistic
+stand-in model from bench_incremental_features.py), and the alert episodes
+are then refreshed the way notebook section 13 does it, from the changes the
+run recorded (alerts.refresh_alert_episodes()). After every run the episode
+table must equal update_alert_episodes() over every prediction written so
+far. The single fleet-wide watermark section 13 used before is replayed
+alongside, to count the episodes it gets wrong. Then a truck's predictions
+are rewritten inside a closed episode, and a full rebuild is queued
+(features.queue_episode_rebuild()); both must match as well.
+
+Randomized cases (pandas only) fold readings in per-truck chunks, in random
+order across trucks, then rewrite and insert readings inside closed and open
+episodes and repeat refreshes, checking the same equality after each step.
+
+    python benchmarks/bench_alert_episodes.py --trucks 50 --days 7 --runs 14 --cases 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from alerts import EPISODE_COLUMNS, refresh_alert_episodes, update_alert_episodes  # noqa: E402
+from bench_incremental_features import stand_in_score  # noqa: E402
+from features import (ALERT_EPISODE_CHANGES_TABLE, PREDICTION_OUTPUT_TABLE, PRODUCTION_DATA_TABLE,  # noqa: E402
+                      queue_episode_rebuild, run_incremental)
+from fleet_generator import generate_frame  # noqa: E402
+from local_session import LocalSession  # noqa: E402
+
+# Alert readings the same way notebook section 13 selects them
+READINGS_SQL = f"""
+    select p."TRUCK_ID", p."TIMESTAMP", round(p."PREDICT_PROBA_1", 4) as "FAILURE_PROB"
+    from {PREDICTION_OUTPUT_TABLE} p {{join}}
+    order by p."TIMESTAMP", p."TRUCK_ID"
+"""
+
+
+def normalized(episodes):
+    """Episodes in a fixed order and dtypes, for comparison."""
+    df = episodes[EPISODE_COLUMNS].sort_values(["TRUCK_ID", "ONSET_TIME"], ignore_index=True)
+    for column in ("ONSET_TIME", "PEAK_TIME", "CLEAR_TIME"):
+        df[column] = pd.to_datetime(df[column]).astype("datetime64[ns]")
+    return df.astype({"TRUCK_ID": "int64", "ONSET_PROB": float, "PEAK_PROB": float})
+
+
+def assert_same_episodes(actual, expected, context):
+    try:
+        pd.testing.assert_frame_equal(normalized(actual), normalized(expected))
+    except AssertionError as error:
+        raise AssertionError(f"{context}: {error}") from None
+
+
+def missed_episodes(actual, expected):
+    """Expected episodes that are absent from, or differ in, `actual`."""
+    merged = normalized(expected).merge(normalized(actual), how="left", indicator=True)
+    return int((merged["_merge"] == "left_only").sum())
+
+
+def refresh_from_changes(session, episodes):
+    """Notebook section 13 on a LocalSession: fold in the recorded changes, then clear them."""
+    changed_from = session.sql(f"select * from {ALERT_EPISODE_CHANGES_TABLE}").to_pandas()
+
+    def read_readings(refold_from):
+        session.register("ALERT_REFOLD_FROM", refold_from)
+        join = ('join ALERT_REFOLD_FROM r on p."TRUCK_ID" = r."TRUCK_ID" '
+                'where p."TIMESTAMP" >= r."FROM_TIME"')
+        return session.sql(READINGS_SQL.format(join=join)).to_pandas_batches()
+
+    episodes, folded = refresh_alert_episodes(episodes, changed_from, read_readings)
+    session.sql(f"delete from {ALERT_EPISODE_CHANGES_TABLE}").collect()
+    return episodes, folded
+
+
+def single_pass(session):
+    """Every prediction folded in one call."""
+    return update_alert_episodes(None, session.sql(READINGS_SQL.format(join="")).to_pandas())
+
+
+def arrival_runs(readings, runs, late_fraction, seed):
+    """
+    Scoring run each reading arrives in.
+
+    Late trucks buffer their readings from a random outage start and upload
+    them when the outage ends, so they arrive in order per truck but behind
+    the rest of the fleet.
+    """
+    rng = np.random.default_rng(seed)
+    times = readings["TIMESTAMP"].to_numpy()
+    first, last = times.min(), times.max()
+    span = last - first
+    arrival = times.copy()
+    trucks = readings["TRUCK_ID"].unique()
+    for truck in trucks[rng.random(len(trucks)) < late_fraction]:
+        outage_start = first + span * rng.uniform(0.05, 0.7)
+        outage_end = min(outage_start + span * rng.uniform(0.1, 0.4), last)
+        buffered = (readings["TRUCK_ID"].to_numpy() == truck) & (times >= outage_start) & (times < outage_end)
+        arrival[buffered] = outage_end
+    edges = pd.date_range(first, last, periods=runs + 1)
+    return np.searchsorted(edges[1:-1].to_numpy(), arrival, side="left")
+
+
+def run_pipeline(readings, runs, late_fraction, seed):
+    """Score and refresh after every arrival; returns the final session and episode table."""
+    arrival = arrival_runs(readings, runs, late_fraction, seed)
+    session = LocalSession()
+    episodes = None
+    fleet_watermark_episodes, fleet_watermark = None, None
+
+    print(f"{'run':>4} {'scored':>7} {'trucks':>7} {'folded':>7} {'refresh s':>10} {'episodes':>9} "
+          f"{'fleet-wide missed':>18}")
+    for run in range(runs):
+        batch = readings[arrival == run]
+        if run == 0:
+            session.register(PRODUCTION_DATA_TABLE, batch)
+        else:
+            session.append(PRODUCTION_DATA_TABLE, batch)
+        scored = run_incremental(session, stand_in_score, changes_table=ALERT_EPISODE_CHANGES_TABLE)
+        changed = session.sql(f'select count(distinct "TRUCK_ID") as N from {ALERT_EPISODE_CHANGES_TABLE}').to_pandas()
+
+        started = time.perf_counter()
+        episodes, folded = refresh_from_changes(session, episodes)
+        seconds = time.perf_counter() - started
+        expected = single_pass(session)
+        assert_same_episodes(episodes, expected, f"run {run + 1}")
+
+        # The previous section 13: fold only readings past one watermark for the whole fleet
+        newer = session.sql(READINGS_SQL.format(join="")).to_pandas()
+        if fleet_watermark is not None:
+            newer = newer[newer["TIMESTAMP"] > fleet_watermark]
+        if len(newer):
+            fleet_watermark_episodes = update_alert_episodes(fleet_watermark_episodes, newer)
+            fleet_watermark = newer["TIMESTAMP"].max()
+        missed = missed_episodes(fleet_watermark_episodes, expected)
+        print(f"{run + 1:>4} {scored:>7} {int(changed['N'].iloc[0]):>7} {folded:>7} {seconds:>10.3f} "
+              f"{len(episodes):>9} {missed:>18}")
+    return session, episodes
+
+
+def check_session_rewrites(session, episodes):
+    """Rewrite readings inside a closed episode, then queue a full rebuild; both must match."""
+    closed = normalized(episodes).dropna(subset=["CLEAR_TIME"])
+    closed = closed[closed["PEAK_TIME"] > closed["ONSET_TIME"]]
+    assert len(closed), "no closed multi-reading episode to rewrite"
+    episode = closed.iloc[len(closed) // 2]
+    # Dropping the peak reading under the threshold splits the episode in two
+    session.sql(f"""
+        update {PREDICTION_OUTPUT_TABLE} set "PREDICT_PROBA_1" = 0.01
+        where "TRUCK_ID" = ? and "TIMESTAMP" = ?
+    """, [int(episode["TRUCK_ID"]), episode["PEAK_TIME"]]).collect()
+    session.sql(f"""
+        insert into {ALERT_EPISODE_CHANGES_TABLE} ("TRUCK_ID", "CHANGED_FROM") values (?, ?)
+    """, [int(episode["TRUCK_ID"]), episode["PEAK_TIME"]]).collect()
+    episodes, _ = refresh_from_changes(session, episodes)
+    assert_same_episodes(episodes, single_pass(session), "rewrite inside a closed episode")
+
+    queue_episode_rebuild(session)
+    rebuilt, folded = refresh_from_changes(session, episodes)
+    assert folded == len(session.sql(READINGS_SQL.format(join="")).to_pandas())
+    assert_same_episodes(rebuilt, single_pass(session), "full rebuild")
+
+    # Nothing queued: the refresh folds nothing and keeps every episode
+    again, folded = refresh_from_changes(session, rebuilt)
+    assert folded == 0
+    assert_same_episodes(again, rebuilt, "refresh with nothing queued")
+    print("Rewrites inside a closed episode and a full rebuild match a single pass")
+
+
+def check_case(seed):
+    """Out-of-order folds, rewrites and repeated refreshes against a single pass, pandas only."""
+    rng = np.random.default_rng(seed)
+    n_trucks = int(rng.integers(1, 8))
+    n_readings = int(rng.integers(2, 60))
+    times = pd.date_range("2025-04-01", periods=n_readings, freq="5min")
+    # Sticky over/under runs, so trucks have several episodes each
+    flips = rng.random((n_readings, n_trucks)) < rng.uniform(0.1, 0.6)
+    over = np.logical_xor.accumulate(flips, axis=0) ^ (rng.random(n_trucks) < 0.5)
+    probs = np.where(over, rng.uniform(0.51, 1.0, over.shape), rng.uniform(0.0, 0.5, over.shape))
+    history = pd.DataFrame({
+        "TRUCK_ID": np.tile(np.arange(1, n_trucks + 1), n_readings),
+        "TIMESTAMP": np.repeat(times, n_trucks),
+        "FAILURE_PROB": probs.ravel(),
+    })
+
+    written = history.iloc[:0]
+
+    def read_readings(refold_from):
+        rows = written.merge(refold_from, on="TRUCK_ID")
+        rows = rows[rows["TIMESTAMP"] >= rows["FROM_TIME"]].sort_values(["TIMESTAMP", "TRUCK_ID"])
+        stamps = rows["TIMESTAMP"].unique()
+        # Batches split between timestamps, as the notebook's ordered result batches are
+        for part in np.array_split(stamps, int(rng.integers(1, 4))):
+            yield rows[rows["TIMESTAMP"].isin(part)].drop(columns="FROM_TIME")
+
+    def refresh(episodes, changes):
+        episodes, _ = refresh_alert_episodes(episodes, changes, read_readings)
+        expected = update_alert_episodes(None, written.sort_values(["TIMESTAMP", "TRUCK_ID"]))
+        assert_same_episodes(episodes, expected, f"case {seed}")
+        return episodes
+
+    # Each step writes the next chunk of a few trucks' readings; others fall behind
+    episodes = None
+    cursors = np.zeros(n_trucks, dtype=int)
+    while (cursors < n_readings).any():
+        chunk = []
+        for truck in np.flatnonzero((cursors < n_readings) & (rng.random(n_trucks) < 0.5)):
+            end = min(n_readings, cursors[truck] + int(rng.integers(1, 15)))
+            chunk.append(history[(history["TRUCK_ID"] == truck + 1)
+                                 & history["TIMESTAMP"].between(times[cursors[truck]], times[end - 1])])
+            cursors[truck] = end
+        if not chunk:
+            continue
+        chunk = pd.concat(chunk)
+        written = pd.concat([written, chunk], ignore_index=True)
+        episodes = refresh(episodes, chunk.groupby("TRUCK_ID", as_index=False)["TIMESTAMP"].min()
+                           .rename(columns={"TIMESTAMP": "CHANGED_FROM"}))
+
+    # Rewrite some readings and insert others between existing ones, anywhere in history
+    for _ in range(int(rng.integers(1, 4))):
+        n_rewritten = min(len(written), int(rng.integers(1, 4)))
+        rewritten = written.sample(n=n_rewritten, random_state=int(rng.integers(1 << 30)))
+        written.loc[rewritten.index, "FAILURE_PROB"] = rng.uniform(0, 1, len(rewritten))
+        inserted = rewritten.assign(TIMESTAMP=rewritten["TIMESTAMP"] + pd.Timedelta("2min"),
+                                    FAILURE_PROB=rng.uniform(0, 1, len(rewritten)))
+        written = pd.concat([written, inserted], ignore_index=True).drop_duplicates(
+            ["TRUCK_ID", "TIMESTAMP"], keep="last", ignore_index=True)
+        changes = pd.concat([rewritten, inserted])[["TRUCK_ID", "TIMESTAMP"]].rename(
+            columns={"TIMESTAMP": "CHANGED_FROM"})
+        episodes = refresh(episodes, changes)
+        # A repeated refresh (say, after a failure before the changes were cleared) is harmless
+        episodes = refresh(episodes, changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, default=50)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=14, help="Arrival slices (scoring runs)")
+    parser.add_argument("--late-fraction", type=float, default=0.3, help="Share of trucks that report late")
+    parser.add_argument("--cases", type=int, default=50, help="Randomized parity cases")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    readings = generate_frame(args.trucks, "2025-04-01", args.days, seed=args.seed)
+    print(f"{len(readings)} readings from {args.trucks} trucks in {args.runs} runs, "
+          f"{args.late_fraction:.0%} of trucks reporting late")
+    session, episodes = run_pipeline(readings, args.runs, args.late_fraction, args.seed)
+    print("Episodes refreshed after every run match a single pass over the full history")
+    check_session_rewrites(session, episodes)
+
+    for seed in range(args.cases):
+        check_case(seed)
+    print(f"{args.cases} randomized cases match a single pass")
+
+
+if __name__ == "__main__":
+    main()
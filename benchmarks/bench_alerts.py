@@ -0,0 +1,97 @@
+"""
+Benchmark first-alert detection: the original iterrows loop vs. detect_first_alerts.
+
+Builds a synthetic prediction window for each fleet size, checks that both
+implementations return the same alerts, and prints the timings.
+
+    python benchmarks/bench_alerts.py --trucks 1000 10000 100000 --readings 12
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from alerts import detect_first_alerts  # noqa: E402
+
+
+def legacy_first_alerts(filtered_df, fail_prob_col="FAILURE_PROB"):
+    """The row-by-row loop previously inlined in dashboard.py."""
+    first_alerts = {}
+    first_failure_times = {}
+    for _, row in filtered_df.sort_values('TIMESTAMP').iterrows():
+        truck_id = row['TRUCK_ID']
+        if row[fail_prob_col] > 0.5 and truck_id not in first_alerts:
+            first_alerts[truck_id] = {
+                'truck_id': truck_id,
+                'timestamp': row['TIMESTAMP'],
+                'failure_prob': row[fail_prob_col]
+            }
+            first_failure_times[truck_id] = row['TIMESTAMP']
+    return list(first_alerts.values()), first_failure_times
+
+
+def make_window(n_trucks, readings_per_truck, alert_fraction=0.05, seed=0):
+    """Synthetic window at 5-minute cadence with a fraction of trucks crossing 50%."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-04-07 03:00", periods=readings_per_truck, freq="5min")
+    truck_ids = np.repeat(np.arange(1, n_trucks + 1), readings_per_truck)
+    prob = rng.uniform(0.0, 0.45, size=len(truck_ids))
+
+    # Ramp alerting trucks above the threshold from a random reading onwards
+    alerting = rng.random(n_trucks) < alert_fraction
+    onset = rng.integers(0, readings_per_truck, size=n_trucks)
+    position = np.tile(np.arange(readings_per_truck), n_trucks)
+    ramp = alerting[truck_ids - 1] & (position >= onset[truck_ids - 1])
+    prob[ramp] = rng.uniform(0.51, 0.99, size=ramp.sum())
+
+    return pd.DataFrame({
+        "TIMESTAMP": np.tile(timestamps.to_numpy(), n_trucks),
+        "TRUCK_ID": truck_ids,
+        "FAILURE_PROB": prob.round(4),
+    })
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--readings", type=int, default=12,
+                        help="Readings per truck in the window (12 = 1 hour at 5-minute cadence)")
+    parser.add_argument("--legacy-max-rows", type=int, default=2_000_000,
+                        help="Skip the iterrows version above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'trucks':>8} {'rows':>10} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_trucks in args.trucks:
+        df = make_window(n_trucks, args.readings)
+        new_time, (new_alerts, new_times) = timed(detect_first_alerts, df)
+
+        if len(df) <= args.legacy_max_rows:
+            old_time, (old_alerts, old_times) = timed(legacy_first_alerts, df, repeat=1)
+            assert {k: pd.Timestamp(v) for k, v in old_times.items()} == new_times
+            assert sorted(a["truck_id"] for a in old_alerts) == sorted(a["truck_id"] for a in new_alerts)
+            legacy = f"{old_time:11.3f}"
+            speedup = f"{old_time / new_time:7.0f}x"
+        else:
+            legacy = f"{'skipped':>11}"
+            speedup = f"{'-':>8}"
+
+        print(f"{n_trucks:>8} {len(df):>10} {legacy} {new_time:15.4f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput of local batch scoring (batch_scoring.py) by chunk size and worker count.
+
+Generates a fleet's history and production readings with fleet_generator.py
+(one Parquet file per day), trains a small XGBoost model on the history's
+features and PART_FAILURE_NEXT_12HR labels, then streams the production
+readings through batch_scoring.score_files() for every chunk size / worker
+combination, reporting rows/s and peak memory. Each run's predictions are
+checked against scoring the whole production table in one pass, so chunk
+boundaries and truck partitioning must not change any prediction.
+
+    python benchmarks/bench_batch_scoring.py --trucks 500 --days 7 --chunk-rows 50000 250000 --workers 1 4
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import xgboost  # noqa: E402
+
+from batch_scoring import load_model, predict_proba, score_files  # noqa: E402
+from features import FEATURE_COLUMNS, compute_features  # noqa: E402
+from fleet_generator import PRODUCTION_TABLE, generate_frame, write_fleet  # noqa: E402
+
+# Production readings follow the training history
+HISTORY_START, PRODUCTION_START = "2025-03-01", "2025-03-29"
+
+
+def train_model(path, n_trucks, days):
+    """Fit a small model on generated history and save it as a native XGBoost file."""
+    history = generate_frame(n_trucks, HISTORY_START, days)
+    features = pd.DataFrame(compute_features(history))
+    matrix = xgboost.DMatrix(features[FEATURE_COLUMNS], label=history["PART_FAILURE_NEXT_12HR"])
+    booster = xgboost.train({"objective": "binary:logistic", "max_depth": 6, "eta": 0.3}, matrix,
+                            num_boost_round=50)
+    booster.save_model(path)
+    return len(history)
+
+
+def one_pass(source_frame, model):
+    """Every production reading scored at once, ordered by (TRUCK_ID, TIMESTAMP)."""
+    features = compute_features(source_frame.sort_values(["TRUCK_ID", "TIMESTAMP"], ignore_index=True))
+    return features["TRUCK_ID"], features["TIMESTAMP"], predict_proba(model, features)[:, 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7, help="Days of production readings")
+    parser.add_argument("--history-days", type=int, default=14, help="Days of training history")
+    parser.add_argument("--chunk-rows", type=int, nargs="+", default=[50_000, 250_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        model_path = os.path.join(path, "model.json")
+        trained = train_model(model_path, args.trucks, args.history_days)
+        production = os.path.join(path, "production")
+        readings = write_fleet(production, args.trucks, PRODUCTION_START, args.days, table=PRODUCTION_TABLE)
+        print(f"Model trained on {trained} readings; scoring {readings} readings from {args.trucks} trucks")
+
+        expected_trucks, expected_times, expected = one_pass(
+            pd.concat(pd.read_parquet(os.path.join(production, name)) for name in sorted(os.listdir(production))),
+            load_model(model_path))
+
+        print(f"{'chunk rows':>10} {'workers':>8} {'seconds':>8} {'rows/s':>12} {'peak MB':>8}")
+        for chunk_rows in args.chunk_rows:
+            for workers in args.workers:
+                output = os.path.join(path, "predictions.parquet")
+                stats = score_files(production, output, model_path, workers, chunk_rows)
+                # Workers report their own peak; the largest process bounds per-process memory
+                peak_mb = max(stats["peak_rss_mb"], resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+                print(f"{chunk_rows:>10} {workers:>8} {stats['seconds']:8.2f} "
+                      f"{stats['rows_per_second']:12,.0f} {peak_mb:8.0f}")
+
+                scored = pd.read_parquet(output).sort_values(["TRUCK_ID", "TIMESTAMP"], ignore_index=True)
+                assert len(scored) == readings
+                assert (scored["TRUCK_ID"].to_numpy() == expected_trucks).all()
+                assert (scored["TIMESTAMP"].to_numpy() == expected_times).all()
+                np.testing.assert_allclose(scored["PREDICT_PROBA_1"], expected, atol=1e-6)
+    print("Chunked predictions match a single pass")
+
+
+if __name__ == "__main__":
+    main()
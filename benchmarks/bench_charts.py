@@ -0,0 +1,78 @@
+"""
+Benchmark server CPU per chart render: matplotlib PNG vs. Vega-Lite spec.
+
+Builds a synthetic 12-hour chart frame (fleet average plus N trucks), renders
+all sensor panels with each backend and reports the best CPU time and the
+size of what is sent to the browser.
+
+    python benchmarks/bench_charts.py --trucks 1 5 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from charts import (AVERAGE_SERIES, group_series, panels_from_registry,  # noqa: E402
+                    render_sensor_figure, vega_sensor_spec)
+from thresholds import DEFAULT_REGISTRY  # noqa: E402
+
+
+def make_chart_frame(n_trucks, readings_per_truck=144, seed=0):
+    """Average line plus n_trucks series at 5-minute cadence, values inside each sensor's domain."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-04-07 03:00", periods=readings_per_truck, freq="5min")
+    series_ids = [AVERAGE_SERIES] + list(range(1, n_trucks + 1))
+    df = pd.DataFrame({
+        "TIMESTAMP": np.tile(timestamps.to_numpy(), len(series_ids)),
+        "TRUCK_ID": np.repeat(np.array(series_ids, dtype=object), readings_per_truck),
+        "FAILURE_PROB": rng.uniform(0.0, 0.6, size=len(series_ids) * readings_per_truck),
+    })
+    for column, sensor in DEFAULT_REGISTRY.thresholds.items():
+        centre = (sensor.low + sensor.high) / 2
+        spread = (sensor.high - sensor.low) / 10
+        df[column] = centre + rng.normal(0, spread, size=len(df))
+    return df
+
+
+def cpu_timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        best = min(best, time.process_time() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--readings", type=int, default=144,
+                        help="Readings per series (144 = 12 hours at 5-minute cadence)")
+    args = parser.parse_args()
+
+    panels = panels_from_registry(DEFAULT_REGISTRY)
+    alert_times = {1: pd.Timestamp("2025-04-07 09:00")}
+
+    # Warm up font caches etc. so the first row is not penalised
+    render_sensor_figure(group_series(make_chart_frame(1, 12), [p.field for p in panels]), panels)
+
+    print(f"{'trucks':>7} {'rows':>7} {'matplotlib cpu (s)':>19} {'png (KB)':>9} "
+          f"{'vega cpu (s)':>13} {'spec (KB)':>10}")
+    for n_trucks in args.trucks:
+        df = make_chart_frame(n_trucks, args.readings)
+        png_time, png = cpu_timed(lambda: render_sensor_figure(
+            group_series(df, [p.field for p in panels]), panels, alert_times))
+        vega_time, spec = cpu_timed(lambda: json.dumps(vega_sensor_spec(df, panels, alert_times)))
+        print(f"{n_trucks:>7} {len(df):>7} {png_time:19.3f} {len(png) / 1024:9.0f} "
+              f"{vega_time:13.4f} {len(spec) / 1024:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+End-to-end rendering benchmark: run dashboard.py headlessly against synthetic fleets.
+
+For each fleet size (trucks x days of 5-minute readings) a Parquet snapshot
+is generated, with a few trucks drifting over the alert threshold and the
+matching alert episode table, and served through offline mode
+($TRUCK_PARQUET_SNAPSHOT). Streamlit's AppTest then runs the page for every
+window/backend combination:
+
+- cold: process caches cleared, so the snapshot, data and chart caches start empty
+- warm: the same session rerun, as after a widget click that changes nothing
+
+dashboard.py times its sections with profiling.Profiler (data load,
+preprocessing, alert detection, table, chart data, average, downsampling,
+render ...). Each section's seconds are printed and appended to a history
+file (CSV, or JSON lines for a .jsonl path) with the commit they were measured
+at, and the total is compared with the last run of the same configuration at
+a different commit, so regressions show up across commits.
+
+    python benchmarks/bench_dashboard.py --trucks 50 200 --days 7 --windows 3 12
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.logger import set_log_level  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from alerts import ALERT_THRESHOLD, update_alert_episodes  # noqa: E402
+from data_access import ALERT_EPISODE_TABLE  # noqa: E402
+from load_test_sessions import make_readings  # noqa: E402
+from parquet_source import SNAPSHOT_ENV, finish_snapshot, write_snapshot  # noqa: E402
+
+DASHBOARD = os.path.join(REPO_ROOT, "dashboard.py")
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, "benchmarks", "results", "dashboard_history.csv")
+
+# The dashboard opens on 2025-04-07 15:00; the synthetic fleet ends later that day
+FLEET_END = pd.Timestamp("2025-04-07 23:55")
+
+HISTORY_FIELDS = ["recorded_at", "commit", "trucks", "days", "window_hours", "backend", "run",
+                  "section", "seconds"]
+
+
+def make_fleet(n_trucks, days, alert_share=0.05, seed=0):
+    """
+    Raw prediction rows at 5-minute cadence, mostly healthy.
+
+    Failure probabilities are low, except for `alert_share` of the trucks,
+    which ramp up past the alert threshold over the final day.
+    """
+    timestamps = pd.date_range(FLEET_END - pd.Timedelta(days=days), FLEET_END, freq="5min", inclusive="right")
+    df = make_readings(n_trucks, timestamps, seed)
+    rng = np.random.default_rng(seed + 1)
+    prob = rng.beta(1, 12, len(df))
+
+    n_alert = max(1, int(n_trucks * alert_share))
+    ramp = ((df["TIMESTAMP"] - (FLEET_END - pd.Timedelta(days=1))) / pd.Timedelta(days=1)).clip(0, 1)
+    drifting = df["TRUCK_ID"].to_numpy() <= n_alert
+    prob[drifting] += 0.9 * ramp.to_numpy()[drifting]
+    df["PREDICT_PROBA_1"] = np.clip(prob, 0, 1)
+    return df
+
+
+def build_snapshot(path, n_trucks, days):
+    """Write a synthetic fleet and its alert episodes as an offline snapshot."""
+    df = make_fleet(n_trucks, days)
+    write_snapshot(df, path)
+    finish_snapshot(path)
+    readings = df[["TRUCK_ID", "TIMESTAMP"]].assign(FAILURE_PROB=df["PREDICT_PROBA_1"].round(4))
+    episodes = update_alert_episodes(None, readings, threshold=ALERT_THRESHOLD)
+    episodes.to_parquet(os.path.join(path, f"{ALERT_EPISODE_TABLE}.parquet"), index=False)
+    return len(df)
+
+
+def section_seconds(profile):
+    """Seconds per section plus the page total (sum of the top-level sections)."""
+    totals = profile.totals()
+    totals["total"] = sum(seconds for name, seconds in totals.items() if "." not in name)
+    return totals
+
+
+def run_dashboard(window_hours, backend, timeout):
+    """Cold and warm section timings for one window/backend."""
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    at.session_state["time_window"] = f"{window_hours} hours"
+    at.session_state["chart_backend"] = backend
+    at.session_state["show_alerts"] = True
+
+    results = {}
+    for run in ("cold", "warm"):
+        at.run()
+        if at.exception or at.error:
+            messages = [e.value for e in at.exception] + [e.value for e in at.error]
+            raise RuntimeError(f"dashboard failed ({run}): {messages}")
+        results[run] = section_seconds(at.session_state["last_profile"])
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+def append_history(path, rows):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".jsonl"):
+        with open(path, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        return
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def previous_total(history, commit, config):
+    """Last recorded total for the same configuration at another commit, or None."""
+    for row in reversed(history):
+        if row["commit"] != commit and row["section"] == "total" and all(
+                str(row[key]) == str(value) for key, value in config.items()):
+            return row["commit"], float(row["seconds"])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--windows", type=int, nargs="+", default=[3, 12], choices=[3, 6, 12],
+                        help="Time windows in hours")
+    parser.add_argument("--backends", nargs="+", default=["matplotlib", "vega"])
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="CSV, or JSON lines for a .jsonl path")
+    parser.add_argument("--no-history", action="store_true", help="Print only, do not record the run")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per page run")
+    args = parser.parse_args()
+
+    # Bare-mode AppTest runs warn about the missing server runtime on every run
+    set_log_level("error")
+    commit = current_commit()
+    history = read_history(args.history)
+    recorded_at = datetime.now().isoformat(timespec="seconds")
+    rows = []
+
+    for n_trucks in args.trucks:
+        with tempfile.TemporaryDirectory() as path:
+            n_rows = build_snapshot(path, n_trucks, args.days)
+            os.environ[SNAPSHOT_ENV] = path
+            print(f"\n{n_trucks} trucks x {args.days} days ({n_rows} readings), commit {commit}")
+            for window_hours in args.windows:
+                for backend in args.backends:
+                    results = run_dashboard(window_hours, backend, args.timeout)
+                    print(f"\n  {window_hours}h window, {backend}")
+                    print(f"  {'section':<20} {'cold (s)':>9} {'warm (s)':>9}")
+                    for section in results["cold"]:
+                        warm = results["warm"].get(section)
+                        warm = f"{warm:9.3f}" if warm is not None else f"{'cached':>9}"
+                        print(f"  {section:<20} {results['cold'][section]:9.3f} {warm}")
+
+                    for run, sections in results.items():
+                        config = {"trucks": n_trucks, "days": args.days, "window_hours": window_hours,
+                                  "backend": backend, "run": run}
+                        previous = previous_total(history, commit, config)
+                        if previous is not None:
+                            change = sections["total"] / previous[1] - 1
+                            print(f"  {run} total {change:+.0%} vs {previous[0]} ({previous[1]:.3f}s)")
+                        rows.extend(dict(config, recorded_at=recorded_at, commit=commit, section=section,
+                                         seconds=round(seconds, 6))
+                                    for section, seconds in sections.items())
+    os.environ.pop(SNAPSHOT_ENV, None)
+
+    if not args.no_history:
+        append_history(args.history, rows)
+        print(f"\nRecorded {len(rows)} timings in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark chart downsampling: the original stride sampling vs. M4 and LTTB.
+
+Builds a synthetic EGT series per truck with a few one-reading spikes, then
+reports the time taken, the points kept and how many spikes survive for each
+method.
+
+    python benchmarks/bench_downsampling.py --trucks 10 100 --readings 8640
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from downsampling import bucket_count, downsample  # noqa: E402
+
+
+def legacy_optimize_chart_data(df, max_points_per_series=200):
+    """The stride sampling previously inlined in dashboard.py as optimize_chart_data."""
+    if df.empty:
+        return df
+    optimized_dfs = []
+    for truck_id, group_df in df.groupby('TRUCK_ID'):
+        if len(group_df) <= max_points_per_series:
+            optimized_dfs.append(group_df)
+            continue
+        sample_rate = max(1, int(len(group_df) / max_points_per_series))
+        sampled_df = pd.concat([group_df.iloc[[0]], group_df.iloc[1:-1:sample_rate], group_df.iloc[[-1]]])
+        threshold_points = group_df[group_df['FAILURE_PROB'] > 0.5].copy()
+        combined_df = pd.concat([sampled_df, threshold_points]).drop_duplicates()
+        optimized_dfs.append(combined_df.sort_values('TIMESTAMP'))
+    return pd.concat(optimized_dfs)
+
+
+def make_series(n_trucks, readings_per_truck, spikes_per_truck=5, seed=0):
+    """Random-walk EGT per truck at 5-minute cadence with isolated spikes."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-04-07", periods=readings_per_truck, freq="5min")
+    n_rows = n_trucks * readings_per_truck
+    egt = 340 + rng.normal(0, 0.5, size=(n_trucks, readings_per_truck)).cumsum(axis=1)
+
+    spike_rows = rng.integers(1, readings_per_truck - 1, size=(n_trucks, spikes_per_truck))
+    egt[np.arange(n_trucks)[:, None], spike_rows] += 120
+
+    df = pd.DataFrame({
+        "TIMESTAMP": np.tile(timestamps.to_numpy(), n_trucks),
+        "TRUCK_ID": np.repeat(np.arange(1, n_trucks + 1), readings_per_truck),
+        "EXHAUST_GAS_TEMP": egt.ravel(),
+        "FAILURE_PROB": rng.uniform(0.0, 0.45, size=n_rows),
+    })
+    spikes = np.zeros((n_trucks, readings_per_truck), dtype=bool)
+    spikes[np.arange(n_trucks)[:, None], spike_rows] = True
+    return df, spikes.ravel()
+
+
+def timed(fn, *args, repeat=3, **kwargs):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--readings", type=int, default=8640,
+                        help="Readings per truck (8640 = 30 days at 5-minute cadence)")
+    parser.add_argument("--width", type=int, default=1000, help="Chart width in pixels")
+    args = parser.parse_args()
+
+    n_buckets = bucket_count(args.width)
+    print(f"{'trucks':>7} {'rows':>10} {'method':>7} {'time (s)':>9} {'points':>9} {'spikes kept':>12}")
+    for n_trucks in args.trucks:
+        df, spikes = make_series(n_trucks, args.readings)
+        spike_index = set(df.index[spikes])
+        keep_mask = df["FAILURE_PROB"].to_numpy() > 0.5
+        runs = [
+            ("legacy", lambda: timed(legacy_optimize_chart_data, df, repeat=1)),
+            ("m4", lambda: timed(downsample, df, n_buckets, mode="m4",
+                                 y_columns=["EXHAUST_GAS_TEMP"], keep_mask=keep_mask)),
+            ("lttb", lambda: timed(downsample, df, n_buckets, mode="lttb",
+                                   y_columns=["EXHAUST_GAS_TEMP"], keep_mask=keep_mask)),
+        ]
+        for name, run in runs:
+            elapsed, result = run()
+            kept = len(spike_index.intersection(result.index))
+            print(f"{n_trucks:>7} {len(df):>10} {name:>7} {elapsed:9.4f} {len(result):>9} "
+                  f"{kept:>5}/{len(spike_index):<6}")
+
+
+if __name__ == "__main__":
+    main()
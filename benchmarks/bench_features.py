@@ -0,0 +1,106 @@
+"""
+Check the NumPy feature kernel against the feature SQL and time both.
+
+features.compute_features() and features.feature_sql() are two renderings of
+the same 30 model features. This computes them for the quickstart readings
+(--csv, turbo_data_production.csv or turbo_history_data.csv) or a generated
+fleet, with the SQL running on a LocalSession (SQLite), and fails if any
+feature differs: lags, deltas, min/max and hour of day must be identical,
+rolling averages equal to within float rounding. --missing blanks a share of
+the sensor readings first, to check that both skip them like SQL NULLs.
+
+    python benchmarks/bench_features.py --csv turbo_data_production.csv
+    python benchmarks/bench_features.py --trucks 200 --days 7 --missing 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from features import (FEATURE_COLUMNS, OUTPUT_COLUMNS, PRODUCTION_DATA_TABLE, RAW_COLUMNS,  # noqa: E402
+                      compute_features, feature_sql)
+from fleet_generator import generate_frame  # noqa: E402
+from local_session import LocalSession  # noqa: E402
+
+# Rolling averages are summed in a different order than SQLite's window aggregate
+AVERAGE_TOLERANCE = 1e-9
+
+
+def read_readings(args):
+    if args.csv:
+        readings = pd.read_csv(args.csv)
+        readings.columns = [c.upper() for c in readings.columns]
+        readings["TIMESTAMP"] = pd.to_datetime(readings["TIMESTAMP"])
+        readings["TRUCK_ID"] = readings["TRUCK_ID"].astype(int)
+    else:
+        readings = generate_frame(args.trucks, "2025-04-01", args.days)
+    if args.missing:
+        rng = np.random.default_rng(0)
+        for column in RAW_COLUMNS:
+            readings.loc[rng.random(len(readings)) < args.missing, column] = np.nan
+    return readings
+
+
+def compare(expected, actual):
+    """Largest absolute difference per feature; raises AssertionError on a mismatch."""
+    differences = {}
+    for column in FEATURE_COLUMNS:
+        want = expected[column].to_numpy(dtype=np.float64)
+        got = np.asarray(actual[column], dtype=np.float64)
+        assert np.array_equal(np.isnan(want), np.isnan(got)), f"{column}: NULLs differ"
+        both = ~np.isnan(want)
+        differences[column] = float(np.abs(want[both] - got[both]).max()) if both.any() else 0.0
+        if column.endswith("_AVG_1HR"):
+            np.testing.assert_allclose(got, want, rtol=AVERAGE_TOLERANCE, atol=AVERAGE_TOLERANCE,
+                                       err_msg=column)
+        else:
+            np.testing.assert_array_equal(got, want, err_msg=column)
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", help="Quickstart turbo_data_production.csv or turbo_history_data.csv")
+    parser.add_argument("--trucks", type=int, default=100, help="Generated fleet size (without --csv)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--missing", type=float, default=0.0, help="Share of readings to blank out")
+    args = parser.parse_args()
+
+    readings = read_readings(args)
+    session = LocalSession()
+    session.register(PRODUCTION_DATA_TABLE, readings)
+    print(f"{len(readings)} readings from {readings['TRUCK_ID'].nunique()} trucks")
+
+    started = time.perf_counter()
+    expected = session.sql(feature_sql(PRODUCTION_DATA_TABLE, session.dialect)).to_pandas()
+    sql_seconds = time.perf_counter() - started
+    expected["TIMESTAMP"] = pd.to_datetime(expected["TIMESTAMP"])
+    expected = expected.sort_values(["TRUCK_ID", "TIMESTAMP"], ignore_index=True)
+
+    started = time.perf_counter()
+    ordered = readings.sort_values(["TRUCK_ID", "TIMESTAMP"], ignore_index=True)
+    sort_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = compute_features(ordered)
+    kernel_seconds = time.perf_counter() - started
+
+    assert list(actual) == OUTPUT_COLUMNS
+    assert (actual["TRUCK_ID"] == expected["TRUCK_ID"].to_numpy()).all()
+    assert (pd.to_datetime(actual["TIMESTAMP"]) == expected["TIMESTAMP"]).all()
+    differences = compare(expected, actual)
+
+    print(f"{'method':<22} {'seconds':>8} {'rows/s':>12}")
+    for method, seconds in (("SQL (SQLite)", sql_seconds), ("NumPy sort", sort_seconds),
+                            ("NumPy kernel", kernel_seconds)):
+        print(f"{method:<22} {seconds:8.3f} {len(readings) / seconds:12,.0f}")
+    worst = max(differences, key=differences.get)
+    print(f"All {len(FEATURE_COLUMNS)} features match (largest difference {differences[worst]:.2e} in {worst})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark streamed batch fetching against a single to_pandas() call.
+
+A synthetic result serves the prediction query in batches the way Snowflake's
+result chunks arrive (FAILURE_PROB optionally as Decimal objects, as NUMBER
+columns are returned). The previous path materializes the whole to_pandas()
+frame and then normalizes it; fetch_frame() downcasts each batch as it
+arrives. Reports the peak Python memory of each path (tracemalloc) and the
+total time, which includes generating the synthetic batches.
+
+    python benchmarks/bench_fetch.py --rows 200000 1000000 --batch-rows 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from data_access import PREDICTION_COLUMNS, fetch_frame, normalize_frame  # noqa: E402
+
+
+class SyntheticResult:
+    """Query result generated batch by batch, mirroring snowpark.DataFrame's fetch methods."""
+
+    def __init__(self, n_rows, batch_rows, n_trucks=100, decimal_prob=False):
+        self.n_rows = n_rows
+        self.batch_rows = batch_rows
+        self.n_trucks = n_trucks
+        self.decimal_prob = decimal_prob
+
+    def to_pandas_batches(self):
+        for start in range(0, self.n_rows, self.batch_rows):
+            yield self._batch(start, min(start + self.batch_rows, self.n_rows))
+
+    def to_pandas(self):
+        return pd.concat(list(self.to_pandas_batches()), ignore_index=True)
+
+    def _batch(self, lo, hi):
+        rng = np.random.default_rng(lo)
+        rows = np.arange(lo, hi)
+        df = pd.DataFrame({
+            "TIMESTAMP": pd.Timestamp("2025-04-07") + pd.to_timedelta(rows // self.n_trucks * 5, unit="min"),
+            "TRUCK_ID": rows % self.n_trucks + 1,
+        })
+        for column in PREDICTION_COLUMNS[2:-1]:
+            df[column] = rng.normal(100, 10, len(rows))
+        prob = np.round(rng.uniform(0, 1, len(rows)), 4)
+        df["FAILURE_PROB"] = [Decimal(str(p)) for p in prob] if self.decimal_prob else prob
+        return df
+
+
+def legacy_fetch(result):
+    """The previous loader path: one to_pandas() call, then normalize."""
+    return normalize_frame(result.to_pandas())
+
+
+def measure(fn, result):
+    """Time one untraced run, then record the peak of a traced one (tracing skews timings)."""
+    start = time.perf_counter()
+    fn(result)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    df = fn(result)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000, 1_000_000])
+    parser.add_argument("--batch-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'prob':>8} {'method':>12} {'time (s)':>9} {'peak MB':>8} {'result MB':>10}")
+    for n_rows in args.rows:
+        for decimal_prob in (False, True):
+            result = SyntheticResult(n_rows, args.batch_rows, decimal_prob=decimal_prob)
+            expected = None
+            for name, fn in (("to_pandas", legacy_fetch),
+                             ("batches", lambda r: fetch_frame(r, PREDICTION_COLUMNS))):
+                elapsed, peak, df = measure(fn, result)
+                if expected is None:
+                    expected = df
+                else:
+                    assert df.equals(expected)
+                print(f"{n_rows:>10} {'Decimal' if decimal_prob else 'float64':>8} {name:>12} "
+                      f"{elapsed:9.3f} {peak / 1e6:8.1f} {df.memory_usage(deep=True).sum() / 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
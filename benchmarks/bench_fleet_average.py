@@ -0,0 +1,87 @@
+"""
+Benchmark the fleet-average baseline: groupby mean vs. FleetAggregate.
+
+For each fleet size, compares the previous
+`non_alert_df.groupby('TIMESTAMP').mean()` with building the aggregate once and
+subtracting the alert trucks, and with the incremental path (one new reading
+per truck added to an existing aggregate). Also times the p10/p50/p90 bands.
+
+    python benchmarks/bench_fleet_average.py --trucks 100 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fleet_aggregates import FleetAggregate, fleet_percentiles  # noqa: E402
+
+COLUMNS = ["EXHAUST_GAS_TEMP", "OIL_PRESSURE", "BOOST_PRESSURE", "OIL_CONTAMINATION",
+           "ENGINE_BOOST_RATIO", "FAILURE_PROB"]
+
+
+def make_window(n_trucks, readings_per_truck, start="2025-04-07 03:00", seed=0):
+    """Synthetic readings at 5-minute cadence for every truck."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=readings_per_truck, freq="5min")
+    df = pd.DataFrame({
+        "TIMESTAMP": np.tile(timestamps.to_numpy(), n_trucks),
+        "TRUCK_ID": np.repeat(np.arange(1, n_trucks + 1), readings_per_truck),
+    })
+    for column in COLUMNS:
+        df[column] = rng.normal(size=len(df))
+    return df
+
+
+def legacy_average(chart_df, alert_trucks):
+    """The groupby previously inlined in dashboard.py."""
+    non_alert_trucks = [t for t in chart_df['TRUCK_ID'].unique() if t not in alert_trucks]
+    non_alert_df = chart_df[chart_df['TRUCK_ID'].isin(non_alert_trucks)]
+    return non_alert_df.groupby('TIMESTAMP').mean().reset_index()
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--readings", type=int, default=144,
+                        help="Readings per truck in the window (144 = 12 hours at 5-minute cadence)")
+    parser.add_argument("--alert-fraction", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'trucks':>7} {'rows':>9} {'groupby (s)':>12} {'aggregate (s)':>14} "
+          f"{'incremental (s)':>16} {'percentiles (s)':>16}")
+    for n_trucks in args.trucks:
+        df = make_window(n_trucks, args.readings)
+        alert_trucks = list(range(1, n_trucks + 1, max(1, int(1 / args.alert_fraction))))
+        is_alert_row = df["TRUCK_ID"].isin(alert_trucks)
+
+        legacy_time, legacy = timed(lambda: legacy_average(df, alert_trucks))
+        new_time, new = timed(lambda: FleetAggregate.from_frame(df, COLUMNS).without(df[is_alert_row]).mean())
+        assert np.allclose(legacy[COLUMNS].to_numpy(), new[COLUMNS].to_numpy())
+
+        # Next poll: one new reading per truck folded into the existing sums
+        fleet = FleetAggregate.from_frame(df, COLUMNS)
+        next_rows = make_window(n_trucks, 1, start=df["TIMESTAMP"].max() + pd.Timedelta(minutes=5), seed=1)
+        incremental_time, _ = timed(lambda: fleet.copy().add(next_rows))
+
+        band_time, _ = timed(lambda: fleet_percentiles(df[~is_alert_row], COLUMNS))
+        print(f"{n_trucks:>7} {len(df):>9} {legacy_time:12.4f} {new_time:14.4f} "
+              f"{incremental_time:16.5f} {band_time:16.4f}")
+
+
+if __name__ == "__main__":
+    main()
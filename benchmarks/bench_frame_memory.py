@@ -0,0 +1,94 @@
+"""
+Benchmark the compact in-memory prediction frame against the to_pandas() layout.
+
+Builds a synthetic result as to_pandas() returns it (int64 TRUCK_ID, float64
+sensors, FAILURE_PROB as float64 or Decimal objects), then reports the memory
+of that frame and of normalize_frame(), plus the time to cut a time window and
+pick trucks with masks vs. the sorted/offset-index helpers.
+
+    python benchmarks/bench_frame_memory.py --trucks 100 1000 --readings 2016
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from data_access import filter_window, normalize_frame, truck_offsets, truck_rows  # noqa: E402
+
+SENSOR_COLUMNS = ["EXHAUST_GAS_TEMP", "OIL_PRESSURE", "BOOST_PRESSURE", "OIL_CONTAMINATION", "ENGINE_BOOST_RATIO"]
+
+
+def make_result(n_trucks, readings_per_truck, decimal_prob=False, seed=0):
+    """Query result in time order, as to_pandas() would return it."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-04-07", periods=readings_per_truck, freq="5min")
+    n_rows = n_trucks * readings_per_truck
+    df = pd.DataFrame({
+        "TIMESTAMP": np.repeat(timestamps.to_numpy(), n_trucks),
+        "TRUCK_ID": np.tile(np.arange(1, n_trucks + 1), readings_per_truck).astype(np.int64),
+    })
+    for column in SENSOR_COLUMNS:
+        df[column] = rng.normal(100, 10, size=n_rows)
+    prob = np.round(rng.uniform(0, 1, size=n_rows), 4)
+    df["FAILURE_PROB"] = [Decimal(str(p)) for p in prob] if decimal_prob else prob
+    return df
+
+
+def legacy_selection(df, start, end, trucks):
+    """The masks dashboard.py previously applied to the prefetched frame."""
+    filtered_df = df[(df['TIMESTAMP'] >= start) & (df['TIMESTAMP'] <= end)]
+    return filtered_df[filtered_df['TRUCK_ID'].isin(trucks)]
+
+
+def compact_selection(df, start, end, trucks):
+    filtered_df = filter_window(df, start, end)
+    return truck_rows(filtered_df, trucks, truck_offsets(filtered_df))
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--readings", type=int, default=2016,
+                        help="Readings per truck (2016 = 7 days at 5-minute cadence)")
+    parser.add_argument("--selected", type=int, default=3, help="Trucks picked for the chart")
+    args = parser.parse_args()
+
+    print(f"{'trucks':>7} {'rows':>10} {'prob':>8} {'raw MB':>8} {'compact MB':>11} {'ratio':>6} "
+          f"{'normalize (s)':>14} {'mask select (s)':>16} {'slice select (s)':>17}")
+    for n_trucks in args.trucks:
+        for decimal_prob in (False, True):
+            raw = make_result(n_trucks, args.readings, decimal_prob)
+            raw_bytes = raw.memory_usage(deep=True).sum()
+            normalize_time, compact = timed(normalize_frame, raw, repeat=1)
+            compact_bytes = compact.memory_usage(deep=True).sum()
+
+            start = raw["TIMESTAMP"].iloc[len(raw) // 4]
+            end = raw["TIMESTAMP"].iloc[-1]
+            trucks = list(range(1, min(args.selected, n_trucks) + 1))
+            legacy_time, expected = timed(legacy_selection, raw, start, end, trucks)
+            compact_time, selected = timed(compact_selection, compact, start, end, trucks)
+            assert len(selected) == len(expected)
+
+            print(f"{n_trucks:>7} {len(raw):>10} {'Decimal' if decimal_prob else 'float64':>8} "
+                  f"{raw_bytes / 1e6:8.1f} {compact_bytes / 1e6:11.1f} {raw_bytes / compact_bytes:6.1f} "
+                  f"{normalize_time:14.4f} {legacy_time:16.4f} {compact_time:17.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Check and time the latest-reading-per-truck table (snapshots.py) against the groupby it replaces.
+
+Every randomized case builds a prediction frame with NaN scattered through
+the sensor columns, some trucks whose sensor goes silent part-way through and
+some trucks with no recent rows, then checks against
+`df.sort_values('TIMESTAMP').groupby('TRUCK_ID').last()`:
+
+- latest_readings() on time-ordered, truck-ordered and shuffled rows
+- a LatestSnapshot built from several appends, then window(start) for no
+  start, starts inside the data and a start after a silent sensor's last
+  non-null value (which must come back NaN, not the stale value)
+
+Then times the three on one window per fleet size.
+
+    python benchmarks/bench_latest_readings.py --cases 200 --trucks 1000 10000 --readings 144
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from snapshots import LatestSnapshot, latest_readings  # noqa: E402
+
+SENSOR_COLUMNS = ["EXHAUST_GAS_TEMP", "OIL_PRESSURE", "BOOST_PRESSURE", "OIL_CONTAMINATION", "ENGINE_BOOST_RATIO"]
+
+
+def legacy_latest(df):
+    """The per-rerun expression previously inlined in dashboard.py."""
+    return df.sort_values('TIMESTAMP').groupby('TRUCK_ID').last().reset_index()
+
+
+def make_frame(n_trucks, readings_per_truck, nan_fraction=0.2, seed=0):
+    """
+    Synthetic predictions at 5-minute cadence, ordered by (TIMESTAMP, TRUCK_ID).
+
+    Returns:
+        (frame, silent_from): silent_from is the first timestamp after which
+        the first truck's OIL_PRESSURE is always NaN
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-04-07", periods=readings_per_truck, freq="5min")
+    # Trucks report at their own offsets and some stop early, so windows cut some of them out
+    reported = rng.random((readings_per_truck, n_trucks)) > 0.1
+    stops_at = np.where(rng.random(n_trucks) < 0.1, rng.integers(0, readings_per_truck, n_trucks), readings_per_truck)
+    reported &= np.arange(readings_per_truck)[:, None] < stops_at
+    # The first truck reports throughout, with OIL_PRESSURE going silent a third of the way in
+    reported[:, 0] = True
+    rows, trucks = np.nonzero(reported)
+    df = pd.DataFrame({
+        "TIMESTAMP": timestamps[rows],
+        "TRUCK_ID": trucks + 1,
+        "FAILURE_PROB": rng.random(len(rows)),
+    })
+    for column in SENSOR_COLUMNS:
+        df[column] = np.where(rng.random(len(rows)) < nan_fraction, np.nan, rng.normal(300, 50, len(rows)))
+
+    silent_from = timestamps[readings_per_truck // 3]
+    df.loc[(df["TRUCK_ID"] == 1) & (df["TIMESTAMP"] >= silent_from), "OIL_PRESSURE"] = np.nan
+    df.loc[(df["TRUCK_ID"] == 1) & (df["TIMESTAMP"] == timestamps[0]), "OIL_PRESSURE"] = 1.0
+    return df, silent_from
+
+
+def check_case(seed):
+    """Assert every variant matches the groupby for one random frame."""
+    rng = np.random.default_rng(seed)
+    df, silent_from = make_frame(int(rng.integers(1, 40)), int(rng.integers(3, 60)),
+                                 nan_fraction=rng.uniform(0, 0.6), seed=seed)
+
+    expected = legacy_latest(df)
+    for variant in (df, df.sort_values(["TRUCK_ID", "TIMESTAMP"]), df.sample(frac=1, random_state=seed)):
+        pd.testing.assert_frame_equal(latest_readings(variant), expected)
+
+    snapshot = LatestSnapshot()
+    timestamps = df["TIMESTAMP"].unique()
+    for batch in np.array_split(timestamps, int(rng.integers(1, 6))):
+        appended = df[df["TIMESTAMP"].isin(batch)]
+        # Appended batches arrive in any row order; only their times must not go backwards
+        snapshot.update(appended.sample(frac=1, random_state=seed))
+
+    starts = [None, timestamps[len(timestamps) // 2], timestamps[-1], silent_from]
+    for start in starts:
+        window = df if start is None else df[df["TIMESTAMP"] >= start]
+        expected = legacy_latest(window)
+        actual = snapshot.window(start)
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+
+    # The silent sensor's older value must not leak into a window that starts after it
+    silent = snapshot.window(silent_from)
+    silent_value = silent.loc[silent["TRUCK_ID"] == 1, "OIL_PRESSURE"]
+    assert len(silent_value) == 1 and silent_value.isna().all()
+
+
+def time_call(fn, repeats):
+    """Best of `repeats` wall-clock timings in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=200, help="Randomized parity cases")
+    parser.add_argument("--trucks", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--readings", type=int, default=144, help="Readings per truck in the timed window")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for seed in range(args.cases):
+        check_case(seed)
+    print(f"{args.cases} randomized cases match sort_values('TIMESTAMP').groupby('TRUCK_ID').last()")
+
+    print(f"{'trucks':>8} {'rows':>10} {'groupby s':>10} {'latest s':>10} {'window s':>10}")
+    for n_trucks in args.trucks:
+        df, _ = make_frame(n_trucks, args.readings)
+        snapshot = LatestSnapshot()
+        snapshot.update(df)
+        start = df["TIMESTAMP"].iloc[len(df) // 2]
+        t_legacy = time_call(lambda: legacy_latest(df[df["TIMESTAMP"] >= start]), args.repeats)
+        t_latest = time_call(lambda: latest_readings(df[df["TIMESTAMP"] >= start]), args.repeats)
+        t_window = time_call(lambda: snapshot.window(start), args.repeats)
+        print(f"{n_trucks:>8} {len(df):>10,} {t_legacy:>10.4f} {t_latest:>10.4f} {t_window:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
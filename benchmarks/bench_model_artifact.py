@@ -0,0 +1,91 @@
+"""
+Inference latency of a model artifact (model_artifact.py), with and without the prediction cache.
+
+Trains a small XGBoost model on generated history (as in
+bench_batch_scoring.py), exports it with export_booster() and loads it back
+with ModelArtifact.load(), reporting export size and load time. Then scores
+generated production feature rows (as a float32 matrix) in batches of each
+--batch-sizes, three ways:
+
+- booster: the bare xgboost Booster (inplace_predict)
+- miss: ModelArtifact.predict_proba() on rows not seen before (hashing + model call)
+- hit: the same rows again, answered from the LRU cache
+
+and prints p50/p99 latency per call. Every cached prediction must equal the
+model's.
+
+    python benchmarks/bench_model_artifact.py --batch-sizes 1 2 64 --repeats 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import xgboost  # noqa: E402
+
+from bench_batch_scoring import PRODUCTION_START, train_model  # noqa: E402
+from features import FEATURE_COLUMNS, compute_features  # noqa: E402
+from fleet_generator import generate_frame  # noqa: E402
+from model_artifact import MODEL_FILE, ModelArtifact, export_booster  # noqa: E402
+
+
+def timed(call, repeats):
+    """Latency of each call in microseconds."""
+    latencies = np.empty(repeats)
+    for i in range(repeats):
+        started = time.perf_counter()
+        call(i)
+        latencies[i] = (time.perf_counter() - started) * 1e6
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 64])
+    parser.add_argument("--repeats", type=int, default=300, help="Calls timed per batch size and mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        model_path = os.path.join(path, "model.json")
+        train_model(model_path, args.trucks, 7)
+        booster = xgboost.Booster()
+        booster.load_model(model_path)
+        artifact_dir = os.path.join(path, "artifact")
+        export_booster(booster, artifact_dir, version="BENCH")
+        size_kb = os.path.getsize(os.path.join(artifact_dir, MODEL_FILE)) / 1024
+        artifact = ModelArtifact.load(artifact_dir, cache_entries=max(args.batch_sizes) * args.repeats)
+    # Model and manifest are in memory once loaded
+    print(f"Artifact: {size_kb:.0f} KB, loaded in {artifact.load_seconds * 1000:.1f} ms")
+
+    features = pd.DataFrame(compute_features(generate_frame(args.trucks, PRODUCTION_START, 3)))
+    matrix = features[FEATURE_COLUMNS].to_numpy(np.float32)
+
+    print(f"{'batch':>6} {'mode':<8} {'p50 us':>8} {'p99 us':>8} {'rows/s':>11}")
+    for batch_size in args.batch_sizes:
+        batches = [matrix[i * batch_size:(i + 1) * batch_size] for i in range(args.repeats)]
+        if len(batches[-1]) < batch_size:
+            raise SystemExit(f"Not enough rows for {args.repeats} batches of {batch_size}; lower --repeats")
+        artifact.clear_cache()
+        runs = {
+            "booster": timed(lambda i: booster.inplace_predict(batches[i]), args.repeats),
+            "miss": timed(lambda i: artifact.predict_proba(batches[i]), args.repeats),
+            "hit": timed(lambda i: artifact.predict_proba(batches[i]), args.repeats),
+        }
+        for mode, latencies in runs.items():
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{batch_size:>6} {mode:<8} {p50:8.0f} {p99:8.0f} {batch_size / (latencies.mean() / 1e6):11,.0f}")
+
+        sample = np.concatenate(batches[:10])
+        np.testing.assert_allclose(artifact.predict_proba(sample)[:, 1], booster.inplace_predict(sample), rtol=1e-6)
+    print("Cached predictions match the model")
+
+
+if __name__ == "__main__":
+    main()
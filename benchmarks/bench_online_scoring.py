@@ -0,0 +1,141 @@
+"""
+Load-generate the online scorer (online_scoring.py) and report per-reading latency.
+
+A small XGBoost model is trained on generated history (as in
+bench_batch_scoring.py) and generated production readings are replayed in
+time order by --concurrency clients, each owning a share of the trucks and
+sending its readings one at a time. Clients call OnlineScorer.score()
+directly (in-process) or POST to the HTTP API over keep-alive connections.
+Reports readings/s, readings per model call (how well concurrent readings
+are coalesced) and latency percentiles against TARGET_P99_MS.
+
+Before the load runs, the scorer's incremental features for the whole
+stream are checked against features.compute_features().
+
+    python benchmarks/bench_online_scoring.py --trucks 200 --concurrency 1 16 64 --modes inprocess http
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from batch_scoring import load_model  # noqa: E402
+from bench_batch_scoring import PRODUCTION_START, train_model  # noqa: E402
+from features import FEATURE_COLUMNS, RAW_COLUMNS, compute_features  # noqa: E402
+from fleet_generator import generate_frame  # noqa: E402
+from online_scoring import OnlineScorer, serve  # noqa: E402
+
+# Latency goal per reading on a laptop CPU
+TARGET_P99_MS = 5.0
+
+
+def check_features(readings):
+    """Incremental features for every reading must match the batch kernel."""
+    scorer = OnlineScorer(model=None)
+    online = {}
+    for reading in readings:
+        truck, timestamp, features = scorer.features(reading)
+        online[(truck, timestamp)] = features
+    asyncio.run(scorer.close())
+    frame = pd.DataFrame(readings).sort_values(["TRUCK_ID", "TIMESTAMP"], ignore_index=True)
+    expected = compute_features(frame)
+    actual = np.array([online[(truck, timestamp)] for truck, timestamp in
+                       zip(frame["TRUCK_ID"], frame["TIMESTAMP"].dt.to_pydatetime())])
+    for i, column in enumerate(FEATURE_COLUMNS):
+        np.testing.assert_allclose(actual[:, i], expected[column].astype(float), rtol=1e-9, atol=1e-9,
+                                   err_msg=column)
+
+
+async def post(connection, reading):
+    reader, writer = connection
+    body = json.dumps(reading).encode()
+    writer.write(b"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    result = json.loads(await reader.readexactly(length))
+    if not status.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(f"{status.decode().strip()}: {result}")
+    return result
+
+
+async def run_load(model, readings, concurrency, mode, port):
+    """Replay the readings with `concurrency` clients; returns latencies (seconds) and the scorer."""
+    scorer = OnlineScorer(model)
+    shares = [[] for _ in range(concurrency)]
+    for reading in readings:
+        shares[reading["TRUCK_ID"] % concurrency].append(reading)
+    server = await serve(scorer, port=port) if mode == "http" else None
+    latencies = []
+
+    async def client(share):
+        connection = await asyncio.open_connection("127.0.0.1", port) if server else None
+        for reading in share:
+            started = time.perf_counter()
+            if connection:
+                await post(connection, reading)
+            else:
+                await scorer.score(reading)
+            latencies.append(time.perf_counter() - started)
+        if connection:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(share) for share in shares if share))
+    seconds = time.perf_counter() - started
+    if server:
+        server.close()
+        await server.wait_closed()
+    await scorer.close()
+    return np.array(latencies), seconds, scorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trucks", type=int, default=100)
+    parser.add_argument("--hours", type=int, default=6, help="Hours of readings replayed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--modes", nargs="+", default=["inprocess", "http"], choices=["inprocess", "http"])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        model_path = os.path.join(path, "model.json")
+        train_model(model_path, args.trucks, 7)
+        model = load_model(model_path)
+
+    frame = generate_frame(args.trucks, PRODUCTION_START, 1)
+    frame = frame[frame["TIMESTAMP"] < frame["TIMESTAMP"].min() + pd.Timedelta(hours=args.hours)]
+    frame = frame.sort_values(["TIMESTAMP", "TRUCK_ID"], ignore_index=True)
+    readings = [dict(reading, TIMESTAMP=reading["TIMESTAMP"].isoformat())
+                for reading in frame[["TRUCK_ID", "TIMESTAMP"] + RAW_COLUMNS].to_dict("records")]
+    check_features([dict(r, TIMESTAMP=pd.Timestamp(r["TIMESTAMP"]).to_pydatetime()) for r in readings])
+    print(f"{len(readings)} readings from {args.trucks} trucks; online features match the batch kernel")
+
+    print(f"{'mode':<10} {'clients':>7} {'readings/s':>11} {'per call':>9} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    for mode in args.modes:
+        for concurrency in args.concurrency:
+            latencies, seconds, scorer = asyncio.run(run_load(model, readings, concurrency, mode, args.port))
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            flag = "" if p99 < TARGET_P99_MS else f"  over {TARGET_P99_MS:g} ms target"
+            print(f"{mode:<10} {concurrency:>7} {len(latencies) / seconds:11,.0f} "
+                  f"{scorer.readings / scorer.model_calls:9.1f} {p50:7.2f} {p99:7.2f} "
+                  f"{latencies.max() * 1000:7.2f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load-test N concurrent dashboard sessions against a local stand-in session.
+
+Every tick the harness appends one 5-minute reading per truck to the
+prediction table (as the scoring notebook would) and then reruns every
+session at once in a thread pool, the way live-mode tabs do. Each rerun
+loads the recent tail and cuts its window. Two modes are compared:
+
+- per-session: every session keeps its own TailBuffer (the previous design)
+- shared: sessions lease one SharedStore, refreshed by its background thread
+
+It reports the warehouse queries issued and the Python memory retained by the
+sessions' data. In shared mode both should stay flat as sessions are added.
+
+    python benchmarks/load_test_sessions.py --sessions 1 10 30 --trucks 200
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from data_access import PREDICTION_TABLE, TailBuffer, filter_window  # noqa: E402
+from local_session import LocalSession  # noqa: E402
+from shared_store import SharedStore  # noqa: E402
+
+SPAN = pd.Timedelta(hours=12)
+WINDOW = pd.Timedelta(hours=6)
+
+
+def make_readings(n_trucks, timestamps, seed=0):
+    """Raw prediction-table rows for every truck at the given timestamps."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_trucks * len(timestamps)
+    return pd.DataFrame({
+        "TIMESTAMP": np.repeat(np.asarray(timestamps, dtype="datetime64[ns]"), n_trucks),
+        "TRUCK_ID": np.tile(np.arange(1, n_trucks + 1), len(timestamps)),
+        "EXHAUST_GAS_TEMP": rng.normal(340, 10, n_rows),
+        "OIL_PRESSURE": rng.normal(380, 20, n_rows),
+        "BOOST_PRESSURE": rng.normal(150, 10, n_rows),
+        "OIL_CONTAMINATION": rng.uniform(0, 20, n_rows),
+        "ENGINE_BOOST_RATIO": rng.normal(1.0, 0.05, n_rows),
+        "PREDICT_PROBA_1": rng.uniform(0, 1, n_rows),
+    })
+
+
+def run(mode, n_sessions, n_trucks, ticks, tick_seconds):
+    """Returns (queries, retained bytes, seconds per tick)."""
+    end = pd.Timestamp("2025-04-07 12:00")
+    history = pd.date_range(end - SPAN - pd.Timedelta(hours=1), end, freq="5min")
+    session = LocalSession.from_frames({PREDICTION_TABLE: make_readings(n_trucks, history)})
+
+    buffers = [TailBuffer(span=SPAN, min_refresh_seconds=0) for _ in range(n_sessions)]
+    store = SharedStore(span=SPAN, refresh_seconds=tick_seconds, min_refresh_seconds=tick_seconds)
+    views = [None] * n_sessions
+
+    def rerun(i):
+        if mode == "shared":
+            store.acquire(i, session)
+            tail = store.snapshot()
+            if not tail.loaded:
+                tail = store.refresh()
+        else:
+            tail = buffers[i]
+            tail.refresh(session, force=True)
+        views[i] = filter_window(tail.frame, tail.hwm - WINDOW, tail.hwm)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    queries = session.query_count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        for tick in range(ticks):
+            tick_started = time.perf_counter()
+            end += pd.Timedelta(minutes=5)
+            session.append(PREDICTION_TABLE, make_readings(n_trucks, [end], seed=tick + 1))
+            list(pool.map(rerun, range(n_sessions)))
+            # Live-mode tabs rerun on an interval; the shared refresher runs in the gaps
+            time.sleep(max(0.0, tick_seconds - (time.perf_counter() - tick_started)))
+    elapsed = time.perf_counter() - started
+    queries = session.query_count - queries
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    store.stop()
+    return queries, retained, elapsed / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--trucks", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=5, help="Live-mode reruns per session")
+    parser.add_argument("--tick-seconds", type=float, default=0.5,
+                        help="Rerun interval, also used as the shared refresh interval")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'mode':>12} {'queries':>8} {'retained MB':>12} {'s/tick':>8}")
+    for n_sessions in args.sessions:
+        for mode in ("per-session", "shared"):
+            queries, retained, per_tick = run(mode, n_sessions, args.trucks, args.ticks, args.tick_seconds)
+            print(f"{n_sessions:>8} {mode:>12} {queries:>8} {retained / 1e6:12.1f} {per_tick:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Sensor time-series chart rendering for the Truck Fleet Monitoring dashboard.
+
+Two backends draw the same panels (failure probability plus one per sensor,
+sharing a time axis) from the same downsampled chart frame:
+
+- "matplotlib": the frame is split once into per-series NumPy arrays, drawn on
+  one figure and rendered to PNG bytes on the server.
+- "vega": a Vega-Lite spec (a plain dict, no Altair objects) with the data
+  inlined once in compact form. The browser draws it, so pan/zoom and
+  tooltips need no Streamlit rerun.
+
+Rendered output is cached by a fingerprint of the chart data plus the display
+options, so toggling an option back to a previous state draws nothing.
+"""
+import io
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+matplotlib.use("Agg")
+
+import matplotlib.dates as mdates  # noqa: E402
+from matplotlib import colormaps  # noqa: E402
+from matplotlib.colors import to_hex  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+import profiling  # noqa: E402
+
+# Chart backends (see module docstring)
+CHART_BACKENDS = ("matplotlib", "vega")
+
+# Series id of the fleet average line
+AVERAGE_SERIES = "Average (No Alerts)"
+
+# One panel of the sensor figure; low/high draw the acceptable range band
+ChartPanel = namedtuple("ChartPanel", ["field", "title", "y_label", "low", "high", "domain"])
+
+# Extra per-field columns picked up when present: bucket min/max and fleet percentiles
+BAND_SUFFIXES = ("_MIN", "_MAX", "_P10", "_P50", "_P90")
+
+# Height of each panel in inches; width matches the previous 10in charts
+PANEL_HEIGHT = 2.6
+FIGURE_WIDTH = 10
+FIGURE_DPI = 100
+
+
+def panels_from_registry(registry, prob_col="FAILURE_PROB"):
+    """Failure probability panel followed by one panel per registry sensor."""
+    panels = [ChartPanel(prob_col, "Failure Probability", "Probability", 0, 1, (0, 1.2))]
+    for column, sensor in registry.thresholds.items():
+        panels.append(ChartPanel(column, sensor.title, sensor.y_label, sensor.low, sensor.high,
+                                 tuple(sensor.domain)))
+    return panels
+
+
+def frame_fingerprint(df):
+    """Content hash of a frame (values and column names, not the index)."""
+    if df.empty:
+        return ("empty", tuple(df.columns))
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (len(df), tuple(df.columns), hash(hashes.tobytes()))
+
+
+def group_series(df, fields):
+    """
+    Split a chart frame into per-series arrays in one pass.
+
+    Args:
+        df: Rows for every series, with TRUCK_ID and TIMESTAMP
+        fields: Value columns to extract; `<field>` + BAND_SUFFIXES columns
+                are picked up too when present
+
+    Returns:
+        List of (series_id, timestamps, {column: values}) with the average
+        series first, then trucks in order of first appearance
+    """
+    if df.empty:
+        return []
+    columns = [c for f in fields for c in (f,) + tuple(f + b for b in BAND_SUFFIXES) if c in df.columns]
+    codes, series_ids = pd.factorize(df["TRUCK_ID"], sort=False)
+    timestamps = df["TIMESTAMP"].to_numpy()
+    order = np.lexsort((timestamps, codes))
+    codes = codes[order]
+    timestamps = timestamps[order]
+    values = {c: df[c].to_numpy(dtype=float)[order] for c in columns}
+
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+    series = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        series.append((series_ids[codes[lo]], timestamps[lo:hi], {c: v[lo:hi] for c, v in values.items()}))
+    series.sort(key=lambda s: s[0] != AVERAGE_SERIES)
+    return series
+
+
+def render_sensor_figure(series, panels, alert_times=None):
+    """
+    Draw every panel on one figure with a shared time axis and return it as PNG.
+
+    Args:
+        series: Output of group_series()
+        panels: List of ChartPanel, one subplot each, top to bottom
+        alert_times: Optional mapping of truck_id -> first alert time, drawn
+                     as dashed vertical lines
+
+    Returns:
+        PNG image bytes
+    """
+    alert_times = alert_times or {}
+    colors = _series_colors([s[0] for s in series])
+
+    # A Figure outside pyplot is not tracked by a global figure manager, so it
+    # is freed as soon as the PNG is written
+    fig = Figure(figsize=(FIGURE_WIDTH, PANEL_HEIGHT * len(panels)), dpi=FIGURE_DPI)
+    axes = fig.subplots(len(panels), 1, sharex=True, squeeze=False)[:, 0]
+
+    for i, (ax, panel) in enumerate(zip(axes, panels)):
+        # Acceptable range band and threshold lines
+        if panel.low is not None and panel.high is not None:
+            ax.axhspan(panel.low, panel.high, alpha=0.2, color="green")
+        if panel.low is not None:
+            ax.axhline(y=panel.low, color="blue", linestyle="--", linewidth=1.5)
+        if panel.high is not None:
+            ax.axhline(y=panel.high, color="red", linestyle="--", linewidth=1.5)
+
+        for series_id, timestamps, values in series:
+            if panel.field not in values:
+                continue
+            if series_id == AVERAGE_SERIES:
+                # Fleet p10-p90 band and median, when requested
+                if f"{panel.field}_P10" in values:
+                    ax.fill_between(timestamps, values[f"{panel.field}_P10"], values[f"{panel.field}_P90"],
+                                    color="grey", alpha=0.25, label="Fleet p10-p90")
+                    ax.plot(timestamps, values[f"{panel.field}_P50"], color="grey", linestyle="--", linewidth=1)
+                ax.plot(timestamps, values[panel.field], color="black", linewidth=3, label=series_id)
+                continue
+            color = colors[series_id]
+            ax.plot(timestamps, values[panel.field], color=color, marker="o", markersize=4,
+                    linestyle="-", linewidth=2, alpha=0.8, label=f"Truck {series_id}")
+            # Bucketed data: shade the min-max range around the average
+            if f"{panel.field}_MIN" in values:
+                ax.fill_between(timestamps, values[f"{panel.field}_MIN"], values[f"{panel.field}_MAX"],
+                                color=color, alpha=0.15)
+
+        if panel.domain is not None:
+            ax.set_ylim(panel.domain)
+
+        # Alert lines on every panel; labels only on the top one
+        for truck_id, failure_time in alert_times.items():
+            color = colors.get(truck_id, "red")
+            ax.axvline(x=failure_time, color=color, linestyle="--", linewidth=1.5, alpha=0.7)
+            if i == 0:
+                ax.text(failure_time, ax.get_ylim()[1] * 0.9, f"Truck {truck_id}",
+                        color=color, fontsize=8, rotation=90, verticalalignment="top")
+
+        ax.set_title(panel.title, fontsize=12, fontweight="bold")
+        ax.set_ylabel(panel.y_label, fontsize=10)
+        ax.tick_params(axis="y", labelsize=8)
+        ax.grid(True, linestyle="--", alpha=0.7)
+
+    if series:
+        axes[0].legend(loc="upper left", framealpha=0.9, fontsize=8, ncol=2)
+    axes[-1].set_xlabel("Time", fontsize=10)
+    axes[-1].xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+    axes[-1].tick_params(axis="x", labelsize=8, labelrotation=45)
+    # Layout and rasterizing usually cost more than drawing the panels
+    with profiling.span("charts.render.png"):
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+    fig.clear()
+    return buffer.getvalue()
+
+
+def _series_colors(series_ids):
+    """Colour per truck, shared by both backends so alert lines match their truck."""
+    trucks = [s for s in series_ids if s != AVERAGE_SERIES]
+    palette = colormaps["tab10"](np.linspace(0, 1, max(len(trucks), 1)))
+    return {truck: to_hex(color) for truck, color in zip(trucks, palette)}
+
+
+def _series_label(series_id):
+    return series_id if series_id == AVERAGE_SERIES else f"Truck {series_id}"
+
+
+def vega_payload(df, panels, decimals=4):
+    """
+    Compact chart data for the Vega-Lite backend.
+
+    Keeps only the panel columns (and their band columns when present), replaces
+    TRUCK_ID with a display label and rounds values, which keeps the inlined
+    JSON small.
+
+    Returns:
+        List of row dicts with TIMESTAMP (ISO text), SERIES and the value
+        columns; missing values are None
+    """
+    columns = [c for p in panels for c in (p.field,) + tuple(p.field + b for b in BAND_SUFFIXES)
+               if c in df.columns]
+    payload = df[columns].astype(float).round(decimals)
+    payload.insert(0, "SERIES", df["TRUCK_ID"].map(_series_label).to_numpy())
+    payload.insert(0, "TIMESTAMP", pd.to_datetime(df["TIMESTAMP"]).dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy())
+    # to_json writes NaN as null, which plain json.dumps would not
+    return json.loads(payload.to_json(orient="records"))
+
+
+def vega_sensor_spec(df, panels, alert_times=None):
+    """
+    Build the sensor panels as one Vega-Lite spec with a shared, zoomable time axis.
+
+    The spec is assembled as a plain dict: readings are inlined once as a
+    named dataset that every panel references.
+
+    Args:
+        df: Downsampled chart frame (same input the matplotlib backend groups)
+        panels: List of ChartPanel, top to bottom
+        alert_times: Optional mapping of truck_id -> first alert time, drawn
+                     as dashed rules
+
+    Returns:
+        Vega-Lite spec dict for st.vega_lite_chart
+    """
+    alert_times = alert_times or {}
+    series_ids = list(pd.unique(df["TRUCK_ID"]))
+    colors = _series_colors(series_ids)
+    color = {
+        "field": "SERIES",
+        "type": "nominal",
+        "scale": {
+            "domain": [_series_label(s) for s in series_ids],
+            "range": ["black" if s == AVERAGE_SERIES else colors[s] for s in series_ids],
+        },
+        "legend": {"title": None, "orient": "top"},
+    }
+    x = {"field": "TIMESTAMP", "type": "temporal", "title": None, "axis": {"format": "%H:%M"}}
+    alerts = [
+        {"TIMESTAMP": pd.Timestamp(t).strftime("%Y-%m-%dT%H:%M:%S"), "LABEL": _series_label(truck_id),
+         "COLOR": colors.get(truck_id, "red")}
+        for truck_id, t in alert_times.items()
+    ]
+
+    rows = []
+    for i, panel in enumerate(panels):
+        # Every layer carries the domain, otherwise the union of layer domains would win
+        scale = {"domain": list(panel.domain), "zero": False} if panel.domain is not None else {"zero": False}
+        layers = []
+
+        # Acceptable range band and threshold rules
+        if panel.low is not None and panel.high is not None:
+            layers.append({
+                "data": {"values": [{}]},
+                "mark": {"type": "rect", "color": "green", "opacity": 0.2},
+                "encoding": {"y": {"datum": panel.low, "type": "quantitative", "scale": scale},
+                             "y2": {"datum": panel.high}},
+            })
+        for limit, limit_color in ((panel.low, "blue"), (panel.high, "red")):
+            if limit is not None:
+                layers.append({
+                    "data": {"values": [{}]},
+                    "mark": {"type": "rule", "color": limit_color, "strokeDash": [6, 4]},
+                    "encoding": {"y": {"datum": limit, "type": "quantitative", "scale": scale}},
+                })
+
+        # Bucketed data: shade the min-max range around the average
+        if f"{panel.field}_MIN" in df.columns:
+            layers.append({
+                "data": {"name": "readings"},
+                "transform": [{"filter": {"not": {"field": "SERIES", "equal": AVERAGE_SERIES}}}],
+                "mark": {"type": "area", "opacity": 0.15, "clip": True},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": f"{panel.field}_MIN", "type": "quantitative", "scale": scale},
+                    "y2": {"field": f"{panel.field}_MAX"},
+                    "color": color,
+                },
+            })
+
+        # Fleet p10-p90 band and median around the average line
+        if f"{panel.field}_P10" in df.columns:
+            average_only = [{"filter": {"field": "SERIES", "equal": AVERAGE_SERIES}}]
+            layers.append({
+                "data": {"name": "readings"},
+                "transform": average_only,
+                "mark": {"type": "area", "color": "grey", "opacity": 0.25, "clip": True},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": f"{panel.field}_P10", "type": "quantitative", "scale": scale},
+                    "y2": {"field": f"{panel.field}_P90"},
+                },
+            })
+            layers.append({
+                "data": {"name": "readings"},
+                "transform": average_only,
+                "mark": {"type": "line", "color": "grey", "strokeDash": [4, 3], "strokeWidth": 1, "clip": True},
+                "encoding": {"x": x, "y": {"field": f"{panel.field}_P50", "type": "quantitative", "scale": scale}},
+            })
+
+        layers.append({
+            "name": f"panel_{i}",
+            "data": {"name": "readings"},
+            "mark": {"type": "line", "point": {"size": 16}, "clip": True},
+            "encoding": {
+                "x": x,
+                "y": {"field": panel.field, "type": "quantitative", "title": panel.y_label, "scale": scale},
+                "color": color,
+                "strokeWidth": {"condition": {"test": f"datum.SERIES === '{AVERAGE_SERIES}'", "value": 3},
+                                "value": 2},
+                "tooltip": [
+                    {"field": "SERIES", "type": "nominal", "title": "Series"},
+                    {"field": "TIMESTAMP", "type": "temporal", "title": "Time", "format": "%Y-%m-%d %H:%M"},
+                    {"field": panel.field, "type": "quantitative", "title": panel.title, "format": ".3~f"},
+                ],
+            },
+        })
+
+        # Alert rules on every panel; labels only on the top one
+        if alerts:
+            alert_encoding = {"x": {"field": "TIMESTAMP", "type": "temporal"},
+                              "color": {"field": "COLOR", "type": "nominal", "scale": None}}
+            layers.append({
+                "data": {"name": "alerts"},
+                "mark": {"type": "rule", "strokeDash": [6, 4], "opacity": 0.7},
+                "encoding": alert_encoding,
+            })
+            if i == 0:
+                layers.append({
+                    "data": {"name": "alerts"},
+                    "mark": {"type": "text", "angle": 270, "align": "right", "dy": -6, "fontSize": 10},
+                    "encoding": {**alert_encoding, "y": {"value": 4}, "text": {"field": "LABEL"}},
+                })
+
+        rows.append({"title": panel.title, "height": 160, "width": "container", "layer": layers})
+
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "datasets": {"readings": vega_payload(df, panels), "alerts": alerts},
+        # Drag to pan and scroll to zoom along time in the browser; all panels share the axis
+        "params": [{
+            "name": "zoom",
+            "select": {"type": "interval", "encodings": ["x"]},
+            "bind": "scales",
+            "views": [f"panel_{i}" for i in range(len(panels))],
+        }],
+        "vconcat": rows,
+        "resolve": {"scale": {"x": "shared"}},
+    }
+
+
+class ChartCache:
+    """
+    Thread-safe LRU cache of rendered chart PNGs.
+
+    Keys should combine frame_fingerprint() of the source data with every
+    selection and toggle that changes the picture.
+
+    Args:
+        max_entries: Maximum number of cached images
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, key, render):
+        """Return the PNG cached under `key`, calling `render()` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+
+        image = render()
+
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "bytes": sum(len(v) for v in self._entries.values() if isinstance(v, (bytes, str))),
+            }
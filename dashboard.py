@@ -2,8 +2,79 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import datetime
+import os
+import time
+import uuid
 from datetime import timedelta
-from snowflake.snowpark.context import get_active_session
+from data_access import (PredictionCache, aggregate_buckets, choose_bucket_minutes,
+                         filter_window, load_alert_episodes, load_bucketed_predictions, load_predictions,
+                         load_recent_readings, load_time_bounds, load_truck_ids, truck_offsets, truck_rows)
+from alerts import ALERT_THRESHOLD, detect_first_alerts, first_alerts_from_episodes
+from snapshots import latest_readings
+from shared_store import SharedStore
+from sensor_table import SORT_OPTIONS, classify_readings, paginate, render_table_html, severity_order
+from thresholds import load_registry
+from downsampling import bucket_count, downsample
+from fleet_aggregates import FleetAggregate, fleet_percentiles
+from charts import (AVERAGE_SERIES, CHART_BACKENDS, ChartCache, frame_fingerprint, group_series,
+                    panels_from_registry, render_sensor_figure, vega_sensor_spec)
+from profiling import Profiler
+from features import SENSOR_COLUMNS, WINDOW_ROWS, compute_features
+from model_artifact import ARTIFACT_ENV, load_artifact
+
+# Offline mode: $TRUCK_PARQUET_SNAPSHOT points at a Parquet snapshot written by parquet_source.py,
+# served instead of the Snowflake session (for warehouse outages and benchmarking)
+OFFLINE_SNAPSHOT = os.environ.get("TRUCK_PARQUET_SNAPSHOT")
+if not OFFLINE_SNAPSHOT:
+    from snowflake.snowpark.context import get_active_session
+
+# Data cache settings - reruns within the TTL are served from memory
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 32
+
+# Extra data fetched around the selected window so small time-nav steps are served locally
+PREFETCH_MARGIN = timedelta(hours=1)
+
+# Latest Sensor Readings table: at most this many trucks are sent to the browser per page
+TABLE_PAGE_SIZE = 100
+
+# Read alerts from the episode table maintained by the scoring notebook (section 13)
+USE_ALERT_EPISODES = True
+
+# The tail buffer holds the widest selectable window
+TAIL_SPAN = timedelta(hours=12)
+
+# Live mode polling intervals (label -> seconds)
+LIVE_REFRESH_INTERVALS = {"30 sec": 30, "1 min": 60, "5 min": 300}
+
+# The tail is shared by every session in the process and refreshed by one background thread.
+# A session's lease lapses if it has not rerun or polled for this long (must exceed the longest live interval)
+SHARED_REFRESH_SECONDS = 30
+SHARED_LEASE_SECONDS = 600
+
+# Chart downsampling: "m4" keeps each bucket's first/last/min/max, "lttb" one point per bucket.
+# Buckets are sized from the chart width (figsize 10in at 100 dpi)
+DOWNSAMPLE_MODE = "m4"
+CHART_WIDTH_PX = 1000
+
+# Wider windows are charted from min/avg/max time buckets aggregated in Snowflake,
+# sized so each truck stays within this many points (12 hours -> 15-minute buckets)
+CHART_POINTS_PER_SERIES = 72
+
+# Rendered sensor figures kept in memory, keyed by data fingerprint and display options
+CHART_CACHE_ENTRIES = 64
+
+# "matplotlib" renders PNGs on the server; "vega" sends a Vega-Lite spec drawn in the browser
+DEFAULT_CHART_BACKEND = "matplotlib"
+CHART_BACKEND_LABELS = {"matplotlib": "Static (server PNG)", "vega": "Interactive (pan/zoom in browser)"}
+
+# Every rerun's section timings are logged as JSON (logger "truck_dashboard.profiling");
+# reruns slower than this are logged at WARNING, the rest at DEBUG
+SLOW_RERUN_SECONDS = 3.0
+
+# What-if scoring: $TRUCK_MODEL_ARTIFACT points at the model artifact exported by the notebook
+# (section 14). It is loaded once per process and scored in-process, without a warehouse call
+MODEL_ARTIFACT = os.environ.get(ARTIFACT_ENV)
 
 # Set page config with initial sidebar state (expanded but collapsible)
 st.set_page_config(
@@ -310,119 +381,145 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Function to optimize chart data for better performance
-def optimize_chart_data(df, max_points_per_series=200):
-    """
-    Optimize chart data by sampling if there are too many points.
-    This significantly improves rendering performance for large datasets.
-    
-    Args:
-        df: DataFrame with timestamp and multiple series
-        max_points_per_series: Maximum number of points to display per truck
-        
-    Returns:
-        Optimized DataFrame with appropriate sampling
-    """
-    if df.empty:
-        return df
-        
-    # Group by truck ID
-    grouped = df.groupby('TRUCK_ID')
-    
-    # Initialize an empty list to store optimized dataframes
-    optimized_dfs = []
-    
-    # Process each truck's data
-    for truck_id, group_df in grouped:
-        group_size = len(group_df)
-        
-        # If the group is already small enough, keep all points
-        if group_size <= max_points_per_series:
-            optimized_dfs.append(group_df)
-        else:
-            # Calculate sampling rate to get desired number of points
-            sample_rate = max(1, int(group_size / max_points_per_series))
-            
-            # Always include the first and last points for accurate boundaries
-            first_point = group_df.iloc[[0]]
-            last_point = group_df.iloc[[-1]]
-            
-            # Sample the middle points
-            middle_points = group_df.iloc[1:-1:sample_rate]
-            
-            # Combine the three parts
-            sampled_df = pd.concat([first_point, middle_points, last_point])
-            
-            # Ensure we include any points where a threshold was crossed
-            # (especially important for failure probability)
-            threshold_points = group_df[group_df['FAILURE_PROB'] > 0.5].copy()
-            
-            # Merge the sampled points with important threshold points
-            combined_df = pd.concat([sampled_df, threshold_points]).drop_duplicates()
-            
-            # Sort by timestamp to ensure correct line plotting
-            combined_df = combined_df.sort_values('TIMESTAMP')
-            
-            optimized_dfs.append(combined_df)
-    
-    # Combine all optimized dataframes
-    if optimized_dfs:
-        result_df = pd.concat(optimized_dfs)
-        return result_df
-    else:
-        return df  # Return original if something went wrong
+# Shared across reruns and sessions so repeated clicks don't re-query Snowflake
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+
+# Sensor limits, optionally overridden per fleet via $TRUCK_THRESHOLDS_FILE
+@st.cache_resource
+def get_threshold_registry():
+    return load_registry()
+
+# Recent data shared by every open dashboard, kept current by a single background refresher
+@st.cache_resource
+def get_shared_store():
+    return SharedStore(span=TAIL_SPAN, refresh_seconds=SHARED_REFRESH_SECONDS,
+                       lease_seconds=SHARED_LEASE_SECONDS)
+
+# Rendered chart images, shared so toggling an option back is served without redrawing
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache(max_entries=CHART_CACHE_ENTRIES)
+
+# Offline snapshot, opened once per process; partitions are loaded as windows need them
+@st.cache_resource
+def get_offline_session(path):
+    from parquet_source import ParquetSession
+    return ParquetSession(path)
+
+# Section timings for this rerun (shown in the Performance panel, logged, and kept in
+# st.session_state.last_profile for benchmarks/bench_dashboard.py). Activating it lets the
+# data and chart modules record their own phases (query, batch transfer, timestamps, PNG)
+profiler = Profiler().activate()
 
 # Connect to Snowflake with enhanced error handling
 try:
-    session = get_active_session()
+    session = get_offline_session(OFFLINE_SNAPSHOT) if OFFLINE_SNAPSHOT else get_active_session()
 
     # Display the dashboard title with better styling
     st.markdown('<h1 class="dashboard-title">🚚 Truck Fleet Monitoring Dashboard</h1>', unsafe_allow_html=True)
+    if OFFLINE_SNAPSHOT:
+        st.info(f"Offline mode: serving the Parquet snapshot in {OFFLINE_SNAPSHOT}")
 
+    # Initialize time window to default 12 hours 
+    if 'time_window' not in st.session_state:
+        st.session_state.time_window = "12 hours"
+        
+    # Initialize reference time to 15:00 on 2025-04-07
+    if 'reference_time' not in st.session_state:
+        # Find the date from the data (should be 2025-04-07)
+        default_date = datetime.date(2025, 4, 7)
+        # Create a timestamp for 15:00 on that date
+        default_end_time = datetime.datetime.combine(default_date, datetime.time(15, 0, 0))
+        # Convert to pandas timestamp for consistency
+        st.session_state.reference_time = pd.Timestamp(default_end_time)
+    
+    # Live mode keeps the window pinned to the newest data and polls for more
+    if 'live_mode' not in st.session_state:
+        st.session_state.live_mode = False
+    if 'live_interval' not in st.session_state:
+        st.session_state.live_interval = "1 min"
+    
+    # The most recent data lives in the process-wide store; this session only holds a lease
+    # (plus its window and truck selection), renewed on every rerun
+    if 'store_lease' not in st.session_state:
+        st.session_state.store_lease = uuid.uuid4().hex
+    shared_store = get_shared_store()
+    shared_store.acquire(st.session_state.store_lease, session)
+    tail_buffer = shared_store.snapshot()
+    
+    # Calculate start and end times based on selected window
+    time_window = st.session_state.time_window
+        
+    # Get window duration in hours
+    window_hours = int(time_window.split()[0])
+    
+    # Calculate end time (reference time) and start time (reference - window)
+    end_datetime = st.session_state.reference_time
+    start_datetime = end_datetime - timedelta(hours=window_hours)
+    profiler.checkpoint("startup")
+    
     # Define the query to get the sensor data
     try:
         # Execute the query with timeout handling
         with st.spinner('Loading data from Snowflake...'):
-            query = """
-            select 
-                TIMESTAMP, 
-                TRUCK_ID, 
-                EXHAUST_GAS_TEMP, 
-                OIL_PRESSURE, 
-                BOOST_PRESSURE, 
-                OIL_CONTAMINATION, 
-                ENGINE_BOOST_RATIO, 
-                round(predict_proba_1, 4) as FAILURE_PROB
-            from TURBO_DATA_PREDICTIONS_NEW
-            Where TIMESTAMP <= '2025-04-08 00:00:00.000' and TIMESTAMP >= '2025-04-07 00:00:00.000' 
-            order by TRUCK_ID, TIMESTAMP
-            """
-            
-            df = session.sql(query).to_pandas()
+            prediction_cache = get_prediction_cache()
             
-            if df.empty:
+            # Overall data range, used for "Show Latest Data"
+            data_start, data_end = load_time_bounds(session, cache=prediction_cache)
+            if data_end is None:
                 st.error("No data was returned from the database. Please check your query parameters.")
                 st.stop()
+            
+            if st.session_state.live_mode:
+                # The background refresher keeps the shared tail current; load it on first use
+                if not tail_buffer.loaded:
+                    tail_buffer = shared_store.refresh()
+                if tail_buffer.loaded:
+                    st.session_state.reference_time = tail_buffer.hwm
+                    end_datetime = tail_buffer.hwm
+                    start_datetime = end_datetime - timedelta(hours=window_hours)
+            elif tail_buffer.covers(start_datetime) and end_datetime > tail_buffer.hwm:
+                # Moving forward past the newest buffered row - top up the tail
+                tail_buffer = shared_store.refresh()
+            
+            served_from_tail = tail_buffer.covers(start_datetime)
+            if served_from_tail:
+                # Serve recent windows from the shared tail (time-sorted, read-only)
+                df = tail_buffer.frame
+            else:
+                # Only the selected window (plus prefetch margin) is pulled from Snowflake.
+                # Cached frame - treat as read-only
+                df = load_predictions(
+                    session,
+                    start=start_datetime,
+                    end=end_datetime,
+                    cache=prediction_cache,
+                    margin=PREFETCH_MARGIN
+                )
+            
+            # Full truck list for the chart filter, independent of the window
+            trucks = load_truck_ids(session, cache=prediction_cache)
     
     except Exception as query_error:
         st.error(f"Error executing database query: {str(query_error)}")
         st.info("Detailed error information has been logged. Please contact IT support if this issue persists.")
         st.stop()
+    profiler.checkpoint("data_load", rows_out=len(df))
     
     # Data preprocessing with error handling
     try:
-        # Convert timestamp to datetime
-        df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'])
-        
+        # TIMESTAMP is already converted to datetime by the loader
         # Get min/max timestamps for time filter
-        min_date = df['TIMESTAMP'].min().date()
-        max_date = df['TIMESTAMP'].max().date()
+        min_date = data_start.date()
+        max_date = data_end.date()
         
         # Define the fail probability column name
         fail_prob_col = 'FAILURE_PROB'
         
         # Get the max timestamp from the data for reference time
-        max_timestamp = df['TIMESTAMP'].max()
+        max_timestamp = data_end
     
     except Exception as preprocessing_error:
         st.error(f"Error preprocessing data: {str(preprocessing_error)}")
@@ -430,6 +527,7 @@ try:
         st.write("DataFrame columns:", df.columns.tolist())
         st.write("DataFrame sample:", df.head(2))
         st.stop()
+    profiler.checkpoint("preprocess")
     
     # ---- SIDEBAR CONTROLS ----
     with st.sidebar:
@@ -441,19 +539,6 @@ try:
         # Define time window duration options
         st.subheader("Time Window")
         
-        # Initialize time window to default 12 hours 
-        if 'time_window' not in st.session_state:
-            st.session_state.time_window = "12 hours"
-            
-        # Initialize reference time to 15:00 on 2025-04-07
-        if 'reference_time' not in st.session_state:
-            # Find the date from the data (should be 2025-04-07)
-            default_date = datetime.date(2025, 4, 7)
-            # Create a timestamp for 15:00 on that date
-            default_end_time = datetime.datetime.combine(default_date, datetime.time(15, 0, 0))
-            # Convert to pandas timestamp for consistency
-            st.session_state.reference_time = pd.Timestamp(default_end_time)
-            
         # Time window selection with buttons in a row
         time_window_cols = st.columns(3)
         with time_window_cols[0]:
@@ -480,16 +565,6 @@ try:
                 st.session_state.time_window = "12 hours"
                 st.rerun()
         
-        # Calculate start and end times based on selected window
-        time_window = st.session_state.time_window
-            
-        # Get window duration in hours
-        window_hours = int(time_window.split()[0])
-        
-        # Calculate end time (reference time) and start time (reference - window)
-        end_datetime = st.session_state.reference_time
-        start_datetime = end_datetime - timedelta(hours=window_hours)
-        
         # Display the currently selected time range
         st.subheader("Selected Time Range")
         st.write(f"**From:** {start_datetime.strftime('%Y-%m-%d %H:%M')}")
@@ -547,9 +622,51 @@ try:
                 st.session_state.reference_time += timedelta(minutes=5)
                 st.rerun()
         
-        # Reset to latest data
+        # Reset to latest data - only rows newer than the buffer are fetched
         if st.button("⟳ Show Latest Data", type="primary", use_container_width=True):
-            st.session_state.reference_time = max_timestamp
+            tail_buffer = shared_store.refresh(force=True)
+            st.session_state.reference_time = tail_buffer.hwm if tail_buffer.loaded else max_timestamp
+            st.rerun()
+        
+        # Live mode for wall displays - follows the newest data automatically
+        live_mode = st.checkbox("🔴 Live mode (auto-refresh)", value=st.session_state.live_mode,
+                                key="live_mode_checkbox")
+        if live_mode != st.session_state.live_mode:
+            st.session_state.live_mode = live_mode
+            st.rerun()
+        if st.session_state.live_mode:
+            st.session_state.live_interval = st.selectbox(
+                "Refresh every:",
+                options=list(LIVE_REFRESH_INTERVALS.keys()),
+                index=list(LIVE_REFRESH_INTERVALS.keys()).index(st.session_state.live_interval),
+                key="live_interval_select"
+            )
+        
+        # Chart rendering backend
+        st.header("📈 Charts")
+        if 'chart_backend' not in st.session_state:
+            st.session_state.chart_backend = DEFAULT_CHART_BACKEND
+        st.session_state.chart_backend = st.radio(
+            "Chart rendering:",
+            options=CHART_BACKENDS,
+            format_func=CHART_BACKEND_LABELS.get,
+            index=CHART_BACKENDS.index(st.session_state.chart_backend),
+            key="chart_backend_radio"
+        )
+        
+        # Data cache status and manual refresh
+        st.header("🗄️ Data")
+        cache_stats = get_prediction_cache().stats
+        st.caption(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['entries']} cached queries)")
+        chart_stats = get_chart_cache().stats
+        st.caption(f"Charts: {chart_stats['hits']} hits / {chart_stats['misses']} renders "
+                   f"({chart_stats['entries']} cached charts)")
+        store_stats = shared_store.stats
+        st.caption(f"Shared tail: {store_stats['rows']:,} rows ({store_stats['bytes'] / 1e6:.1f} MB) "
+                   f"for {store_stats['leases']} open sessions")
+        if st.button("↻ Reload Data", key="reload_data", use_container_width=True):
+            get_prediction_cache().invalidate()
             st.rerun()
         
         # Number of rows selection
@@ -597,11 +714,6 @@ try:
         
         # Chart Filters - persist selections in session state
         st.header("📈 Chart Filters")
-        trucks = sorted(df['TRUCK_ID'].unique())
-        try:
-            trucks = [int(t) for t in trucks]
-        except:
-            pass
         
         # Initialize selected_trucks if not already set
         if 'selected_trucks' not in st.session_state:
@@ -618,27 +730,36 @@ try:
         # Immediately update session state with current selections
         st.session_state.selected_trucks = selected_trucks.copy()
     
-    # Filter data based on time range
-    filtered_df = df[(df['TIMESTAMP'] >= start_datetime) & (df['TIMESTAMP'] <= end_datetime)]
+    # Shared sensor thresholds for the table, charts and exception counts
+    threshold_registry = get_threshold_registry()
+    profiler.checkpoint("sidebar")
     
-    # Find the FIRST time each truck exceeds the failure probability threshold
-    high_failure_alerts = []
+    # Filter the prefetched data down to the exact time range (a slice, not a copy, when possible)
+    filtered_df = filter_window(df, start_datetime, end_datetime)
+    profiler.checkpoint("filter", rows_in=len(df), rows_out=len(filtered_df))
     
-    # Group by truck_id and find the first occurrence of high failure probability
-    first_alerts = {}
-    first_failure_times = {}
-    for _, row in filtered_df.sort_values('TIMESTAMP').iterrows():
-        truck_id = row['TRUCK_ID']
-        if row[fail_prob_col] > 0.5 and truck_id not in first_alerts:
-            first_alerts[truck_id] = {
-                'truck_id': truck_id,
-                'timestamp': row['TIMESTAMP'],
-                'failure_prob': row[fail_prob_col]
-            }
-            first_failure_times[truck_id] = row['TIMESTAMP']
+    # Find the FIRST time each truck exceeds the failure probability threshold
+    alert_episodes = None
+    if USE_ALERT_EPISODES:
+        try:
+            alert_episodes = load_alert_episodes(
+                session, start_datetime, end_datetime,
+                cache=get_prediction_cache(), margin=PREFETCH_MARGIN
+            )
+        except Exception:
+            # Episode table not created yet - scan the readings instead
+            alert_episodes = None
     
-    # Convert dictionary to list
-    high_failure_alerts = list(first_alerts.values())
+    if alert_episodes is not None:
+        high_failure_alerts, first_failure_times = first_alerts_from_episodes(
+            alert_episodes, start_datetime, end_datetime, filtered_df,
+            threshold=ALERT_THRESHOLD, prob_col=fail_prob_col
+        )
+    else:
+        high_failure_alerts, first_failure_times = detect_first_alerts(
+            filtered_df, threshold=ALERT_THRESHOLD, prob_col=fail_prob_col
+        )
+    profiler.checkpoint("alert_detection", rows_in=len(filtered_df), rows_out=len(high_failure_alerts))
     
     # Create Fleet Overview Section
     st.markdown('<h2 class="section-header">📊 Fleet Overview</h2>', unsafe_allow_html=True)
@@ -695,6 +816,19 @@ try:
             </div>
             """, unsafe_allow_html=True)
         
+        # Out-of-range readings per sensor across the window (one vectorized comparison)
+        exception_counts = threshold_registry.exception_counts(filtered_df)
+        exception_cols = st.columns(len(exception_counts))
+        for exception_col, (sensor_col, exception_count) in zip(exception_cols, exception_counts.items()):
+            exception_color = "#e74c3c" if exception_count > 0 else "#27ae60"
+            with exception_col:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">{threshold_registry[sensor_col].label} Exceptions</div>
+                    <div class="metric-value" style="color: {exception_color};">{exception_count}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Alerts section with enhanced styling
@@ -702,7 +836,7 @@ try:
     
     if high_failure_alerts:
         st.markdown('<div class="content-card">', unsafe_allow_html=True)
-        st.warning("⚠️ **IMPORTANT:** Failure probability over 50% typically indicates failure is likely to occur within 12 hours.")
+        st.warning(f"⚠️ **IMPORTANT:** Failure probability over {ALERT_THRESHOLD:.0%} typically indicates failure is likely to occur within 12 hours.")
         
         # Get the maximum timestamp from the data to calculate time remaining
         max_timestamp = filtered_df['TIMESTAMP'].max()
@@ -759,37 +893,72 @@ try:
                     <span style="font-weight: bold; color: #e74c3c; font-size: 1.2rem;">{prob_pct} probability</span>
                 </div>
                 <p><strong>{time_message}</strong></p>
-                <p>First exceeded 50% threshold at {alert['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p>First exceeded {ALERT_THRESHOLD:.0%} threshold at {alert['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}</p>
                 <p>Elapsed time since first alert: {hours}h {minutes}m</p>
             </div>
             """, unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     else:
-        st.markdown("""
+        st.markdown(f"""
         <div class="content-card">
             <div class="alert-card alert-card-success">
                 <h4>✅ All systems normal</h4>
-                <p>No trucks have exceeded 50% failure probability in the selected time range</p>
+                <p>No trucks have exceeded {ALERT_THRESHOLD:.0%} failure probability in the selected time range</p>
             </div>
         </div>
         """, unsafe_allow_html=True)
     
+    profiler.checkpoint("overview")
+    
     # Table section with scrolling
     st.markdown('<h2 class="section-header">📋 Latest Sensor Readings</h2>', unsafe_allow_html=True)
     
     try:
         # Get latest reading for each truck
-        latest_df = filtered_df.sort_values('TIMESTAMP').groupby('TRUCK_ID').last().reset_index()
+        with profiler.span("table.latest", rows_in=len(filtered_df)) as latest_span:
+            if df is tail_buffer.frame and end_datetime >= tail_buffer.hwm:
+                # Window ends at the newest data - use the incrementally maintained snapshot
+                latest_df = tail_buffer.latest.window(start_datetime)
+            else:
+                latest_df = latest_readings(filtered_df)
+            latest_span.rows_out = len(latest_df)
         
         # Dynamic row display section
         if not latest_df.empty:
+            # Classify every cell against its thresholds in one pass per column
+            with profiler.span("table.classify", rows_in=len(latest_df)):
+                cell_classes = classify_readings(latest_df, ALERT_THRESHOLD, prob_col=fail_prob_col,
+                                                 registry=threshold_registry)
+            
+            # Sort and page on the server so only one page of rows is rendered
+            table_controls = st.columns([2, 1, 2])
+            with table_controls[0]:
+                table_sort = st.selectbox("Sort by:", SORT_OPTIONS, key="table_sort")
+            if table_sort == "Severity":
+                row_order = severity_order(latest_df, cell_classes, prob_col=fail_prob_col)
+            else:
+                row_order = pd.Index(latest_df['TRUCK_ID']).argsort()
+            
+            with table_controls[1]:
+                total_pages = max(1, -(-len(latest_df) // TABLE_PAGE_SIZE))
+                requested_page = st.number_input("Page:", min_value=1, max_value=total_pages,
+                                                 value=1, step=1, key="table_page")
+            table_page, total_pages, page_slice = paginate(len(latest_df), requested_page, TABLE_PAGE_SIZE)
+            page_rows = row_order[page_slice]
+            page_df = latest_df.iloc[page_rows]
+            page_classes = {column: css[page_rows] for column, css in cell_classes.items()}
+            
+            with table_controls[2]:
+                st.caption(f"Showing trucks {page_slice.start + 1}–{page_slice.stop} of {len(latest_df)} "
+                           f"(page {table_page} of {total_pages})")
+            
             # Determine number of rows to show initially based on session state
             display_option = st.session_state.rows_to_display
             if display_option == "All":
-                rows_to_show = len(latest_df)
+                rows_to_show = len(page_df)
             else:
-                rows_to_show = min(int(display_option), len(latest_df))
+                rows_to_show = min(int(display_option), len(page_df))
                 
             # More precise row height calculation:
             # Each row is exactly 41px high (40px content + 1px border)
@@ -811,67 +980,10 @@ try:
             # Create content card for the table
             st.markdown('<div class="content-card">', unsafe_allow_html=True)
             
-            # Create HTML for the table with careful attention to headers
-            table_html = """
-            <div class="scrollable-table">
-                <table>
-                    <thead>
-                        <tr>
-                            <th style="text-align: center; font-weight: bold;">Truck ID</th>
-                            <th style="text-align: center; font-weight: bold;">Timestamp</th>
-                            <th style="text-align: center; font-weight: bold;">Failure Probability</th>
-                            <th style="text-align: center; font-weight: bold;">Exhaust Gas Temp (°C)</th>
-                            <th style="text-align: center; font-weight: bold;">Oil Pressure (kPa)</th>
-                            <th style="text-align: center; font-weight: bold;">Boost Pressure (kPa)</th>
-                            <th style="text-align: center; font-weight: bold;">Oil Contamination (ppm)</th>
-                            <th style="text-align: center; font-weight: bold;">Engine Boost Ratio</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            """
-            
-            # Add all rows with exception highlighting
-            for _, row in latest_df.iterrows():
-                table_html += "<tr>"
-                
-                # Truck ID
-                table_html += f"<td>{int(row['TRUCK_ID'])}</td>"
-                
-                # Timestamp
-                formatted_time = row['TIMESTAMP'].strftime('%Y-%m-%d %H:%M:%S')
-                table_html += f"<td>{formatted_time}</td>"
-                
-                # Failure Probability
-                failure_class = 'red-highlight' if row[fail_prob_col] > 0.5 else ''
-                table_html += f"<td class='{failure_class}'>{row[fail_prob_col]:.2%}</td>"
-                
-                # Exhaust Gas Temp - 290 to 400 degrees C
-                exhaust_class = 'red-highlight' if row['EXHAUST_GAS_TEMP'] > 400 else ('blue-highlight' if row['EXHAUST_GAS_TEMP'] < 290 else '')
-                table_html += f"<td class='{exhaust_class}'>{row['EXHAUST_GAS_TEMP']:.1f}</td>"
-                
-                # Oil Pressure - 275 to 480 kPa
-                oil_pressure_class = 'red-highlight' if row['OIL_PRESSURE'] > 480 else ('blue-highlight' if row['OIL_PRESSURE'] < 275 else '')
-                table_html += f"<td class='{oil_pressure_class}'>{row['OIL_PRESSURE']:.1f}</td>"
-                
-                # Boost Pressure - 100 to 205 kPa
-                boost_class = 'red-highlight' if row['BOOST_PRESSURE'] > 205 else ('blue-highlight' if row['BOOST_PRESSURE'] < 100 else '')
-                table_html += f"<td class='{boost_class}'>{row['BOOST_PRESSURE']:.1f}</td>"
-                
-                # Oil Contamination - 0 to 25 ppm
-                contamination_class = 'red-highlight' if row['OIL_CONTAMINATION'] > 25 else ('blue-highlight' if row['OIL_CONTAMINATION'] < 0 else '')
-                table_html += f"<td class='{contamination_class}'>{row['OIL_CONTAMINATION']:.1f}</td>"
-                
-                # Engine Boost Ratio - 0.85 to 1.15
-                boost_ratio_class = 'red-highlight' if row['ENGINE_BOOST_RATIO'] > 1.15 else ('blue-highlight' if row['ENGINE_BOOST_RATIO'] < 0.85 else '')
-                table_html += f"<td class='{boost_ratio_class}'>{row['ENGINE_BOOST_RATIO']:.3f}</td>"
-                
-                table_html += "</tr>"
-            
-            table_html += """
-                </tbody>
-            </table>
-            </div>
-            """
+            # Build the table HTML for this page with exception highlighting
+            with profiler.span("table.html", rows_in=len(page_df)):
+                table_html = render_table_html(page_df, page_classes, registry=threshold_registry,
+                                               prob_col=fail_prob_col)
             
             # Display table
             st.markdown(table_html, unsafe_allow_html=True)
@@ -882,6 +994,7 @@ try:
     except Exception as table_error:
         st.error(f"Error generating table: {str(table_error)}")
         st.warning("Unable to display the table due to an error. Other dashboard features should still work.")
+    profiler.checkpoint("table")
     
     # # REPLACE YOUR ENTIRE CHART SECTION WITH THIS CODE
 
@@ -895,44 +1008,52 @@ try:
     try:
         # Create a simplified chart interpretation guide
         with st.expander("Chart Interpretation Guide"):
-            st.markdown("""
+            st.markdown(f"""
             - **Black Line**: Average of all trucks with no alerts
+            - **Grey Band / Dashed Grey Line**: 10th-90th percentile and median of trucks with no alerts (if shown)
             - **Colored Lines**: Individual trucks (if selected)
             - **Blue Line**: Minimum threshold - values below may indicate issues
             - **Red Line**: Maximum threshold - values above may indicate issues
             - **Green Band**: Acceptable operating range
-            - **Dashed Vertical Lines**: When a truck first exceeded 50% failure probability
-            
-            **Sensor Acceptable Ranges:**
-            - Exhaust Gas Temp: 290°C to 400°C
-            - Oil Pressure: 275 kPa to 480 kPa
-            - Boost Pressure: 100 kPa to 205 kPa
-            - Oil Contamination: 0 ppm to 25 ppm
-            - Engine Boost Ratio: 0.85 to 1.15
+            - **Dashed Vertical Lines**: When a truck first exceeded {ALERT_THRESHOLD:.0%} failure probability
             """)
+            st.markdown("**Sensor Acceptable Ranges:**\n" + threshold_registry.describe_ranges())
         
-        # Define constants for chart domains
-        CHART_DOMAINS = {
-            fail_prob_col: [0, 1.2],
-            'EXHAUST_GAS_TEMP': [240, 450],
-            'OIL_PRESSURE': [200, 550],
-            'BOOST_PRESSURE': [50, 250], 
-            'OIL_CONTAMINATION': [0, 30],
-            'ENGINE_BOOST_RATIO': [0.7, 1.3]
-        }
+        # One panel per chart: failure probability, then each registry sensor
+        chart_panels = panels_from_registry(threshold_registry, prob_col=fail_prob_col)
         
-        # Filter data based on time range
-        chart_df = filtered_df.copy()
+        # Wide windows are charted from time buckets with min/avg/max per truck
+        with profiler.span("charts.data") as chart_data_span:
+            bucket_minutes = choose_bucket_minutes(start_datetime, end_datetime, CHART_POINTS_PER_SERIES)
+            if bucket_minutes is None:
+                chart_df = filtered_df
+            elif served_from_tail:
+                # Raw rows are already in memory - aggregate them locally
+                chart_df = aggregate_buckets(filtered_df, bucket_minutes)
+            else:
+                # Cached frame - treat as read-only
+                chart_df = load_bucketed_predictions(
+                    session,
+                    start=start_datetime,
+                    end=end_datetime,
+                    bucket_minutes=bucket_minutes,
+                    cache=prediction_cache
+                )
+            chart_data_span.rows_out = len(chart_df)
         
         # Session state to track visibility options
         if 'show_average' not in st.session_state:
             st.session_state.show_average = True
         if 'show_alerts' not in st.session_state:
             st.session_state.show_alerts = False
+        if 'show_fleet_band' not in st.session_state:
+            st.session_state.show_fleet_band = False
         
         # Display visibility control buttons
         st.markdown("### Chart Display Options")
-        col1, col2 = st.columns(2)
+        if bucket_minutes is not None:
+            st.caption(f"Showing {bucket_minutes}-minute averages; shaded bands span each bucket's min to max.")
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             if st.button("Show/Hide Average Line", 
@@ -948,212 +1069,122 @@ try:
                 st.session_state.show_alerts = not st.session_state.show_alerts
                 st.rerun()
         
+        with col3:
+            if st.button("Show/Hide Fleet p10-p90 Band", 
+                        type="primary" if st.session_state.show_fleet_band else "secondary",
+                        use_container_width=True):
+                st.session_state.show_fleet_band = not st.session_state.show_fleet_band
+                st.rerun()
+        
         # Get list of trucks with alerts
         alert_trucks = list(first_failure_times.keys())
         
         # Prepare data for charts
         if not chart_df.empty:
-            # Calculate average for all non-alert trucks
-            non_alert_trucks = [t for t in chart_df['TRUCK_ID'].unique() if t not in alert_trucks]
-            avg_df = None
+            # Everything that changes the picture; a repeated state is served from the chart cache
+            chart_key = (
+                frame_fingerprint(chart_df),
+                st.session_state.show_average,
+                st.session_state.show_alerts,
+                st.session_state.show_fleet_band,
+                tuple(sorted(selected_trucks)),
+                tuple(sorted(first_failure_times.items())),
+                tuple(chart_panels),
+                DOWNSAMPLE_MODE,
+                st.session_state.chart_backend,
+            )
             
-            if non_alert_trucks and st.session_state.show_average:
-                # Filter for non-alert trucks and calculate average by timestamp
-                non_alert_df = chart_df[chart_df['TRUCK_ID'].isin(non_alert_trucks)]
-                if not non_alert_df.empty:
-                    avg_df = non_alert_df.groupby('TIMESTAMP').mean().reset_index()
-                    avg_df['TRUCK_ID'] = 'Average (No Alerts)'
+            def build_chart():
+                # Average of all non-alert trucks: per-timestamp fleet sums with the alert
+                # trucks' readings subtracted, instead of a groupby over the whole fleet
+                avg_df = None
+                with profiler.span("charts.average", rows_in=len(chart_df)) as average_span:
+                    if st.session_state.show_average:
+                        chart_columns = [fail_prob_col] + threshold_registry.columns
+                        is_alert_row = chart_df['TRUCK_ID'].isin(alert_trucks)
+                        if served_from_tail and bucket_minutes is None:
+                            # Raw rows from the tail buffer - reuse its incrementally maintained sums
+                            fleet = tail_buffer.fleet
+                        else:
+                            fleet = FleetAggregate.from_frame(chart_df, chart_columns)
+                        avg_df = fleet.without(chart_df[is_alert_row]).mean(start_datetime, end_datetime)
+                    
+                        # Optional p10/p50/p90 band around the average
+                        if st.session_state.show_fleet_band and not avg_df.empty:
+                            bands = fleet_percentiles(chart_df[~is_alert_row], chart_columns)
+                            avg_df = avg_df.merge(bands, on='TIMESTAMP', how='left')
+                        avg_df['TRUCK_ID'] = AVERAGE_SERIES
+                        average_span.rows_out = len(avg_df)
             
-            # Get data for alert trucks if option is enabled
-            alert_df = None
-            if alert_trucks and st.session_state.show_alerts:
-                alert_df = chart_df[chart_df['TRUCK_ID'].isin(alert_trucks)]
+                # Get data for alert trucks if option is enabled
+                # Per-truck row ranges so truck selections are slices of chart_df
+                offsets = truck_offsets(chart_df)
+                alert_df = None
+                if alert_trucks and st.session_state.show_alerts:
+                    alert_df = truck_rows(chart_df, alert_trucks, offsets)
             
-            # Get data for specifically selected trucks
-            selected_df = None
-            if selected_trucks:
-                selected_df = chart_df[chart_df['TRUCK_ID'].isin(selected_trucks)]
+                # Get data for specifically selected trucks
+                selected_df = None
+                if selected_trucks:
+                    selected_df = truck_rows(chart_df, selected_trucks, offsets)
             
-            # Combine datasets as needed
-            display_dfs = []
-            if avg_df is not None and not avg_df.empty:
-                display_dfs.append(avg_df)
-            if alert_df is not None and not alert_df.empty:
-                display_dfs.append(alert_df)
-            if selected_df is not None and not selected_df.empty:
-                # Only include selected trucks that aren't already in alert_df
-                if alert_df is not None:
-                    selected_df = selected_df[~selected_df['TRUCK_ID'].isin(alert_trucks)]
-                if not selected_df.empty:
-                    display_dfs.append(selected_df)
+                # Combine datasets as needed
+                display_dfs = []
+                if avg_df is not None and not avg_df.empty:
+                    display_dfs.append(avg_df)
+                if alert_df is not None and not alert_df.empty:
+                    display_dfs.append(alert_df)
+                if selected_df is not None and not selected_df.empty:
+                    # Only include selected trucks that aren't already in alert_df
+                    if alert_df is not None:
+                        selected_df = selected_df[~selected_df['TRUCK_ID'].isin(alert_trucks)]
+                    if not selected_df.empty:
+                        display_dfs.append(selected_df)
             
-            # Combine all dataframes
-            if display_dfs:
+                if not display_dfs:
+                    return None
                 combined_df = pd.concat(display_dfs)
                 
-                # Optimize if needed
-                if len(combined_df) > 1000:
-                    combined_df = optimize_chart_data(combined_df)
-                
-                # Create chart function using Streamlit native charts
-                def create_streamlit_chart(df, field, title, y_label, min_val=None, max_val=None):
-                    # Skip if no data
-                    if df.empty:
-                        st.write(f"No data available for {title}")
-                        return
-                    
-                    # Create figure using matplotlib
-                    import matplotlib.pyplot as plt
-                    import matplotlib.dates as mdates
-                    from matplotlib.lines import Line2D
-                    
-                    # REDUCED HEIGHT: Change figsize from (10, 6) to (10, 3) - about half as tall
-                    fig, ax = plt.subplots(figsize=(10, 3))
-                    
-                    # Add acceptable range band if both thresholds exist
-                    if min_val is not None and max_val is not None:
-                        ax.axhspan(min_val, max_val, alpha=0.2, color='green')
-                    
-                    # Add threshold lines
-                    if min_val is not None:
-                        ax.axhline(y=min_val, color='blue', linestyle='--', linewidth=1.5)
-                        ax.text(df['TIMESTAMP'].min(), min_val, f"Min: {min_val}", 
-                               color='blue', fontsize=8, verticalalignment='bottom')
-                    
-                    if max_val is not None:
-                        ax.axhline(y=max_val, color='red', linestyle='--', linewidth=1.5)
-                        ax.text(df['TIMESTAMP'].min(), max_val, f"Max: {max_val}", 
-                               color='red', fontsize=8, verticalalignment='top')
-                    
-                    # Plot each truck's data separately
-                    unique_trucks = df['TRUCK_ID'].unique()
-                    
-                    # Create a color map for trucks
-                    import matplotlib.cm as cm
-                    import numpy as np
-                    
-                    # Special handling for average line
-                    if 'Average (No Alerts)' in unique_trucks:
-                        # Plot average line first in black with greater thickness
-                        avg_data = df[df['TRUCK_ID'] == 'Average (No Alerts)']
-                        ax.plot(avg_data['TIMESTAMP'], avg_data[field], 
-                                color='black', linewidth=3, label='Average (No Alerts)')
-                        
-                        # Remove from the list to plot separately
-                        unique_trucks = [t for t in unique_trucks if t != 'Average (No Alerts)']
-                    
-                    # Create color map for the remaining trucks
-                    colors = cm.tab10(np.linspace(0, 1, len(unique_trucks)))
-                    
-                    # Plot each truck's data
-                    for i, truck_id in enumerate(unique_trucks):
-                        truck_data = df[df['TRUCK_ID'] == truck_id]
-                        color = colors[i]
-                        ax.plot(truck_data['TIMESTAMP'], truck_data[field], 
-                                marker='o', markersize=4, linestyle='-',  # Smaller markers
-                                linewidth=2, alpha=0.8, label=f"Truck {truck_id}")
-                    
-                    # Add vertical lines for alert times
-                    for truck_id, failure_time in first_failure_times.items():
-                        if truck_id in df['TRUCK_ID'].values or (truck_id in alert_trucks and st.session_state.show_alerts):
-                            # Find color index for this truck
-                            try:
-                                truck_index = list(unique_trucks).index(truck_id)
-                                color = colors[truck_index]
-                            except (ValueError, IndexError):
-                                color = 'red'  # Default color if not found
-                            
-                            # Add vertical line
-                            ax.axvline(x=failure_time, color=color, linestyle='--', linewidth=1.5, alpha=0.7)
-                            
-                            # Add text label - adjust position for smaller chart
-                            y_range = ax.get_ylim()
-                            y_pos = y_range[1] * 0.9
-                            ax.text(failure_time, y_pos, f"Truck {truck_id}", 
-                                   color=color, fontsize=8, rotation=90, verticalalignment='top')
-                    
-                    # Set title and labels with smaller fonts for compact display
-                    ax.set_title(title, fontsize=12, fontweight='bold')
-                    ax.set_xlabel('Time', fontsize=10)
-                    ax.set_ylabel(y_label, fontsize=10)
-                    
-                    # Format x-axis
-                    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-                    plt.xticks(rotation=45, fontsize=8)
-                    plt.yticks(fontsize=8)
-                    
-                    # Set y-axis limits from our constants
-                    if field in CHART_DOMAINS:
-                        ax.set_ylim(CHART_DOMAINS[field])
-                    
-                    # Add grid
-                    ax.grid(True, linestyle='--', alpha=0.7)
-                    
-                    # Add legend if multiple trucks - make it smaller and more compact
-                    if len(unique_trucks) > 0 or 'Average (No Alerts)' in df['TRUCK_ID'].values:
-                        ax.legend(loc='upper left', framealpha=0.9, fontsize=8, ncol=2)
-                    
-                    # Adjust layout
-                    fig.tight_layout()
-                    
-                    return fig
-                
-                # Create and display all charts
-                # First row of charts
-                st.markdown('<div class="wide-layout">', unsafe_allow_html=True)
-                
-                # Failure Probability chart
-                st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig1 = create_streamlit_chart(combined_df, fail_prob_col, 'Failure Probability', 'Probability', 0, 1)
-                if fig1:
-                    st.pyplot(fig1)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Exhaust Gas Temperature chart
-                st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig2 = create_streamlit_chart(combined_df, 'EXHAUST_GAS_TEMP', 'Exhaust Gas Temperature', 'Temperature (°C)', 290, 400)
-                if fig2:
-                    st.pyplot(fig2)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Second row of charts
-                st.markdown('<div class="wide-layout">', unsafe_allow_html=True)
-                
-                # Oil Pressure chart
-                st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig3 = create_streamlit_chart(combined_df, 'OIL_PRESSURE', 'Oil Pressure', 'Pressure (kPa)', 275, 480)
-                if fig3:
-                    st.pyplot(fig3)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Boost Pressure chart
-                st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig4 = create_streamlit_chart(combined_df, 'BOOST_PRESSURE', 'Boost Pressure', 'Pressure (kPa)', 100, 205)
-                if fig4:
-                    st.pyplot(fig4)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Third row of charts
-                st.markdown('<div class="wide-layout">', unsafe_allow_html=True)
+                # Downsample to what the chart width can show, keeping spikes and alert readings
+                # (for bucketed data, buckets whose peak crossed the threshold)
+                alert_col = f"{fail_prob_col}_MAX" if bucket_minutes else fail_prob_col
+                # The bucket peaks only come with alert trucks; without them there is nothing to keep
+                keep_mask = (combined_df[alert_col].to_numpy() > ALERT_THRESHOLD
+                             if alert_col in combined_df.columns else None)
+                with profiler.span("charts.downsample", rows_in=len(combined_df)) as downsample_span:
+                    combined_df = downsample(
+                        combined_df,
+                        bucket_count(CHART_WIDTH_PX),
+                        mode=DOWNSAMPLE_MODE,
+                        y_columns=[fail_prob_col] + threshold_registry.columns,
+                        keep_mask=keep_mask,
+                    )
+                    downsample_span.rows_out = len(combined_df)
                 
-                # Oil Contamination chart
-                st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig5 = create_streamlit_chart(combined_df, 'OIL_CONTAMINATION', 'Oil Contamination', 'Contamination (ppm)', 0, 25)
-                if fig5:
-                    st.pyplot(fig5)
-                st.markdown('</div>', unsafe_allow_html=True)
+                # Alert lines for every alert truck when they are shown, otherwise for charted trucks only
+                charted_trucks = set(combined_df['TRUCK_ID'])
+                alert_times = {
+                    truck_id: failure_time for truck_id, failure_time in first_failure_times.items()
+                    if st.session_state.show_alerts or truck_id in charted_trucks
+                }
                 
-                # Engine Boost Ratio chart
+                with profiler.span("charts.render", rows_in=len(combined_df)):
+                    if st.session_state.chart_backend == "vega":
+                        # Compact spec; the browser draws it and handles pan/zoom/tooltips
+                        return vega_sensor_spec(combined_df, chart_panels, alert_times)
+                    
+                    # Split into per-truck arrays once and draw all panels on one figure
+                    series = group_series(combined_df, [panel.field for panel in chart_panels])
+                    return render_sensor_figure(series, chart_panels, alert_times)
+            
+            chart = get_chart_cache().get_or_render(chart_key, build_chart)
+            
+            if chart is not None:
                 st.markdown('<div class="content-card">', unsafe_allow_html=True)
-                fig6 = create_streamlit_chart(combined_df, 'ENGINE_BOOST_RATIO', 'Engine Boost Ratio', 'Ratio', 0.85, 1.15)
-                if fig6:
-                    st.pyplot(fig6)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
+                if st.session_state.chart_backend == "vega":
+                    st.vega_lite_chart(chart, use_container_width=True)
+                else:
+                    st.image(chart, use_container_width=True)
                 st.markdown('</div>', unsafe_allow_html=True)
             else:
                 st.markdown("""
@@ -1175,6 +1206,80 @@ try:
         st.write("Error details:", charts_error)
         import traceback
         st.code(traceback.format_exc(), language="python")
+    profiler.checkpoint("charts")
+    
+    # What-if scoring: re-score a truck's newest reading with edited sensor values
+    if MODEL_ARTIFACT:
+        st.markdown('<h2 class="section-header">🧪 What-if Scoring</h2>', unsafe_allow_html=True)
+        try:
+            # Process-wide model and prediction cache, shared by every session
+            model_artifact = load_artifact(MODEL_ARTIFACT)
+            what_if_cols = st.columns([1, 3])
+            with what_if_cols[0]:
+                what_if_truck = st.selectbox("Truck:", trucks, key="what_if_truck")
+            
+            # The newest reading plus the readings its lags and 1-hour windows are computed from
+            recent_df = load_recent_readings(session, what_if_truck, end_datetime, WINDOW_ROWS + 1,
+                                             cache=prediction_cache)
+            if recent_df.empty:
+                st.info(f"Truck {what_if_truck} has no readings up to {end_datetime}.")
+            else:
+                latest = recent_df.iloc[-1]
+                with what_if_cols[1]:
+                    st.caption(f"Reading at {latest['TIMESTAMP']}. Change the sensor values to score it as if "
+                               f"they had been measured; lags and 1-hour windows are recomputed from the "
+                               f"{len(recent_df) - 1} readings before it.")
+                
+                # Keys include the reading time, so the inputs reset when a newer reading arrives
+                edited_df = recent_df.copy()
+                sensor_inputs = st.columns(len(SENSOR_COLUMNS))
+                for column, sensor_input in zip(SENSOR_COLUMNS, sensor_inputs):
+                    with sensor_input:
+                        value = st.number_input(
+                            column.replace("_", " ").title(),
+                            value=None if pd.isna(latest[column]) else float(latest[column]),
+                            format="%.2f",
+                            key=f"what_if_{column}_{what_if_truck}_{latest['TIMESTAMP']}"
+                        )
+                    edited_df.loc[edited_df.index[-1], column] = value
+                
+                # Score the reading as recorded and as edited in one call; repeats hit the prediction cache
+                with profiler.span("what_if.score", rows_in=2):
+                    scoring_started = time.perf_counter()
+                    as_recorded = compute_features(recent_df)
+                    what_if = compute_features(edited_df)
+                    feature_rows = {column: [as_recorded[column][-1], what_if[column][-1]]
+                                    for column in model_artifact.feature_columns}
+                    proba = model_artifact.predict_proba(feature_rows)[:, 1]
+                    scoring_ms = (time.perf_counter() - scoring_started) * 1000
+                
+                metric_cols = st.columns(3)
+                metric_cols[0].metric("Stored prediction", f"{latest['PREDICT_PROBA_1']:.1%}")
+                metric_cols[1].metric("Model, as recorded", f"{proba[0]:.1%}")
+                metric_cols[2].metric("What-if", f"{proba[1]:.1%}", delta=f"{proba[1] - proba[0]:+.1%}",
+                                      delta_color="inverse")
+                if proba[1] > ALERT_THRESHOLD:
+                    st.warning(f"With these readings truck {what_if_truck} would exceed the "
+                               f"{ALERT_THRESHOLD:.0%} alert threshold.")
+                cache_info = model_artifact.cache_info()
+                manifest = model_artifact.manifest
+                st.caption(f"Scored in {scoring_ms:.1f} ms by {manifest['model_name']} "
+                           f"{manifest.get('version') or ''} (prediction cache: {cache_info['hits']} hits, "
+                           f"{cache_info['misses']} misses)")
+        
+        except Exception as what_if_error:
+            st.error(f"Error in what-if scoring: {str(what_if_error)}")
+            st.warning("What-if scoring needs every sensor column of the prediction table (snapshots "
+                       "exported by parquet_source.py keep only the charted ones). Other dashboard features "
+                       "should still work.")
+        profiler.checkpoint("what_if")
+    
+    # Where this rerun's time went, for "why was my page slow" questions
+    with st.expander("Performance"):
+        st.caption(f"This rerun: {profiler.elapsed:.2f}s. Sections are sequential; dotted names are "
+                   f"parts of the section they run in. Calls > 1 are summed (e.g. per result batch). "
+                   f"Cached results skip their data and chart phases.")
+        st.dataframe(pd.DataFrame(profiler.table()), hide_index=True, use_container_width=True)
 
     # Enhanced footer
     st.markdown("""
@@ -1186,6 +1291,24 @@ try:
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    st.session_state.last_profile = profiler
+    rerun_fields = dict(session=st.session_state.store_lease, window=time_window,
+                        start=str(start_datetime), end=str(end_datetime), offline=bool(OFFLINE_SNAPSHOT))
+    profiler.log(slow_seconds=SLOW_RERUN_SECONDS, **rerun_fields)
+    profiler.export_otel(**rerun_fields)
+    
+    # Poll for new data in live mode without holding the script thread: a timer fragment
+    # renews this session's lease and reruns the page only once the shared tail has moved on
+    if st.session_state.live_mode:
+        @st.fragment(run_every=LIVE_REFRESH_INTERVALS[st.session_state.live_interval])
+        def poll_live_data():
+            shared_store.acquire(st.session_state.store_lease, session)
+            latest = shared_store.snapshot()
+            if latest.loaded and latest.hwm != st.session_state.reference_time:
+                st.rerun(scope="app")
+        
+        poll_live_data()
 
 except Exception as e:
     # Global error handler
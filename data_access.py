@@ -0,0 +1,909 @@
+"""
+Data access layer for the Truck Fleet Monitoring dashboard.
+
+Every Streamlit rerun (time navigation, toggles, st.rerun()) used to re-run the
+full prediction query against Snowflake. The loader in this module memoizes
+query results in process memory so reruns are served without a warehouse
+round-trip, while still picking up new data when the prediction table is
+rewritten by the scoring notebook.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from features import RAW_COLUMNS
+from fleet_aggregates import FleetAggregate
+from snapshots import LatestSnapshot
+
+# Table written by section 12 of SUMMIT_25_PREDICTION_V2.ipynb
+PREDICTION_TABLE = "TURBO_DATA_PREDICTIONS_NEW"
+
+# Alert episode table maintained by section 13 of the notebook
+ALERT_EPISODE_TABLE = "TURBO_ALERT_EPISODES"
+
+# Columns the dashboard reads, in display order
+PREDICTION_COLUMNS = (
+    "TIMESTAMP",
+    "TRUCK_ID",
+    "EXHAUST_GAS_TEMP",
+    "OIL_PRESSURE",
+    "BOOST_PRESSURE",
+    "OIL_CONTAMINATION",
+    "ENGINE_BOOST_RATIO",
+    "FAILURE_PROB",
+)
+
+# Columns that are derived rather than read as-is from the prediction table
+COLUMN_EXPRESSIONS = {
+    "FAILURE_PROB": "round(predict_proba_1, 4)",
+}
+
+# In-memory dtypes: every session holds its own frames, so they are kept compact
+TRUCK_ID_DTYPE = np.int32
+VALUE_DTYPE = np.float32
+
+# Failure probabilities stay float64 so comparisons against the alert threshold
+# agree exactly with the warehouse (float32(0.6) > 0.6, for example)
+FULL_PRECISION_PREFIXES = ("FAILURE_PROB",)
+
+# Row ranges [starts[i], stops[i]) of each truck in a frame sorted by (TRUCK_ID, TIMESTAMP)
+TruckOffsets = namedtuple("TruckOffsets", ["truck_ids", "starts", "stops"])
+
+# Cadence of the raw readings in the prediction table
+READING_INTERVAL = pd.Timedelta(minutes=5)
+
+# Bucket sizes (minutes) available for server-side chart aggregation
+BUCKET_MINUTES = (1, 5, 15, 30, 60)
+
+
+class PredictionCache:
+    """
+    Thread-safe, TTL-bounded LRU cache for query results.
+
+    Entries expire after `ttl_seconds`, and the least recently used entries are
+    evicted once the cache holds more than `max_entries` results or more than
+    `max_bytes` of DataFrame memory. Entries are tagged with their source table
+    so they can be dropped when that table is rewritten.
+
+    Cached DataFrames are shared between reruns and must be treated as read-only
+    by callers.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=32, max_bytes=512 * 1024 * 1024,
+                 version_check_seconds=60, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version_check_seconds = version_check_seconds
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (table, loaded_at, nbytes, value)
+        self._versions = {}  # table -> (version, checked_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, loader, table=None):
+        """
+        Return the cached value for `key`, calling `loader()` on a miss.
+
+        Args:
+            key: Hashable cache key
+            loader: Zero-argument callable producing the value
+            table: Source table name, used for invalidation
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[3]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+
+        # Load outside the lock so a slow query does not block cache hits
+        value = loader()
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            nbytes = _estimate_bytes(value)
+            self._entries[key] = (table, self._clock(), nbytes, value)
+            self._bytes += nbytes
+            self._evict()
+        return value
+
+    def invalidate(self, table=None):
+        """
+        Drop cached results.
+
+        Args:
+            table: Only drop results read from this table; drop everything if None
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if table is None or entry[0] == table]
+            for key in keys:
+                self._remove(key)
+            if table is None:
+                self._versions.clear()
+            return len(keys)
+
+    def check_version(self, table, probe):
+        """
+        Invalidate a table's entries if it has been rewritten since it was cached.
+
+        The probe is only called once every `version_check_seconds`, so the
+        metadata lookup does not itself become a per-rerun query.
+
+        Args:
+            table: Table name
+            probe: Zero-argument callable returning the table's current version
+                   (e.g. its LAST_ALTERED timestamp)
+
+        Returns:
+            True if cached entries were invalidated
+        """
+        with self._lock:
+            known = self._versions.get(table)
+            now = self._clock()
+            if known is not None and now - known[1] < self.version_check_seconds:
+                return False
+
+        version = probe()
+
+        with self._lock:
+            known = self._versions.get(table)
+            self._versions[table] = (version, self._clock())
+            if known is not None and known[0] != version:
+                self.invalidate(table)
+                self._versions[table] = (version, self._clock())
+                return True
+        return False
+
+    @property
+    def stats(self):
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+
+def _estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    return 0
+
+
+def build_prediction_query(start, end, truck_ids=None, columns=PREDICTION_COLUMNS,
+                           table=PREDICTION_TABLE):
+    """
+    Build a parameterized query reading predictions for a time range.
+
+    The range (and optionally the truck list) is pushed into the WHERE clause
+    as bind variables so only the rows the page needs leave the warehouse.
+
+    Args:
+        start: Inclusive lower TIMESTAMP bound
+        end: Inclusive upper TIMESTAMP bound
+        truck_ids: Optional iterable of TRUCK_IDs to restrict the result to
+        columns: Output columns, see PREDICTION_COLUMNS
+        table: Prediction table name
+
+    Returns:
+        Tuple of (SQL string with ? placeholders, list of bind values)
+    """
+    select_list = ",\n        ".join(
+        f"{COLUMN_EXPRESSIONS[c]} as {c}" if c in COLUMN_EXPRESSIONS else c for c in columns
+    )
+    predicates, params = _window_predicates(start, end, truck_ids)
+
+    query = f"""
+    select
+        {select_list}
+    from {table}
+    where {' and '.join(predicates)}
+    order by TRUCK_ID, TIMESTAMP
+    """
+    return query, params
+
+
+def _window_predicates(start, end, truck_ids=None):
+    """WHERE predicates and bind values for a time range and optional truck list."""
+    predicates = ["TIMESTAMP >= ?", "TIMESTAMP <= ?"]
+    params = [_format_timestamp(start), _format_timestamp(end)]
+
+    if truck_ids is not None:
+        truck_ids = [int(t) for t in truck_ids]
+        if truck_ids:
+            predicates.append(f"TRUCK_ID in ({', '.join(['?'] * len(truck_ids))})")
+            params.extend(truck_ids)
+        else:
+            predicates.append("1 = 0")
+    return predicates, params
+
+
+def prefetch_bounds(start, end, margin=pd.Timedelta(hours=1)):
+    """
+    Widen a time window to margin-aligned bounds plus one margin on each side.
+
+    Neighbouring windows (e.g. after a 5 or 15 minute nudge) map to the same
+    bounds, so they share one cached query and are filtered locally.
+
+    Args:
+        start: Window start
+        end: Window end
+        margin: Alignment and padding interval; no widening if falsy
+
+    Returns:
+        Tuple of (fetch_start, fetch_end) Timestamps
+    """
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    if not margin:
+        return start, end
+    margin = pd.Timedelta(margin)
+    return start.floor(margin) - margin, end.ceil(margin) + margin
+
+
+def _format_timestamp(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def get_table_version(session, table=PREDICTION_TABLE):
+    """
+    Return the LAST_ALTERED timestamp of a table in the current schema.
+
+    `save_as_table(mode="overwrite")` in the scoring notebook bumps this value,
+    so it is used to detect when cached predictions are stale.
+    """
+    rows = session.sql(
+        "select last_altered from information_schema.tables "
+        "where table_schema = current_schema() and table_name = ?",
+        params=[table.upper()],
+    ).collect()
+    return rows[0][0] if rows else None
+
+
+def get_table_created(session, table=PREDICTION_TABLE):
+    """
+    Return the CREATED timestamp of a table in the current schema.
+
+    Unlike LAST_ALTERED this does not change when rows are appended, only when
+    the table is recreated (e.g. `save_as_table(mode="overwrite")`).
+    """
+    rows = session.sql(
+        "select created from information_schema.tables "
+        "where table_schema = current_schema() and table_name = ?",
+        params=[table.upper()],
+    ).collect()
+    return rows[0][0] if rows else None
+
+
+def load_predictions(session, start, end, truck_ids=None, columns=PREDICTION_COLUMNS,
+                     table=PREDICTION_TABLE, cache=None, margin=None):
+    """
+    Load predictions for a time range, serving repeated requests from the cache.
+
+    Args:
+        session: Snowpark session (or a LocalSession stand-in)
+        start: Inclusive lower TIMESTAMP bound
+        end: Inclusive upper TIMESTAMP bound
+        truck_ids: Optional iterable of TRUCK_IDs to restrict the query to
+        columns: Output columns, see PREDICTION_COLUMNS
+        table: Prediction table name
+        cache: Optional PredictionCache; the query always runs if None
+        margin: Optional pre-fetch margin, see prefetch_bounds(). The result
+                then covers the widened range and callers filter locally.
+
+    Returns:
+        DataFrame ordered by TRUCK_ID, TIMESTAMP with TIMESTAMP as datetime64.
+        When a cache is used the frame is shared and must not be modified.
+    """
+    columns = tuple(columns)
+    start, end = prefetch_bounds(start, end, margin)
+    if truck_ids is not None:
+        truck_ids = tuple(sorted(int(t) for t in truck_ids))
+
+    def run_query():
+        query, params = build_prediction_query(start, end, truck_ids, columns, table)
+        return fetch_frame(session.sql(query, params=params), columns)
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load((table, start, end, truck_ids, columns), run_query, table=table)
+
+
+def choose_bucket_minutes(start, end, max_points, interval=READING_INTERVAL):
+    """
+    Pick the chart bucket size for a window from its length and a point budget.
+
+    Args:
+        start: Window start
+        end: Window end
+        max_points: Most points wanted per truck
+        interval: Raw reading cadence
+
+    Returns:
+        Smallest size in BUCKET_MINUTES that keeps each truck within the
+        budget (the largest size if none does), or None if the raw readings
+        already fit and no aggregation is needed.
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    if span <= interval * max_points:
+        return None
+    for minutes in BUCKET_MINUTES:
+        if span <= pd.Timedelta(minutes=minutes) * max_points:
+            return minutes
+    return BUCKET_MINUTES[-1]
+
+
+def bucketed_columns(columns):
+    """Value columns of a bucketed result: avg under the column's own name, plus _MIN/_MAX."""
+    names = []
+    for column in columns:
+        if column not in ("TIMESTAMP", "TRUCK_ID"):
+            names.extend([column, f"{column}_MIN", f"{column}_MAX"])
+    return names
+
+
+def build_bucketed_query(start, end, bucket_minutes, truck_ids=None, columns=PREDICTION_COLUMNS,
+                         table=PREDICTION_TABLE):
+    """
+    Build a query aggregating predictions into fixed time buckets per truck.
+
+    Each (truck, bucket) row has TIMESTAMP set to the bucket start, READINGS
+    with the number of raw rows, and for every value column its average
+    (under the column's own name, so chart code is unchanged) plus _MIN and
+    _MAX. Buckets are aligned with TIME_SLICE, i.e. to the Unix epoch.
+
+    Args:
+        start: Inclusive lower TIMESTAMP bound
+        end: Inclusive upper TIMESTAMP bound
+        bucket_minutes: Bucket size in minutes, see choose_bucket_minutes()
+        truck_ids: Optional iterable of TRUCK_IDs to restrict the result to
+        columns: Columns to aggregate, see PREDICTION_COLUMNS
+        table: Prediction table name
+
+    Returns:
+        Tuple of (SQL string with ? placeholders, list of bind values)
+    """
+    # TIME_SLICE needs a constant slice length, so it is inlined rather than bound
+    bucket = f"time_slice(TIMESTAMP, {int(bucket_minutes)}, 'MINUTE')"
+    select_list = ["TRUCK_ID", f"{bucket} as TIMESTAMP", "count(*) as READINGS"]
+    for column in columns:
+        if column in ("TIMESTAMP", "TRUCK_ID"):
+            continue
+        expression = COLUMN_EXPRESSIONS.get(column, column)
+        select_list.extend([
+            f"avg({expression}) as {column}",
+            f"min({expression}) as {column}_MIN",
+            f"max({expression}) as {column}_MAX",
+        ])
+
+    select_list = ",\n        ".join(select_list)
+    predicates, params = _window_predicates(start, end, truck_ids)
+
+    query = f"""
+    select
+        {select_list}
+    from {table}
+    where {' and '.join(predicates)}
+    group by TRUCK_ID, {bucket}
+    order by 1, 2
+    """
+    return query, params
+
+
+def load_bucketed_predictions(session, start, end, bucket_minutes, truck_ids=None,
+                              columns=PREDICTION_COLUMNS, table=PREDICTION_TABLE, cache=None):
+    """
+    Load per-truck min/avg/max time buckets, aggregated in the warehouse.
+
+    Args:
+        session: Snowpark session (or a LocalSession stand-in)
+        start: Inclusive lower TIMESTAMP bound
+        end: Inclusive upper TIMESTAMP bound
+        bucket_minutes: Bucket size in minutes
+        truck_ids: Optional iterable of TRUCK_IDs to restrict the query to
+        columns: Columns to aggregate, see PREDICTION_COLUMNS
+        table: Prediction table name
+        cache: Optional PredictionCache; the query always runs if None
+
+    Returns:
+        DataFrame shaped like aggregate_buckets() output. When a cache is used
+        the frame is shared and must not be modified.
+    """
+    columns = tuple(columns)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if truck_ids is not None:
+        truck_ids = tuple(sorted(int(t) for t in truck_ids))
+
+    def run_query():
+        query, params = build_bucketed_query(start, end, bucket_minutes, truck_ids, columns, table)
+        return fetch_frame(session.sql(query, params=params),
+                           ["TRUCK_ID", "TIMESTAMP", "READINGS"] + bucketed_columns(columns))
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load(("buckets", table, start, end, bucket_minutes, truck_ids, columns),
+                             run_query, table=table)
+
+
+def aggregate_buckets(df, bucket_minutes, columns=PREDICTION_COLUMNS):
+    """
+    Local equivalent of build_bucketed_query() for frames already in memory
+    (e.g. the tail buffer), with the same output columns and bucket alignment.
+
+    Args:
+        df: Raw readings with TRUCK_ID, TIMESTAMP and the value columns
+        bucket_minutes: Bucket size in minutes
+        columns: Columns to aggregate, see PREDICTION_COLUMNS
+
+    Returns:
+        DataFrame ordered by TRUCK_ID, TIMESTAMP with one row per (truck, bucket)
+    """
+    value_columns = [c for c in columns if c not in ("TIMESTAMP", "TRUCK_ID")]
+    output = ["TRUCK_ID", "TIMESTAMP", "READINGS"] + bucketed_columns(columns)
+    if df.empty:
+        return pd.DataFrame(columns=output)
+
+    buckets = df["TIMESTAMP"].dt.floor(pd.Timedelta(minutes=bucket_minutes))
+    grouped = df.groupby([df["TRUCK_ID"], buckets.rename("BUCKET")], sort=True)
+    values = grouped[value_columns].agg(["mean", "min", "max"])
+    values.columns = [column if stat == "mean" else f"{column}_{stat.upper()}"
+                      for column, stat in values.columns]
+    values["READINGS"] = grouped.size()
+    result = values.reset_index().rename(columns={"BUCKET": "TIMESTAMP"})
+    return result[output]
+
+
+def load_time_bounds(session, table=PREDICTION_TABLE, cache=None):
+    """
+    Return the (min, max) TIMESTAMP in the prediction table.
+
+    Used for "Show Latest Data" now that the page no longer loads the full
+    table to find its last reading.
+    """
+    def run_query():
+        rows = session.sql(f"select min(TIMESTAMP), max(TIMESTAMP) from {table}").collect()
+        if not rows or rows[0][0] is None:
+            return None, None
+        return pd.Timestamp(rows[0][0]), pd.Timestamp(rows[0][1])
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load((table, "time_bounds"), run_query, table=table)
+
+
+def load_truck_ids(session, table=PREDICTION_TABLE, cache=None):
+    """Return the sorted list of TRUCK_IDs present in the prediction table."""
+    def run_query():
+        rows = session.sql(f"select distinct TRUCK_ID from {table} order by TRUCK_ID").collect()
+        return [int(row[0]) for row in rows]
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load((table, "truck_ids"), run_query, table=table)
+
+
+def load_recent_readings(session, truck_id, end, rows, table=PREDICTION_TABLE, cache=None,
+                         lookback=pd.Timedelta(days=1)):
+    """
+    Load a truck's last `rows` readings up to `end`, with every raw sensor column.
+
+    What-if scoring recomputes the newest reading's lags and rolling windows
+    from these, so rows should cover the feature window (features.WINDOW_ROWS + 1).
+    Only readings within `lookback` before `end` are searched, so the scan is
+    bounded by time.
+
+    Returns:
+        DataFrame with TRUCK_ID, TIMESTAMP, features.RAW_COLUMNS and
+        PREDICT_PROBA_1, oldest first. When a cache is used the frame is
+        shared and must not be modified.
+    """
+    end = pd.Timestamp(end)
+    columns = ", ".join(["TRUCK_ID", "TIMESTAMP"] + RAW_COLUMNS + ["PREDICT_PROBA_1"])
+    query = f"""
+    select {columns}
+    from {table}
+    where TRUCK_ID = ? and TIMESTAMP >= ? and TIMESTAMP <= ?
+    order by TIMESTAMP desc
+    limit {int(rows)}
+    """
+    params = [int(truck_id), _format_timestamp(end - lookback), _format_timestamp(end)]
+
+    def run_query():
+        df = _to_frame(session.sql(query, params=params))
+        return df.iloc[::-1].reset_index(drop=True)
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load((table, "recent_readings", int(truck_id), end, int(rows)), run_query, table=table)
+
+
+def load_alert_episodes(session, start, end, table=ALERT_EPISODE_TABLE, cache=None, margin=None):
+    """
+    Load alert episodes that overlap a time range.
+
+    The episode table holds one row per (truck, episode), so this reads a few
+    hundred rows instead of the raw prediction stream.
+
+    Args:
+        session: Snowpark session (or a LocalSession stand-in)
+        start: Window start
+        end: Window end
+        table: Episode table name
+        cache: Optional PredictionCache
+        margin: Optional pre-fetch margin, see prefetch_bounds()
+
+    Returns:
+        DataFrame with alerts.EPISODE_COLUMNS ordered by ONSET_TIME
+    """
+    start, end = prefetch_bounds(start, end, margin)
+
+    def run_query():
+        query = f"""
+        select TRUCK_ID, ONSET_TIME, ONSET_PROB, PEAK_PROB, PEAK_TIME, CLEAR_TIME
+        from {table}
+        where ONSET_TIME <= ? and (CLEAR_TIME is null or CLEAR_TIME > ?)
+        order by ONSET_TIME, TRUCK_ID
+        """
+        params = [_format_timestamp(end), _format_timestamp(start)]
+        return _to_frame(session.sql(query, params=params),
+                         time_columns=("ONSET_TIME", "PEAK_TIME", "CLEAR_TIME"))
+
+    if cache is None:
+        return run_query()
+
+    cache.check_version(table, lambda: get_table_version(session, table))
+    return cache.get_or_load((table, start, end), run_query, table=table)
+
+
+def build_tail_query(after, columns=PREDICTION_COLUMNS, table=PREDICTION_TABLE):
+    """
+    Build a parameterized query for rows strictly newer than `after`.
+
+    Returns:
+        Tuple of (SQL string with ? placeholders, list of bind values)
+    """
+    select_list = ",\n        ".join(
+        f"{COLUMN_EXPRESSIONS[c]} as {c}" if c in COLUMN_EXPRESSIONS else c for c in columns
+    )
+    query = f"""
+    select
+        {select_list}
+    from {table}
+    where TIMESTAMP > ?
+    order by TIMESTAMP, TRUCK_ID
+    """
+    return query, [_format_timestamp(after)]
+
+
+class TailBuffer:
+    """
+    Time-sorted buffer of the most recent predictions, kept current incrementally.
+
+    The first refresh loads the last `span` of data; later refreshes only fetch
+    rows newer than the high-water mark (the latest TIMESTAMP already held),
+    append them and evict rows that fall out of `span`. If the prediction table
+    is rewritten the buffer is reloaded from scratch.
+
+    Rows arriving late with a TIMESTAMP at or below the high-water mark are not
+    picked up until the table is rewritten or the buffer is reset.
+
+    `latest` is a LatestSnapshot of each truck's newest readings and `fleet` a
+    FleetAggregate of the buffered rows, both updated from the same incremental
+    fetches (and, for `fleet`, evictions).
+    """
+
+    def __init__(self, span=pd.Timedelta(hours=12), columns=PREDICTION_COLUMNS,
+                 table=PREDICTION_TABLE, min_refresh_seconds=10, clock=time.monotonic):
+        self.span = pd.Timedelta(span)
+        self.columns = tuple(columns)
+        self.table = table
+        self.min_refresh_seconds = min_refresh_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all buffered rows; the next refresh reloads the full span."""
+        self.frame = pd.DataFrame(columns=list(self.columns))
+        self.latest = LatestSnapshot()
+        self.fleet = FleetAggregate([c for c in self.columns if c not in ("TIMESTAMP", "TRUCK_ID")])
+        self.hwm = None
+        self.start = None
+        self._version = None
+        self._refreshed_at = None
+
+    @property
+    def loaded(self):
+        return self.hwm is not None
+
+    def covers(self, start):
+        """True if every row from `start` up to the high-water mark is buffered."""
+        return self.loaded and pd.Timestamp(start) >= self.start
+
+    def refresh(self, session, force=False):
+        """
+        Fetch rows newer than the high-water mark and append them.
+
+        Args:
+            session: Snowpark session (or a LocalSession stand-in)
+            force: Ignore `min_refresh_seconds` throttling
+
+        Returns:
+            Number of new rows appended
+        """
+        with self._lock:
+            now = self._clock()
+            if (not force and self._refreshed_at is not None
+                    and now - self._refreshed_at < self.min_refresh_seconds):
+                return 0
+            self._refreshed_at = now
+
+            # Appends keep the buffer valid; a recreated table does not
+            version = get_table_created(session, self.table)
+            if self.loaded and version != self._version:
+                self.reset()
+                self._refreshed_at = now
+            self._version = version
+
+            if not self.loaded:
+                _, latest = load_time_bounds(session, self.table)
+                if latest is None:
+                    return 0
+                after = latest - self.span - pd.Timedelta(microseconds=1)
+                self.start = latest - self.span
+            else:
+                after = self.hwm
+
+            query, params = build_tail_query(after, self.columns, self.table)
+            # Compact dtypes, but keep the query's time order
+            new_rows = fetch_frame(session.sql(query, params=params), self.columns, sort=False)
+            if new_rows.empty:
+                return 0
+
+            if self.frame.empty:
+                frame = new_rows
+            else:
+                frame = pd.concat([self.frame, new_rows], ignore_index=True)
+            self.hwm = frame["TIMESTAMP"].iloc[-1]
+            self.latest.update(new_rows)
+            self.fleet.add(new_rows)
+
+            # Rows are time-sorted, so eviction is a single slice
+            cutoff = self.hwm - self.span
+            keep_from = frame["TIMESTAMP"].searchsorted(cutoff, side="left")
+            if keep_from:
+                self.fleet.subtract(frame.iloc[:keep_from])
+                frame = frame.iloc[keep_from:].reset_index(drop=True)
+                # Once as many rows have been evicted as are held, recompute the running
+                # sums from the buffer so rounding error cannot build up (amortized O(1) per row)
+                if self.fleet.subtracted >= len(frame):
+                    self.fleet = FleetAggregate.from_frame(frame, self.fleet.columns)
+            self.start = max(self.start, cutoff)
+            self.frame = frame
+            return len(new_rows)
+
+
+def _to_frame(result, time_columns=("TIMESTAMP",)):
+    df = result.to_pandas()
+    for column in time_columns:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def normalize_frame(df, sort=True):
+    """
+    Convert a query result to the compact in-memory layout.
+
+    TRUCK_ID becomes int32, TIMESTAMP datetime64 and the sensor columns
+    float32 (including Decimal/object columns from NUMBER results), which
+    roughly halves the frame compared with the int64/float64/object output of
+    to_pandas(). Failure probability columns are kept as float64.
+
+    Args:
+        df: Query result with TRUCK_ID and TIMESTAMP
+        sort: Order rows by (TRUCK_ID, TIMESTAMP) unless they already are.
+              With False the row order is kept (e.g. the time-sorted tail).
+
+    Returns:
+        New DataFrame with a RangeIndex
+    """
+    columns = _compact_columns(df)
+    return pd.DataFrame(_sort_columns(columns) if sort else columns, copy=False)
+
+
+def fetch_frame(result, columns, sort=True):
+    """
+    Stream a query result into the compact layout one batch at a time.
+
+    Each result batch (Snowflake returns results as Arrow chunks, which
+    to_pandas_batches() converts one at a time) is downcast as soon as it
+    arrives, so the full wide to_pandas() frame never coexists with its
+    compact copy. Peak memory is one raw batch plus the compact columns.
+
+    Args:
+        result: Snowpark DataFrame (or LocalSession stand-in)
+        columns: Result column names, used for the empty frame when no
+                 batches are returned
+        sort: As for normalize_frame()
+
+    Returns:
+        DataFrame in the normalize_frame() layout
+    """
+    if not hasattr(result, "to_pandas_batches"):
+        with profiling.span("fetch.to_pandas") as record:
+            df = result.to_pandas()
+            record.rows_out = len(df)
+        return normalize_frame(df, sort=sort)
+
+    parts = []
+    for batch in _timed_batches(result.to_pandas_batches()):
+        with profiling.span("fetch.compact", rows_in=len(batch)):
+            parts.append(_compact_columns(batch))
+    if not parts:
+        # An empty result has no batches
+        return normalize_frame(pd.DataFrame(columns=list(columns)))
+    # Concatenate column by column, releasing each column's batches as it goes
+    with profiling.span("fetch.concat"):
+        arrays = {column: np.concatenate([part.pop(column) for part in parts]) for column in list(parts[0])}
+    if sort:
+        with profiling.span("fetch.sort"):
+            arrays = _sort_columns(arrays)
+    return pd.DataFrame(arrays, copy=False)
+
+
+def _timed_batches(batches):
+    """Yield result batches, timing the first (query execution) apart from the rest (transfer)."""
+    batches = iter(batches)
+    name = "fetch.query"
+    while True:
+        with profiling.span(name) as record:
+            batch = next(batches, None)
+            record.rows_out = None if batch is None else len(batch)
+        if batch is None:
+            return
+        yield batch
+        name = "fetch.to_pandas"
+
+
+def _compact_columns(df):
+    """Column name -> NumPy array in the compact dtypes (see normalize_frame)."""
+    columns = {}
+    for column in df.columns:
+        if column == "TIMESTAMP":
+            with profiling.span("fetch.timestamps"):
+                columns[column] = pd.to_datetime(df[column]).to_numpy(dtype="datetime64[ns]")
+        elif column == "TRUCK_ID":
+            columns[column] = pd.to_numeric(df[column]).to_numpy(dtype=TRUCK_ID_DTYPE)
+        else:
+            dtype = np.float64 if column.startswith(FULL_PRECISION_PREFIXES) else VALUE_DTYPE
+            columns[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=dtype)
+    return columns
+
+
+def _sort_columns(columns):
+    """Reorder compact columns by (TRUCK_ID, TIMESTAMP) unless they already are."""
+    if "TRUCK_ID" not in columns or "TIMESTAMP" not in columns or len(columns["TRUCK_ID"]) < 2:
+        return columns
+    trucks, timestamps = columns["TRUCK_ID"], columns["TIMESTAMP"]
+    same_truck = trucks[1:] == trucks[:-1]
+    ordered = np.all(trucks[1:] >= trucks[:-1]) and np.all(timestamps[1:][same_truck] >= timestamps[:-1][same_truck])
+    if ordered:
+        return columns
+    order = np.lexsort((timestamps, trucks))
+    # In place, one column at a time, so only one column is ever held twice
+    for column in columns:
+        columns[column] = columns[column][order]
+    return columns
+
+
+def truck_offsets(df):
+    """
+    Per-truck row ranges of a frame sorted by TRUCK_ID (see normalize_frame).
+
+    Returns:
+        TruckOffsets, or None if the frame is not sorted by TRUCK_ID
+    """
+    trucks = df["TRUCK_ID"].to_numpy()
+    if len(trucks) and not np.all(trucks[1:] >= trucks[:-1]):
+        return None
+    starts = np.flatnonzero(np.r_[True, trucks[1:] != trucks[:-1]]) if len(trucks) else np.empty(0, dtype=np.int64)
+    stops = np.r_[starts[1:], len(trucks)].astype(np.int64)
+    return TruckOffsets(trucks[starts], starts, stops)
+
+
+def truck_rows(df, truck_ids, offsets=None):
+    """
+    Rows of the given trucks, looked up through the per-truck offset index.
+
+    A single truck comes back as a slice of `df` (no copy); several trucks as
+    one gather of their row ranges. Frames not sorted by TRUCK_ID fall back
+    to a boolean mask.
+
+    Args:
+        df: Frame to select from
+        truck_ids: Iterable of TRUCK_IDs
+        offsets: TruckOffsets for `df`; computed if None
+    """
+    truck_ids = np.unique(np.asarray(list(truck_ids)))
+    offsets = offsets if offsets is not None else truck_offsets(df)
+    if offsets is None:
+        return df[df["TRUCK_ID"].isin(truck_ids)]
+
+    slots = np.searchsorted(offsets.truck_ids, truck_ids)
+    found = slots < len(offsets.truck_ids)
+    found[found] = offsets.truck_ids[slots[found]] == truck_ids[found]
+    slots = slots[found]
+    if len(slots) == 0:
+        return df.iloc[0:0]
+    if len(slots) == 1:
+        return df.iloc[offsets.starts[slots[0]]:offsets.stops[slots[0]]]
+
+    starts, lengths = offsets.starts[slots], offsets.stops[slots] - offsets.starts[slots]
+    positions = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths) + np.arange(lengths.sum())
+    return df.take(positions)
+
+
+def filter_window(df, start, end):
+    """
+    Rows with start <= TIMESTAMP <= end, without copying when avoidable.
+
+    A time-sorted frame (the tail buffer) is cut with two binary searches and
+    returned as a slice, and a frame lying entirely inside the window is
+    returned as-is. Otherwise a boolean mask selects the rows.
+    """
+    if df.empty:
+        return df
+    timestamps = df["TIMESTAMP"]
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if timestamps.is_monotonic_increasing:
+        lo = timestamps.searchsorted(start, side="left")
+        hi = timestamps.searchsorted(end, side="right")
+        return df if (lo, hi) == (0, len(df)) else df.iloc[lo:hi]
+    if timestamps.min() >= start and timestamps.max() <= end:
+        return df
+    return df[(timestamps >= start) & (timestamps <= end)]
@@ -0,0 +1,176 @@
+"""
+Shape-preserving downsampling for the sensor time-series charts.
+
+Two modes are offered, both operating on every truck at once over NumPy arrays:
+
+- M4: split each truck's time range into one bucket per few pixels of chart
+  width and keep the first, last, minimum and maximum reading of every bucket.
+  Spikes in EGT or oil pressure always survive because bucket extremes are kept.
+- LTTB (Largest-Triangle-Three-Buckets): keep one reading per bucket, the one
+  forming the largest triangle with its neighbours. Fewer points than M4 while
+  still following the visual shape of the line.
+
+Readings flagged by `keep_mask` (e.g. failure probability over the alert
+threshold) are always retained, as the previous stride sampling guaranteed.
+"""
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_MODES = ("m4", "lttb")
+
+# Horizontal pixels per bucket; M4 emits up to four points per bucket
+PIXELS_PER_BUCKET = 4
+
+
+def bucket_count(chart_width_px, pixels_per_bucket=PIXELS_PER_BUCKET):
+    """Number of buckets per series for a chart of the given pixel width."""
+    return max(3, int(chart_width_px) // pixels_per_bucket)
+
+
+def downsample(df, n_buckets, mode="m4", y_columns=None, keep_mask=None,
+               group_col="TRUCK_ID", time_col="TIMESTAMP"):
+    """
+    Reduce each series to roughly `n_buckets` buckets while keeping its shape.
+
+    Args:
+        df: Readings for one or more series (any row order)
+        n_buckets: Buckets per series, see bucket_count()
+        mode: "m4" or "lttb"
+        y_columns: Value columns whose shape must be preserved; points selected
+                   for any of them are kept
+        keep_mask: Optional boolean array of rows that must always be kept
+        group_col: Series identifier column
+        time_col: Time column
+
+    Returns:
+        Subset of `df` ordered by series then time
+    """
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f"Unknown downsampling mode: {mode}")
+    if df.empty:
+        return df
+    y_columns = list(y_columns) if y_columns is not None else [
+        c for c in df.columns if c not in (group_col, time_col) and pd.api.types.is_numeric_dtype(df[c])
+    ]
+
+    groups, _ = pd.factorize(df[group_col], sort=False)
+    x = df[time_col].to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+    # Order rows by (series, time) once; everything below works on that order
+    order = np.lexsort((x, groups))
+    groups = groups[order]
+    x = x[order]
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    group_index = np.repeat(np.arange(len(starts)), sizes)
+
+    # Series that already fit in the budget are kept whole
+    budget = n_buckets * (4 if mode == "m4" else 1)
+    small = (sizes <= budget)[group_index]
+    selected = [np.flatnonzero(small)]
+
+    large = ~small
+    if large.any():
+        for column in y_columns:
+            y = df[column].to_numpy(dtype=float)[order]
+            if mode == "m4":
+                selected.append(_m4(group_index, x, y, n_buckets, large))
+            else:
+                selected.append(_lttb(starts, sizes, x, y, n_buckets))
+
+    if keep_mask is not None:
+        selected.append(np.flatnonzero(np.asarray(keep_mask, dtype=bool)[order]))
+
+    keep = np.unique(np.concatenate(selected))
+    return df.iloc[order[keep]]
+
+
+def _m4(group_index, x, y, n_buckets, active):
+    """Row positions of the first/last/min/max reading per (series, bucket)."""
+    rows = np.flatnonzero(active)
+    g = group_index[rows]
+    xs = x[rows]
+    ys = y[rows]
+
+    # Per-series time range -> equal-width buckets
+    g_starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    g_ends = np.r_[g_starts[1:], len(g)] - 1
+    x_min = np.repeat(xs[g_starts], np.diff(np.r_[g_starts, len(g)]))
+    x_max = np.repeat(xs[g_ends], np.diff(np.r_[g_starts, len(g)]))
+    span = np.maximum(x_max - x_min, 1)
+    bucket = np.minimum(((xs - x_min) * n_buckets) // span, n_buckets - 1)
+    key = g.astype(np.int64) * n_buckets + bucket
+
+    # Rows are time-ordered within each series, so bucket edges give first/last
+    edges = np.r_[True, key[1:] != key[:-1]]
+    first = np.flatnonzero(edges)
+    last = np.r_[first[1:], len(key)] - 1
+
+    # Min/max per bucket: sort by (key, y) and take each bucket's ends.
+    # Missing values sort to the far end so they are never picked as extremes.
+    by_min = np.lexsort((np.where(np.isnan(ys), np.inf, ys), key))
+    by_max = np.lexsort((np.where(np.isnan(ys), -np.inf, ys), key))
+    minimum = by_min[first]
+    maximum = by_max[last]
+
+    return rows[np.concatenate([first, last, minimum, maximum])]
+
+
+def _lttb(starts, sizes, x, y, n_out):
+    """Row positions chosen by LTTB, computed for all large series together."""
+    active = np.flatnonzero(sizes > n_out)
+    if active.size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    g_start = starts[active]
+    g_size = sizes[active]
+    xf = x.astype(float)
+    # Missing values would poison the areas; treat them as zero height
+    yf = np.nan_to_num(y)
+    x_cumulative = np.r_[0.0, np.cumsum(xf - xf[0])]
+    y_cumulative = np.r_[0.0, np.cumsum(yf)]
+
+    # Always keep the first and last point of each series
+    chosen = [g_start, g_start + g_size - 1]
+
+    # Interior points 1..n-2 split into n_out-2 buckets per series
+    n_inner = n_out - 2
+    bounds = g_start[:, None] + 1 + np.floor(
+        np.arange(n_inner + 1)[None, :] * (g_size[:, None] - 2) / n_inner
+    ).astype(np.int64)
+
+    previous = g_start.copy()
+    for b in range(n_inner):
+        lo = bounds[:, b]
+        hi = bounds[:, b + 1]
+
+        # Average of the next bucket (the last point for the final bucket)
+        if b + 1 < n_inner:
+            next_lo, next_hi = bounds[:, b + 1], bounds[:, b + 2]
+        else:
+            next_lo = g_start + g_size - 1
+            next_hi = next_lo + 1
+        next_x = _segment_mean(x_cumulative, next_lo, next_hi) + xf[0]
+        next_y = _segment_mean(y_cumulative, next_lo, next_hi)
+
+        # Triangle area for every candidate in every series' current bucket
+        counts = hi - lo
+        segment = np.repeat(np.arange(len(lo)), counts)
+        candidates = np.repeat(lo - np.r_[0, np.cumsum(counts)[:-1]], counts) + np.arange(counts.sum())
+        ax, ay = xf[previous][segment], yf[previous][segment]
+        area = np.abs(
+            (ax - next_x[segment]) * (yf[candidates] - ay)
+            - (ax - xf[candidates]) * (next_y[segment] - ay)
+        )
+        best = np.lexsort((-area, segment))
+        first_of_segment = np.r_[0, np.cumsum(counts)[:-1]]
+        picked = candidates[best[first_of_segment]]
+        chosen.append(picked)
+        previous = picked
+
+    return np.concatenate(chosen)
+
+
+def _segment_mean(cumulative, lo, hi):
+    return (cumulative[hi] - cumulative[lo]) / np.maximum(hi - lo, 1)
@@ -0,0 +1,386 @@
+"""
+Feature engineering for the model's feature views, with an incremental mode.
+
+The model's 30 features (lag-1, 13-row rolling average/min/max and deltas
+per truck, plus hour of day) are defined here once. feature_sql() generates
+the statement for any source table: SUMMIT_25_PREDICTION_V2.ipynb uses it for
+the training features (section 2) and the production feature view (section
+10), after which section 12 overwrites the prediction table with every row
+re-scored and queues every truck's alert episodes to be rebuilt (section 13).
+
+Incremental mode makes scoring cost scale with new data instead of history.
+A small state table carries each truck's last WINDOW_ROWS raw readings from
+one run to the next; its newest TIMESTAMP per truck is the truck's watermark.
+A run (run_incremental()) then:
+
+1. computes features for readings newer than each truck's watermark, with
+   the carried rows prepended so LAG and the rolling windows see the same
+   preceding rows as a full recompute (incremental_feature_sql())
+2. scores them into a staging table (a callback: the model in the notebook,
+   any stand-in locally)
+3. merges the staged predictions into the prediction table on
+   (TRUCK_ID, TIMESTAMP), as a delete + insert, so a run that is repeated
+   after a failure never duplicates rows
+4. optionally records each scored truck's earliest new TIMESTAMP in the
+   alert episode changes table, so section 13 folds exactly these rows into
+   the alert episodes (alerts.refresh_alert_episodes())
+5. moves each truck's last WINDOW_ROWS readings into the state table
+
+Readings that arrive with a TIMESTAMP at or before their truck's watermark
+are not picked up, nor are a new truck's readings older than every known
+truck's watermark (the scan is bounded by the oldest watermark); rebuild by
+dropping the state and prediction tables, or with one full re-score. A
+truck reporting late is still scored once its readings pass its own
+watermark, and its alert episodes follow, however far behind the rest of
+the fleet it is.
+
+On the first run the state is seeded from an existing prediction table, so
+switching an installation from full to incremental scoring does not re-score
+its history.
+
+All statements are plain SQL that runs on Snowflake and on LocalSession
+(SQLite), so the pipeline can be exercised locally against the quickstart
+CSVs (see benchmarks/bench_incremental_features.py).
+
+compute_features() is the same feature definition in NumPy, for scoring
+outside the warehouse: it takes a batch of readings sorted by
+(TRUCK_ID, TIMESTAMP) as columns and returns OUTPUT_COLUMNS as arrays, in
+O(n) per feature (rolling sums from prefix sums, rolling min/max from
+block-wise prefix/suffix extremes). benchmarks/bench_features.py checks it
+against feature_sql() on LocalSession.
+"""
+import numpy as np
+
+# Raw columns the features are computed from, in the feature view's order
+RAW_COLUMNS = [
+    "EXHAUST_GAS_TEMP", "OIL_PRESSURE", "BOOST_PRESSURE", "OIL_CONTAMINATION",
+    "ENGINE_BOOST_RATIO", "AMBIENT_TEMP", "RPM", "SPEED", "GPS_LAT", "GPS_LON",
+]
+
+# Sensors with lag, rolling average and delta features
+SENSOR_COLUMNS = ["EXHAUST_GAS_TEMP", "OIL_PRESSURE", "BOOST_PRESSURE", "OIL_CONTAMINATION", "ENGINE_BOOST_RATIO"]
+
+# Sensors with rolling min/max features
+MIN_MAX_COLUMNS = ["EXHAUST_GAS_TEMP", "OIL_PRESSURE"]
+
+# Rolling windows span this many preceding rows plus the current one (~1 hour at 5-minute cadence)
+WINDOW_ROWS = 12
+
+# The model's inputs, in the order of feature_cols in section 5 of the notebook
+FEATURE_COLUMNS = (
+    RAW_COLUMNS
+    + [f"{c}_LAG1" for c in SENSOR_COLUMNS]
+    + [f"{c}_AVG_1HR" for c in SENSOR_COLUMNS]
+    + [f"{c}_{stat}_1HR" for c in MIN_MAX_COLUMNS for stat in ("MIN", "MAX")]
+    + [f"DELTA_{c}" for c in SENSOR_COLUMNS]
+    + ["HOUR_OF_DAY"]
+)
+
+# Output of feature_sql(): raw columns, keys, then the engineered features
+OUTPUT_COLUMNS = RAW_COLUMNS + ["TIMESTAMP", "TRUCK_ID"] + FEATURE_COLUMNS[len(RAW_COLUMNS):]
+
+PRODUCTION_DATA_TABLE = "TURBO_DATA_PRODUCTION"
+PREDICTION_OUTPUT_TABLE = "TURBO_DATA_PREDICTIONS_NEW"
+
+# Each truck's last WINDOW_ROWS readings, carried between incremental runs
+FEATURE_STATE_TABLE = "TURBO_FEATURE_STATE"
+
+# Scored rows of one incremental run, before they are merged
+STAGING_TABLE = "TURBO_SCORING_STAGING"
+
+# Earliest prediction each truck had written since the alert episodes were last refreshed (section 13)
+ALERT_EPISODE_CHANGES_TABLE = "TURBO_ALERT_EPISODE_CHANGES"
+
+STATE_COLUMNS = ["TRUCK_ID", "TIMESTAMP"] + RAW_COLUMNS
+
+
+def feature_sql(source, dialect="snowflake"):
+    """
+    SQL computing every feature for all rows of `source`.
+
+    Args:
+        source: Table name with the raw readings
+        dialect: "snowflake", or "sqlite" for LocalSession (which stores
+                 timestamps as ISO text and must not CAST them)
+
+    Returns:
+        SQL string producing OUTPUT_COLUMNS
+    """
+    return _feature_query(_source_rows(source, dialect))
+
+
+def incremental_feature_sql(source, state_table=FEATURE_STATE_TABLE, dialect="snowflake"):
+    """
+    SQL computing features only for readings newer than each truck's watermark.
+
+    The state table's rows are prepended to each truck's new readings, so
+    the windows of the first new rows are complete, and then filtered out.
+
+    Args:
+        source: Table name with the raw readings
+        state_table: Table holding each truck's last WINDOW_ROWS readings
+        dialect: As for feature_sql()
+
+    Returns:
+        SQL string producing OUTPUT_COLUMNS
+    """
+    columns = _quoted(STATE_COLUMNS)
+    # The oldest watermark bounds the scan (so clustered tables prune); the per-truck
+    # check then keeps only each truck's readings past its own watermark
+    rows = f"""
+        SELECT {columns}, 1 AS "IS_NEW"
+        FROM ({_source_rows(source, dialect)}) s
+        WHERE s."TIMESTAMP" > COALESCE(
+            (SELECT MIN("WATERMARK") FROM (SELECT MAX("TIMESTAMP") AS "WATERMARK" FROM {state_table} GROUP BY "TRUCK_ID")),
+            '1900-01-01'
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM {state_table} w
+            WHERE w."TRUCK_ID" = s."TRUCK_ID" AND w."TIMESTAMP" >= s."TIMESTAMP"
+        )
+        UNION ALL
+        SELECT {columns}, 0 AS "IS_NEW" FROM {state_table}"""
+    return f"""SELECT {_quoted(OUTPUT_COLUMNS)} FROM (
+{_feature_query(rows, extra_columns=['"IS_NEW"'])}
+) WHERE "IS_NEW" = 1"""
+
+
+def run_incremental(session, score, source=PRODUCTION_DATA_TABLE, prediction_table=PREDICTION_OUTPUT_TABLE,
+                    state_table=FEATURE_STATE_TABLE, staging_table=STAGING_TABLE, changes_table=None,
+                    dialect=None):
+    """
+    Score the readings that arrived since the last run and merge them into the prediction table.
+
+    Args:
+        session: Snowpark session or LocalSession
+        score: Callable score(session, feature_sql, staging_table) that runs
+               the feature SQL, scores the rows and writes the result (all
+               feature columns plus the model's outputs) to staging_table,
+               returning the number of rows written
+        source: Production table with the raw readings
+        prediction_table: Table the predictions are merged into (created on the first run)
+        state_table: Carried per-truck state (created if missing)
+        staging_table: Scratch table for the scored rows
+        changes_table: Optional table (created if missing) that receives each
+                       scored truck's TRUCK_ID and earliest scored TIMESTAMP as
+                       CHANGED_FROM, for alerts.refresh_alert_episodes()
+        dialect: SQL dialect; defaults to the session's `dialect` attribute
+                 ("sqlite" for LocalSession) or "snowflake"
+
+    Returns:
+        Number of readings scored
+    """
+    dialect = dialect or getattr(session, "dialect", "snowflake")
+    _execute(session, f"""
+        CREATE TABLE IF NOT EXISTS {state_table} (
+            "TRUCK_ID" INT, "TIMESTAMP" TIMESTAMP_NTZ, {", ".join(f'"{c}" FLOAT' for c in RAW_COLUMNS)}
+        )""")
+    predictions_exist = _table_exists(session, prediction_table)
+    if predictions_exist and not session.sql(f"SELECT COUNT(*) FROM {state_table}").collect()[0][0]:
+        # Switching from full scoring: carry the already-scored history's last rows
+        _execute(session, _keep_last_rows_sql(prediction_table, state_table))
+
+    scored = score(session, incremental_feature_sql(source, state_table, dialect), staging_table)
+    if not scored:
+        return 0
+
+    if predictions_exist:
+        columns = _quoted(_columns(session, staging_table))
+        # MERGE as delete + insert keyed by (TRUCK_ID, TIMESTAMP): re-running after a failure
+        # between this step and the state update replaces the rows instead of duplicating them
+        _execute(session, f"""
+            DELETE FROM {prediction_table}
+            WHERE "TIMESTAMP" >= (SELECT MIN("TIMESTAMP") FROM {staging_table})
+            AND ("TRUCK_ID", "TIMESTAMP") IN (SELECT "TRUCK_ID", "TIMESTAMP" FROM {staging_table})""")
+        _execute(session, f"INSERT INTO {prediction_table} ({columns}) SELECT {columns} FROM {staging_table}")
+    else:
+        _execute(session, f"CREATE TABLE {prediction_table} AS SELECT * FROM {staging_table}")
+    # Tell the alert episode refresh (notebook section 13) which trucks changed, and from when
+    if changes_table:
+        _record_changes(session, staging_table, changes_table)
+
+    # Carry each truck's newest rows forward and drop the ones that fell out of the window
+    _execute(session, _keep_last_rows_sql(staging_table, state_table))
+    _execute(session, f"""
+        DELETE FROM {state_table}
+        WHERE ("TRUCK_ID", "TIMESTAMP") IN (
+            SELECT "TRUCK_ID", "TIMESTAMP" FROM (
+                SELECT "TRUCK_ID", "TIMESTAMP",
+                       ROW_NUMBER() OVER (PARTITION BY "TRUCK_ID" ORDER BY "TIMESTAMP" DESC) AS "RN"
+                FROM {state_table}
+            ) WHERE "RN" > {WINDOW_ROWS}
+        )""")
+    _execute(session, f"DROP TABLE IF EXISTS {staging_table}")
+    return scored
+
+
+def queue_episode_rebuild(session, prediction_table=PREDICTION_OUTPUT_TABLE,
+                          changes_table=ALERT_EPISODE_CHANGES_TABLE):
+    """Mark every truck's predictions as changed, so the next episode refresh rebuilds them all."""
+    _record_changes(session, prediction_table, changes_table)
+
+
+def _record_changes(session, table, changes_table):
+    _execute(session, f'CREATE TABLE IF NOT EXISTS {changes_table} ("TRUCK_ID" INT, "CHANGED_FROM" TIMESTAMP_NTZ)')
+    _execute(session, f"""
+        INSERT INTO {changes_table} ("TRUCK_ID", "CHANGED_FROM")
+        SELECT "TRUCK_ID", MIN("TIMESTAMP") FROM {table}
+        GROUP BY "TRUCK_ID"
+    """)
+
+
+def compute_features(columns):
+    """
+    Every feature for a batch of readings, without a database.
+
+    Matches feature_sql() row for row: windows never cross trucks, a
+    truck's first row has NULL (NaN) lags and deltas, and missing readings
+    are skipped by the rolling statistics like SQL NULLs (a window with no
+    readings is NaN).
+
+    Args:
+        columns: Mapping of column name to array-like (a DataFrame, a dict of
+                 arrays ...) with TRUCK_ID, TIMESTAMP and RAW_COLUMNS, sorted by
+                 (TRUCK_ID, TIMESTAMP)
+
+    Returns:
+        Dict of OUTPUT_COLUMNS to NumPy arrays (float64 features, int64 HOUR_OF_DAY)
+    """
+    trucks = np.asarray(columns["TRUCK_ID"])
+    timestamps = np.asarray(columns["TIMESTAMP"], dtype="datetime64[ns]")
+    n = len(trucks)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = trucks[1:] != trucks[:-1]
+    if np.any(timestamps[1:][~starts[1:]] < timestamps[:-1][~starts[1:]]):
+        raise ValueError("readings must be sorted by (TRUCK_ID, TIMESTAMP)")
+
+    # Lay each truck's rows out after WINDOW_ROWS empty cells, so a fixed-size
+    # window over the layout never reaches into the previous truck
+    positions = np.arange(n) + WINDOW_ROWS * np.cumsum(starts)
+    size = positions[-1] + 1 if n else 0
+
+    result = {c: np.asarray(columns[c], dtype=np.float64) for c in RAW_COLUMNS}
+    result["TIMESTAMP"] = np.asarray(columns["TIMESTAMP"])
+    result["TRUCK_ID"] = trucks
+    for c in SENSOR_COLUMNS:
+        lag = np.empty(n)
+        lag[1:] = result[c][:-1]
+        lag[starts] = np.nan
+        result[f"{c}_LAG1"] = lag
+    for c in SENSOR_COLUMNS:
+        result[f"{c}_AVG_1HR"] = _rolling_mean(result[c], positions, size)
+    for c in MIN_MAX_COLUMNS:
+        result[f"{c}_MIN_1HR"] = _rolling_extreme(result[c], positions, size, np.fmin)
+        result[f"{c}_MAX_1HR"] = _rolling_extreme(result[c], positions, size, np.fmax)
+    for c in SENSOR_COLUMNS:
+        result[f"DELTA_{c}"] = result[c] - result[f"{c}_LAG1"]
+    result["HOUR_OF_DAY"] = timestamps.astype("datetime64[h]").astype(np.int64) % 24
+    return {c: result[c] for c in OUTPUT_COLUMNS}
+
+
+def _rolling_mean(values, positions, size):
+    """Mean of the non-NaN values in each row's window, from prefix sums over the padded layout."""
+    valid = ~np.isnan(values)
+    # Prefix sums of the deviations from the batch mean stay small, so the
+    # difference of two sums keeps its precision over millions of rows
+    center = values[valid].mean() if valid.any() else 0.0
+    sums = np.zeros(size + 1)
+    counts = np.zeros(size + 1)
+    sums[positions + 1] = np.where(valid, values - center, 0.0)
+    counts[positions + 1] = valid
+    sums, counts = np.cumsum(sums), np.cumsum(counts)
+
+    first = positions - WINDOW_ROWS
+    total = sums[positions + 1] - sums[first]
+    count = counts[positions + 1] - counts[first]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count + center, np.nan)
+
+
+def _rolling_extreme(values, positions, size, extreme):
+    """
+    Rolling min or max (van Herk/Gil-Werman): O(n) without a per-row deque.
+
+    The padded layout is cut into blocks of one window; a window then spans
+    the tail of one block and the head of the next, so its extreme is the
+    extreme of a block suffix and a block prefix.
+
+    Args:
+        extreme: np.fmin or np.fmax, which skip NaN (empty cells and missing readings)
+    """
+    width = WINDOW_ROWS + 1
+    blocks = -(-size // width)
+    padded = np.full(blocks * width, np.nan)
+    padded[positions] = values
+    grid = padded.reshape(blocks, width)
+    prefix = extreme.accumulate(grid, axis=1).ravel()
+    suffix = extreme.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    return extreme(suffix[positions - WINDOW_ROWS], prefix[positions])
+
+
+def _source_rows(source, dialect):
+    """Raw readings with typed keys (the quickstart tables may store them as text)."""
+    if dialect == "sqlite":
+        keys = '"TIMESTAMP", CAST("TRUCK_ID" AS INT) AS "TRUCK_ID"'
+    else:
+        keys = 'CAST("TIMESTAMP" AS TIMESTAMP) AS "TIMESTAMP", CAST("TRUCK_ID" AS INT) AS "TRUCK_ID"'
+    return f"SELECT {_quoted(RAW_COLUMNS)}, {keys} FROM {source}"
+
+
+def _feature_query(rows, extra_columns=()):
+    """Window features over `rows` (a SELECT with STATE_COLUMNS), same shape as section 10's SQL."""
+    partition = 'PARTITION BY "TRUCK_ID" ORDER BY "TIMESTAMP"'
+    window = f"{partition} ROWS BETWEEN {WINDOW_ROWS} PRECEDING AND CURRENT ROW"
+    inner = [f'"{c}"' for c in RAW_COLUMNS] + ['"TIMESTAMP"', '"TRUCK_ID"'] + list(extra_columns)
+    inner += [f'LAG("{c}", 1, NULL) OVER ({partition}) AS "{c}_LAG1"' for c in SENSOR_COLUMNS]
+    inner += [f'AVG("{c}") OVER ({window}) AS "{c}_AVG_1HR"' for c in SENSOR_COLUMNS]
+    inner += [f'{stat}("{c}") OVER ({window}) AS "{c}_{stat}_1HR"'
+              for c in MIN_MAX_COLUMNS for stat in ("MIN", "MAX")]
+
+    outer = [f'"{c}"' for c in RAW_COLUMNS] + ['"TIMESTAMP"', '"TRUCK_ID"'] + list(extra_columns)
+    outer += [f'"{c}_LAG1"' for c in SENSOR_COLUMNS]
+    outer += [f'"{c}_AVG_1HR"' for c in SENSOR_COLUMNS]
+    outer += [f'"{c}_{stat}_1HR"' for c in MIN_MAX_COLUMNS for stat in ("MIN", "MAX")]
+    outer += [f'("{c}" - "{c}_LAG1") AS "DELTA_{c}"' for c in SENSOR_COLUMNS]
+    outer += ['hour("TIMESTAMP") AS "HOUR_OF_DAY"']
+
+    separator = ",\n    "
+    return f"""SELECT
+    {separator.join(outer)}
+FROM (
+    SELECT
+        {(separator + "    ").join(inner)}
+    FROM ({rows})
+)"""
+
+
+def _keep_last_rows_sql(source, state_table):
+    """Insert each truck's newest WINDOW_ROWS rows of `source` into the state table."""
+    columns = _quoted(STATE_COLUMNS)
+    return f"""
+        INSERT INTO {state_table} ({columns})
+        SELECT {columns} FROM (
+            SELECT {columns},
+                   ROW_NUMBER() OVER (PARTITION BY "TRUCK_ID" ORDER BY "TIMESTAMP" DESC) AS "RN"
+            FROM {source}
+        ) WHERE "RN" <= {WINDOW_ROWS}"""
+
+
+def _quoted(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _execute(session, query):
+    session.sql(query).collect()
+
+
+def _table_exists(session, table):
+    try:
+        session.sql(f"SELECT 1 FROM {table} LIMIT 1").collect()
+    except Exception:
+        return False
+    return True
+
+
+def _columns(session, table):
+    return list(session.sql(f"SELECT * FROM {table} LIMIT 0").to_pandas().columns)
@@ -0,0 +1,171 @@
+"""
+Per-timestamp fleet aggregates for the "Average (No Alerts)" chart baseline.
+
+FleetAggregate keeps running sums and non-null counts per TIMESTAMP for the
+value columns only. Appending readings adds to them and excluding trucks (e.g.
+as they enter alert state) subtracts just those trucks' readings, so the
+baseline never needs a groupby over the whole fleet. Running sums pick up
+rounding error with every add and subtract, so a long-lived aggregate should
+be rebuilt from the rows it covers now and then: `subtracted` counts the rows
+removed since it was built, and TailBuffer rebuilds once that reaches the
+number of rows it holds. fleet_percentiles() adds p10/p50/p90 bands in one
+vectorized sort per column.
+"""
+import numpy as np
+import pandas as pd
+
+
+class FleetAggregate:
+    """
+    Running per-timestamp sums and counts of the given value columns.
+
+    Args:
+        columns: Value columns to aggregate (TRUCK_ID and TIMESTAMP excluded)
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.timestamps = np.empty(0, dtype="datetime64[ns]")
+        self.sums = np.zeros((0, len(self.columns)))
+        self.counts = np.zeros((0, len(self.columns)), dtype=np.int64)
+        self.subtracted = 0  # rows removed since the sums were computed from scratch
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        """Aggregate of every reading in `df`."""
+        aggregate = cls(columns)
+        aggregate.add(df)
+        return aggregate
+
+    def copy(self):
+        other = FleetAggregate(self.columns)
+        other.timestamps = self.timestamps.copy()
+        other.sums = self.sums.copy()
+        other.counts = self.counts.copy()
+        other.subtracted = self.subtracted
+        return other
+
+    def add(self, rows):
+        """Fold readings into the aggregate."""
+        self._apply(rows, 1)
+
+    def subtract(self, rows):
+        """Remove readings previously added (e.g. evicted rows or alert trucks)."""
+        self._apply(rows, -1)
+
+    def without(self, rows):
+        """New aggregate with `rows` removed; this one is left unchanged."""
+        other = self.copy()
+        other.subtract(rows)
+        return other
+
+    def _apply(self, rows, sign):
+        if rows.empty:
+            return
+        if sign < 0 and not len(self.timestamps):
+            raise ValueError("Cannot subtract readings from an empty aggregate")
+        unique, codes = _timestamp_codes(rows)
+
+        if sign > 0 and not np.isin(unique, self.timestamps, assume_unique=True).all():
+            merged = np.union1d(self.timestamps, unique)
+            sums = np.zeros((len(merged), len(self.columns)))
+            counts = np.zeros((len(merged), len(self.columns)), dtype=np.int64)
+            existing = np.searchsorted(merged, self.timestamps)
+            sums[existing] = self.sums
+            counts[existing] = self.counts
+            self.timestamps, self.sums, self.counts = merged, sums, counts
+
+        slots = np.searchsorted(self.timestamps, unique)
+        if sign < 0 and not np.array_equal(self.timestamps[np.minimum(slots, len(self.timestamps) - 1)], unique):
+            raise ValueError("Cannot subtract readings at timestamps that were never added")
+
+        n_unique = len(unique)
+        for j, column in enumerate(self.columns):
+            values = rows[column].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self.sums[slots, j] += sign * np.bincount(codes, weights=np.where(valid, values, 0.0),
+                                                      minlength=n_unique)
+            self.counts[slots, j] += sign * np.bincount(codes, weights=valid,
+                                                        minlength=n_unique).astype(np.int64)
+
+        if sign < 0:
+            self.subtracted += len(rows)
+            # Drop timestamps nothing contributes to any more
+            keep = self.counts.any(axis=1)
+            if not keep.all():
+                self.timestamps, self.sums, self.counts = (
+                    self.timestamps[keep], self.sums[keep], self.counts[keep])
+
+    def mean(self, start=None, end=None):
+        """
+        Per-timestamp mean of every column, optionally limited to [start, end].
+
+        Returns:
+            DataFrame with TIMESTAMP and the value columns (NaN where no
+            reading contributed), ordered by TIMESTAMP
+        """
+        lo = 0 if start is None else np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(self.timestamps) if end is None else np.searchsorted(
+            self.timestamps, np.datetime64(pd.Timestamp(end)), "right")
+        counts = self.counts[lo:hi]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, self.sums[lo:hi] / counts, np.nan)
+        result = pd.DataFrame(means, columns=self.columns)
+        result.insert(0, "TIMESTAMP", self.timestamps[lo:hi])
+        return result
+
+
+def fleet_percentiles(df, columns, percentiles=(10, 50, 90)):
+    """
+    Per-timestamp percentiles of each column across trucks.
+
+    Readings are laid out as one row per timestamp and sorted along the rows
+    in one call per column; every percentile is then read from its position
+    with linear interpolation, matching np.percentile's default. Missing
+    values are ignored.
+
+    Returns:
+        DataFrame with TIMESTAMP and `<column>_P<n>` for every column and
+        percentile, ordered by TIMESTAMP
+    """
+    unique, codes = _timestamp_codes(df)
+    result = {"TIMESTAMP": unique}
+
+    # Rows grouped by timestamp with an integer radix sort (codes fit in 16 bits for any chart window)
+    by_timestamp = np.argsort(codes.astype(np.min_scalar_type(len(unique))), kind="stable")
+    sorted_codes = codes[by_timestamp]
+
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)[by_timestamp]
+        valid = ~np.isnan(values)
+        group = sorted_codes[valid]
+        counts = np.bincount(group, minlength=len(unique))
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        has_values = counts > 0
+
+        # One row per timestamp, padded with +inf, sorted along the row: sorting
+        # many short rows is much cheaper than one argsort of every reading
+        grid = np.full((len(unique), max(counts.max(initial=0), 1)), np.inf)
+        grid[group, np.arange(len(group)) - starts[group]] = values[valid]
+        grid.sort(axis=1)
+
+        rows = np.flatnonzero(has_values)
+        for p in percentiles:
+            position = (p / 100) * (counts[rows] - 1)
+            lo = np.floor(position).astype(np.int64)
+            hi = np.ceil(position).astype(np.int64)
+            quantile = np.full(len(unique), np.nan)
+            low_values = grid[rows, lo]
+            quantile[rows] = low_values + (grid[rows, hi] - low_values) * (position - lo)
+            result[f"{column}_P{p}"] = quantile
+
+    return pd.DataFrame(result)
+
+
+def _timestamp_codes(df):
+    """Sorted unique timestamps and each row's index into them (hash-based, no full sort)."""
+    codes, unique = pd.factorize(df["TIMESTAMP"].to_numpy().astype("datetime64[ns]"))
+    order = np.argsort(unique)
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[order] = np.arange(len(unique))
+    return np.asarray(unique)[order], rank[codes]
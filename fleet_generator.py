@@ -0,0 +1,321 @@
+"""
+Synthetic fleet telemetry shaped like TURBO_HISTORY_DATA / TURBO_DATA_PRODUCTION.
+
+Generates 5-minute readings for fleets of any size (10 to 100k trucks) over
+days or weeks, with the quickstart tables' columns, including the failure
+labels. Each truck has its own baselines, duty shift, home region and route;
+failures arrive at random (mean MEAN_DAYS_BETWEEN_FAILURES apart) and are
+preceded by a degradation ramp - exhaust temperature and oil contamination
+rise, oil and boost pressure fall - so the labels are learnable:
+
+- PART_FAILURE_NEXT_12HR is 1 for readings within the 12 hours up to a failure
+- ACTUAL_FAILURE_EVENT is 1 on the reading at which the truck fails
+
+After a failure the truck is repaired (oil changed, sensors back to baseline).
+
+Work is done in units of TRUCK_BLOCK trucks x one day, fully vectorized, so
+memory stays bounded by one unit (about 300k rows at 5-minute cadence) however
+many rows are produced. Every unit is seeded from (seed, truck block, day),
+and failure schedules from (seed, truck block) on a fixed timeline starting
+at EPOCH, so the output does not depend on how it is chunked, and history and
+production tables generated with the same seed describe the same trucks:
+
+    python fleet_generator.py history/ --trucks 1000 --start 2025-03-01 --days 28
+    python fleet_generator.py production/ --trucks 1000 --start 2025-03-29 --days 14 \\
+        --table TURBO_DATA_PRODUCTION --format csv
+
+Files are written one per day ({table}-YYYY-MM-DD.parquet or .csv), rows
+ordered by (TRUCK_ID, TIMESTAMP) within each file. Load them with COPY INTO,
+LocalSession.from_frames(), or read them back with pandas. Parquet output
+needs pyarrow.
+"""
+import argparse
+import os
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+# Output columns, in the quickstart tables' order
+FLEET_COLUMNS = [
+    "TIMESTAMP",
+    "TRUCK_ID",
+    "EXHAUST_GAS_TEMP",
+    "OIL_PRESSURE",
+    "BOOST_PRESSURE",
+    "OIL_CONTAMINATION",
+    "ENGINE_BOOST_RATIO",
+    "AMBIENT_TEMP",
+    "RPM",
+    "SPEED",
+    "GPS_LAT",
+    "GPS_LON",
+    "PART_FAILURE_NEXT_12HR",
+    "ACTUAL_FAILURE_EVENT",
+]
+
+HISTORY_TABLE = "TURBO_HISTORY_DATA"
+PRODUCTION_TABLE = "TURBO_DATA_PRODUCTION"
+
+# Failure schedules start here, so any generated window sees the same failures
+EPOCH = pd.Timestamp("2024-01-01")
+
+# Trucks generated together; part of the seeding, so changing it changes the data
+TRUCK_BLOCK = 1024
+
+MEAN_DAYS_BETWEEN_FAILURES = 30
+# Sensors drift towards failure over this period before it
+DEGRADATION_HOURS = 36
+# Readings this close before a failure are labelled PART_FAILURE_NEXT_12HR
+LABEL_HOURS = 12
+
+
+def generate_chunks(n_trucks, start, days, interval_minutes=5, seed=0, first_truck=1):
+    """
+    Yield the fleet's readings one (truck block, day) unit at a time.
+
+    Units come day by day, and within a day by ascending truck block, each
+    ordered by (TRUCK_ID, TIMESTAMP).
+
+    Args:
+        n_trucks: Number of trucks
+        start: First day (midnight); must not be before EPOCH
+        days: Number of days
+        interval_minutes: Reading cadence; must divide a day
+        seed: Random seed
+        first_truck: TRUCK_ID of the first truck
+
+    Yields:
+        (day, DataFrame) with day the pd.Timestamp of the unit's date
+    """
+    start = pd.Timestamp(start).normalize()
+    if start < EPOCH:
+        raise ValueError(f"start must not be before {EPOCH.date()}")
+    if 1440 % interval_minutes:
+        raise ValueError("interval_minutes must divide 1440")
+    steps_per_day = 1440 // interval_minutes
+    first_day = (start - EPOCH).days
+    last_truck = first_truck + n_trucks - 1
+    blocks = range((first_truck - 1) // TRUCK_BLOCK, (last_truck - 1) // TRUCK_BLOCK + 1)
+    end_step = (first_day + days) * steps_per_day
+
+    # Static per-truck parameters and failure schedules, one block at a time
+    fleet = {}
+    for block in blocks:
+        block_ids = np.arange(block * TRUCK_BLOCK + 1, (block + 1) * TRUCK_BLOCK + 1)
+        keep = (block_ids >= first_truck) & (block_ids <= last_truck)
+        params = _truck_params(seed, block)
+        failures = _failure_steps(seed, block, end_step, interval_minutes)
+        fleet[block] = (np.flatnonzero(keep), block_ids[keep], {k: v[keep] for k, v in params.items()},
+                        failures[keep])
+
+    for day in range(first_day, first_day + days):
+        for block in blocks:
+            rows, truck_ids, params, failures = fleet[block]
+            rng = np.random.default_rng([seed, 2, block, day])
+            steps = np.arange(day * steps_per_day, (day + 1) * steps_per_day)
+            yield EPOCH + pd.Timedelta(days=day), _readings(rows, truck_ids, params, failures, steps,
+                                                             interval_minutes, rng)
+
+
+def generate_frame(n_trucks, start, days, interval_minutes=5, seed=0, first_truck=1):
+    """The whole fleet in one DataFrame ordered by (TRUCK_ID, TIMESTAMP); for small fleets."""
+    parts = [df for _, df in generate_chunks(n_trucks, start, days, interval_minutes, seed, first_truck)]
+    df = pd.concat(parts, ignore_index=True)
+    return df.sort_values(["TRUCK_ID", "TIMESTAMP"], kind="stable", ignore_index=True)
+
+
+def write_fleet(path, n_trucks, start, days, interval_minutes=5, seed=0, first_truck=1,
+                table=HISTORY_TABLE, file_format="parquet"):
+    """
+    Generate a fleet straight to disk, one file per day.
+
+    Args:
+        path: Output directory (created if missing)
+        n_trucks, start, days, interval_minutes, seed, first_truck: As for generate_chunks()
+        table: Table name used as the file prefix
+        file_format: "parquet" or "csv"
+
+    Returns:
+        Number of rows written
+    """
+    if file_format not in ("parquet", "csv"):
+        raise ValueError(f"Unknown format: {file_format}")
+    os.makedirs(path, exist_ok=True)
+    if file_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    rows = 0
+    current_day, writer, file_name = None, None, None
+    for day, df in generate_chunks(n_trucks, start, days, interval_minutes, seed, first_truck):
+        if day != current_day:
+            if writer is not None:
+                writer.close()
+                writer = None
+            current_day = day
+            file_name = os.path.join(path, f"{table}-{day:%Y-%m-%d}.{file_format}")
+            if file_format == "csv" and os.path.exists(file_name):
+                os.remove(file_name)
+
+        if file_format == "parquet":
+            # One row group per truck block
+            batch = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(file_name, batch.schema)
+            writer.write_table(batch)
+        else:
+            df.to_csv(file_name, mode="a", header=not os.path.exists(file_name), index=False,
+                      date_format="%Y-%m-%d %H:%M:%S")
+        rows += len(df)
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+def _truck_params(seed, block):
+    """Per-truck baselines, duty shift, home region and route for one block."""
+    rng = np.random.default_rng([seed, 0, block])
+    n = TRUCK_BLOCK
+    return {
+        "egt": rng.normal(335, 8, n),
+        "oil": rng.normal(390, 15, n),
+        "boost": rng.normal(155, 6, n),
+        "ratio": rng.normal(1.0, 0.02, n),
+        "contamination": rng.uniform(2, 8, n),
+        # ppm per operating day since the last repair
+        "contamination_rate": rng.uniform(0.05, 0.2, n),
+        "shift_start": rng.integers(0, 24, n),
+        "shift_hours": rng.integers(8, 13, n),
+        "cruise": rng.normal(62, 5, n),
+        "lat": rng.uniform(30, 47, n),
+        "lon": rng.uniform(-120, -75, n),
+        # Driving hours per round trip and route size in degrees
+        "route_hours": rng.uniform(20, 80, n),
+        "route_size": rng.uniform(0.3, 2.0, n),
+        "route_phase": rng.uniform(0, 2 * np.pi, n),
+    }
+
+
+def _failure_steps(seed, block, end_step, interval_minutes):
+    """
+    Failure reading indices (since EPOCH) per truck, sorted.
+
+    Every truck's schedule runs past `end_step` plus the degradation period, so
+    each reading has a next failure. Gaps are drawn in fixed rounds so the
+    failures up to any given time do not depend on how far ahead the schedule
+    was generated.
+    """
+    rng = np.random.default_rng([seed, 1, block])
+    steps_per_day = 1440 / interval_minutes
+    horizon = end_step + DEGRADATION_HOURS / 24 * steps_per_day
+    rounds = []
+    reached = np.zeros(TRUCK_BLOCK)
+    while reached.min() <= horizon:
+        # At least the degradation period between failures, so ramps never overlap
+        gaps_days = DEGRADATION_HOURS / 24 + rng.exponential(MEAN_DAYS_BETWEEN_FAILURES, (TRUCK_BLOCK, 16))
+        gaps = np.round(gaps_days * steps_per_day)
+        steps = reached[:, None] + np.cumsum(gaps, axis=1)
+        reached = steps[:, -1]
+        rounds.append(steps)
+    return np.concatenate(rounds, axis=1).astype(np.int64)
+
+
+def _readings(rows, truck_ids, params, failures, steps, interval_minutes, rng):
+    """Readings for trucks x steps, truck-major; `rows` are the trucks' positions in their block."""
+    n_trucks, n_steps = len(truck_ids), len(steps)
+    shape = (n_trucks, n_steps)
+    step_grid = np.broadcast_to(steps, shape)
+
+    # Next failure at or after each reading, and the last one before it (searchsorted on
+    # one flat array, each truck's schedule offset into its own range)
+    offsets = np.arange(n_trucks, dtype=np.int64)[:, None] * _TRUCK_STRIDE
+    flat = (failures + offsets).ravel()
+    position = np.searchsorted(flat, (step_grid + offsets).ravel()).reshape(shape)
+    next_failure = flat[position] - offsets
+    row_start = np.arange(n_trucks)[:, None] * failures.shape[1]
+    previous = np.where(position > row_start, flat[np.maximum(position - 1, 0)] - offsets, -_NO_FAILURE)
+
+    steps_to_failure = next_failure - step_grid
+    hours_to_failure = steps_to_failure * interval_minutes / 60
+    severity = np.clip(1 - hours_to_failure / DEGRADATION_HOURS, 0, 1)
+    days_since_repair = np.minimum(step_grid - np.maximum(previous, 0), 60 * 1440) * interval_minutes / 1440
+
+    # Duty shift: driving from shift_start for shift_hours each day
+    hours = step_grid * (interval_minutes / 60)
+    shift_start = params["shift_start"][:, None]
+    shift_hours = params["shift_hours"][:, None]
+    since_shift = hours - shift_start
+    on_duty = np.mod(since_shift, 24) < shift_hours
+    driven_hours = np.floor(since_shift / 24) * shift_hours + np.minimum(np.mod(since_shift, 24), shift_hours)
+
+    def noise(scale):
+        # Drawn for the whole block, so a truck's readings do not depend on which others are generated
+        return rng.normal(0, scale, (TRUCK_BLOCK, n_steps))[rows]
+
+    speed = np.where(on_duty, np.clip(params["cruise"][:, None] + noise(8), 0, 80), 0)
+    rpm = np.where(on_duty, 1100 + 9 * speed + noise(60), 650 + noise(25))
+    egt = params["egt"][:, None] + 15 * on_duty + 90 * severity ** 2 + noise(4)
+    oil = params["oil"][:, None] - 40 * ~on_duty - 150 * severity + noise(8)
+    boost = np.where(on_duty, params["boost"][:, None], 112) - 60 * severity + noise(4)
+    contamination = (params["contamination"][:, None] + params["contamination_rate"][:, None] * days_since_repair
+                     + 20 * severity + noise(0.5))
+    ratio = params["ratio"][:, None] - 0.25 * severity + noise(0.01)
+
+    # Climate by latitude plus a day/night cycle
+    lat0 = params["lat"][:, None]
+    hour_of_day = np.mod(hours, 24)
+    ambient = 38 - 0.7 * lat0 + 7 * np.sin(2 * np.pi * (hour_of_day - 9) / 24) + noise(1.5)
+    angle = params["route_phase"][:, None] + 2 * np.pi * driven_hours / params["route_hours"][:, None]
+    lat = lat0 + params["route_size"][:, None] * np.sin(angle)
+    lon = params["lon"][:, None] + params["route_size"][:, None] * 1.3 * np.cos(angle)
+
+    label_steps = LABEL_HOURS * 60 // interval_minutes
+    return pd.DataFrame({
+        "TIMESTAMP": (EPOCH + pd.to_timedelta(step_grid.ravel() * interval_minutes, unit="min")).to_numpy(),
+        "TRUCK_ID": np.repeat(truck_ids, n_steps),
+        "EXHAUST_GAS_TEMP": np.round(egt, 2).ravel(),
+        "OIL_PRESSURE": np.round(oil, 2).ravel(),
+        "BOOST_PRESSURE": np.round(boost, 2).ravel(),
+        "OIL_CONTAMINATION": np.round(np.maximum(contamination, 0), 2).ravel(),
+        "ENGINE_BOOST_RATIO": np.round(ratio, 4).ravel(),
+        "AMBIENT_TEMP": np.round(ambient, 2).ravel(),
+        "RPM": np.round(rpm).ravel(),
+        "SPEED": np.round(speed, 1).ravel(),
+        "GPS_LAT": np.round(lat, 6).ravel(),
+        "GPS_LON": np.round(lon, 6).ravel(),
+        "PART_FAILURE_NEXT_12HR": ((steps_to_failure >= 0) & (steps_to_failure <= label_steps)).astype(np.int8).ravel(),
+        "ACTUAL_FAILURE_EVENT": (steps_to_failure == 0).astype(np.int8).ravel(),
+    }, copy=False)
+
+
+# "No previous failure" marker, and the per-truck offset in the flat failure lookup
+_NO_FAILURE = 1 << 40
+_TRUCK_STRIDE = 1 << 42
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic fleet telemetry for scale testing.")
+    parser.add_argument("path", help="Output directory")
+    parser.add_argument("--trucks", type=int, default=100)
+    parser.add_argument("--start", default="2025-03-01", help="First day")
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--interval-minutes", type=int, default=5)
+    parser.add_argument("--first-truck", type=int, default=1, help="TRUCK_ID of the first truck")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--table", default=HISTORY_TABLE, help="File name prefix")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = write_fleet(args.path, args.trucks, args.start, args.days, args.interval_minutes, args.seed,
+                       args.first_truck, args.table, args.format)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {rows} rows to {args.path} in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/s, peak RSS {peak_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Local stand-in for a Snowpark session.
+
+Serves `session.sql(query, params).to_pandas()` / `.to_pandas_batches()` /
+`.collect()` from an in-memory SQLite database so the dashboard's data layer can be exercised without a
+Snowflake account, e.g. against the quickstart CSVs:
+
+    session = LocalSession.from_csv({
+        "TURBO_DATA_PREDICTIONS_NEW": "turbo_data_predictions_new.csv",
+    })
+
+Only the subset of SQL used by the dashboard and features.py is supported;
+`dialect` tells SQL generators that timestamps are stored as ISO text. `query_count` records
+how many statements were executed, which makes cache behaviour observable.
+`to_pandas_batches()` streams results in chunks of `batch_rows`, like the
+result batches Snowflake returns for large queries.
+"""
+import datetime
+import sqlite3
+import threading
+
+import pandas as pd
+
+SCHEMA_NAME = "ASSET_HEALTH"
+
+# Rows per batch served by to_pandas_batches()
+BATCH_ROWS = 50_000
+
+
+class LocalDataFrame:
+    """Lazy query result, mirroring the parts of snowpark.DataFrame we use."""
+
+    def __init__(self, session, query, params):
+        self._session = session
+        self._query = query
+        self._params = params
+
+    def to_pandas(self):
+        return self._session._execute_frame(self._query, self._params)
+
+    def to_pandas_batches(self):
+        return self._session._execute_batches(self._query, self._params)
+
+    def collect(self):
+        return self._session._execute_rows(self._query, self._params)
+
+
+class LocalSession:
+    """SQLite-backed replacement for `get_active_session()`."""
+
+    dialect = "sqlite"
+
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._timestamp_columns = set()
+        self.query_count = 0
+        self.batch_rows = BATCH_ROWS
+
+        self._conn.create_function("current_schema", 0, lambda: SCHEMA_NAME)
+        self._conn.create_function("time_slice", 3, _time_slice)
+        self._conn.create_function("hour", 1, _hour)
+        self._conn.execute("attach database ':memory:' as information_schema")
+        self._conn.execute(
+            "create table information_schema.tables "
+            "(table_schema text, table_name text, created text, last_altered text)"
+        )
+
+    @classmethod
+    def from_csv(cls, tables):
+        """
+        Create a session with one table per CSV file.
+
+        Args:
+            tables: Mapping of table name -> CSV path
+        """
+        session = cls()
+        for name, path in tables.items():
+            session.register(name, pd.read_csv(path))
+        return session
+
+    @classmethod
+    def from_frames(cls, tables):
+        """
+        Create a session with one table per DataFrame.
+
+        Args:
+            tables: Mapping of table name -> DataFrame
+        """
+        session = cls()
+        for name, df in tables.items():
+            session.register(name, df)
+        return session
+
+    def register(self, name, df):
+        """Create or replace a table, bumping its LAST_ALTERED like an overwrite would."""
+        name = name.upper()
+        df = _prepare_frame(df)
+        if "TIMESTAMP" in df.columns:
+            self._timestamp_columns.add("TIMESTAMP")
+
+        with self._lock:
+            df.to_sql(name, self._conn, if_exists="replace", index=False)
+            now = datetime.datetime.now().isoformat()
+            self._conn.execute("delete from information_schema.tables where table_name = ?", [name])
+            self._conn.execute(
+                "insert into information_schema.tables values (?, ?, ?, ?)",
+                [SCHEMA_NAME, name, now, now],
+            )
+            self._conn.commit()
+
+    def append(self, name, df):
+        """Insert rows into an existing table, bumping LAST_ALTERED but not CREATED."""
+        name = name.upper()
+        df = _prepare_frame(df)
+        with self._lock:
+            df.to_sql(name, self._conn, if_exists="append", index=False)
+            self._conn.execute(
+                "update information_schema.tables set last_altered = ? where table_name = ?",
+                [datetime.datetime.now().isoformat(), name],
+            )
+            self._conn.commit()
+
+    def sql(self, query, params=None):
+        return LocalDataFrame(self, query, params)
+
+    def _execute(self, query, params):
+        with self._lock:
+            self.query_count += 1
+            cursor = self._conn.execute(query, [_to_sqlite(p) for p in params or []])
+            if cursor.description is None:
+                # DDL/DML: commit like Snowflake's autocommit
+                self._conn.commit()
+                return [], []
+            columns = [d[0].upper() for d in cursor.description]
+            return columns, cursor.fetchall()
+
+    def _execute_frame(self, query, params):
+        columns, rows = self._execute(query, params)
+        return self._to_frame(rows, columns)
+
+    def _execute_batches(self, query, params):
+        """Yield the result as DataFrames of at most `batch_rows` rows (none if empty)."""
+        with self._lock:
+            self.query_count += 1
+            cursor = self._conn.execute(query, [_to_sqlite(p) for p in params or []])
+            columns = [d[0].upper() for d in cursor.description]
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.batch_rows)
+            if not rows:
+                return
+            yield self._to_frame(rows, columns)
+
+    def _to_frame(self, rows, columns):
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        for column in self._timestamp_columns.intersection(df.columns):
+            df[column] = pd.to_datetime(df[column])
+        return df
+
+    def _execute_rows(self, query, params):
+        return self._execute(query, params)[1]
+
+
+# TIME_SLICE date parts supported locally -> pandas Timedelta units
+_SLICE_UNITS = {"SECOND": "s", "MINUTE": "min", "HOUR": "h", "DAY": "D"}
+
+
+def _time_slice(timestamp, length, unit):
+    """TIME_SLICE(ts, n, unit): start of the epoch-aligned slice containing ts."""
+    if timestamp is None:
+        return None
+    start = pd.Timestamp(timestamp).floor(pd.Timedelta(int(length), unit=_SLICE_UNITS[unit.upper()]))
+    return _format_timestamp(start)
+
+
+def _hour(timestamp):
+    """HOUR(ts) for timestamps stored as ISO text."""
+    return None if timestamp is None else int(timestamp[11:13])
+
+
+def _prepare_frame(df):
+    df = df.copy()
+    df.columns = [c.upper() for c in df.columns]
+    for column in df.columns:
+        if column == "TIMESTAMP" or pd.api.types.is_datetime64_any_dtype(df[column]):
+            # Stored as ISO text so string bounds compare the way Snowflake's implicit cast does
+            df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d %H:%M:%S.%f").str[:-3]
+    return df
+
+
+def _format_timestamp(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def _to_sqlite(value):
+    if isinstance(value, (pd.Timestamp, datetime.datetime)):
+        return _format_timestamp(value)
+    return value
@@ -0,0 +1,228 @@
+"""
+Portable model artifact and resident in-process inference, for scoring on demand.
+
+The notebook's registered model (ASSET_HEALTH_12HOUR_FAILURE_PREDICTION) is
+exported as a native XGBoost booster plus a manifest, so it can be scored
+with nothing but xgboost - no registry, warehouse or Snowpark ML:
+
+    model_artifact/
+        model.ubj         native XGBoost booster (UBJSON)
+        artifact.json     model name and version, feature columns, objective,
+                          SHA-256 of model.ubj, xgboost version, export time
+
+load_artifact() loads an artifact once per process (thread-safe; later calls
+return the same object, so every Streamlit session shares it) and checks the
+checksum and feature columns. ModelArtifact.predict_proba() keeps an LRU
+cache of predictions keyed by a hash of the float32 feature vector, so
+re-scoring an unchanged reading (a rerun, another session, a what-if moved
+back) skips the model. dashboard.py uses it for what-if scoring when
+$TRUCK_MODEL_ARTIFACT points at an artifact; batch_scoring.py and
+online_scoring.py accept an artifact directory wherever they take a model.
+
+Export from the notebook (section 14) with export_model_version(), or from
+any xgboost Booster with export_booster(). benchmarks/bench_model_artifact.py
+measures load time and inference latency with and without the cache.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from features import FEATURE_COLUMNS
+
+# Environment variable with the artifact directory the dashboard scores with
+ARTIFACT_ENV = "TRUCK_MODEL_ARTIFACT"
+
+MODEL_NAME = "ASSET_HEALTH_12HOUR_FAILURE_PREDICTION"
+MODEL_FILE = "model.ubj"
+MANIFEST_FILE = "artifact.json"
+
+# Predictions kept per loaded artifact (one feature vector each)
+PREDICTION_CACHE_ENTRIES = 4096
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def export_booster(booster, path, model_name=MODEL_NAME, version=None):
+    """
+    Write an xgboost Booster as an artifact directory.
+
+    Args:
+        booster: Trained xgboost.Booster (features in FEATURE_COLUMNS order)
+        path: Artifact directory (created if missing; existing files replaced)
+        model_name, version: Recorded in the manifest
+
+    Returns:
+        The manifest dict
+    """
+    import xgboost
+
+    os.makedirs(path, exist_ok=True)
+    model_path = os.path.join(path, MODEL_FILE)
+    booster.save_model(model_path)
+    config = json.loads(booster.save_config())
+    manifest = {
+        "model_name": model_name,
+        "version": version,
+        "feature_columns": booster.feature_names or FEATURE_COLUMNS,
+        "objective": config["learner"]["objective"]["name"],
+        "sha256": _sha256(model_path),
+        "xgboost_version": xgboost.__version__,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def export_model_version(model_version, path, model_name=MODEL_NAME):
+    """
+    Export a Snowflake Model Registry version (an XGBoost classifier) as an artifact.
+
+    Args:
+        model_version: snowflake.ml.model.ModelVersion, e.g. registry.get_model(MODEL_NAME).version(name)
+        path: Artifact directory
+
+    Returns:
+        The manifest dict
+    """
+    estimator = model_version.load_model()
+    # Snowpark ML estimators wrap the open-source one; sklearn-style estimators wrap a Booster
+    if hasattr(estimator, "to_xgboost"):
+        estimator = estimator.to_xgboost()
+    booster = estimator.get_booster() if hasattr(estimator, "get_booster") else estimator
+    return export_booster(booster, path, model_name, model_version.version_name)
+
+
+class ModelArtifact:
+    """
+    A loaded model with an LRU cache of its predictions.
+
+    Args:
+        booster: xgboost.Booster
+        manifest: The artifact's manifest
+        cache_entries: Feature vectors whose predictions are kept (0 disables the cache)
+    """
+
+    def __init__(self, booster, manifest, cache_entries=PREDICTION_CACHE_ENTRIES):
+        self.booster = booster
+        self.manifest = manifest
+        self.feature_columns = manifest["feature_columns"]
+        self.cache_entries = cache_entries
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, cache_entries=PREDICTION_CACHE_ENTRIES):
+        """Load an artifact directory, verifying its checksum and feature columns."""
+        import xgboost
+
+        started = time.perf_counter()
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        model_path = os.path.join(path, MODEL_FILE)
+        if _sha256(model_path) != manifest["sha256"]:
+            raise ValueError(f"{model_path} does not match the checksum in its manifest")
+        missing = sorted(set(manifest["feature_columns"]) - set(FEATURE_COLUMNS))
+        if missing:
+            raise ValueError(f"Model expects features that features.py does not compute: {missing}")
+        booster = xgboost.Booster()
+        booster.load_model(model_path)
+        artifact = cls(booster, manifest, cache_entries)
+        artifact.load_seconds = time.perf_counter() - started
+        return artifact
+
+    def predict_proba(self, features):
+        """
+        Class probabilities for feature rows, from the cache where possible.
+
+        Rows not in the cache are scored together in one model call.
+
+        Args:
+            features: Dict of arrays or DataFrame holding FEATURE_COLUMNS, or a
+                      2-D array with columns in self.feature_columns order
+                      (cheapest for a few rows: selecting DataFrame columns
+                      costs more than a cached prediction)
+
+        Returns:
+            Array of shape (rows, 2): probability of no failure, of failure
+        """
+        if isinstance(features, np.ndarray):
+            matrix = np.asarray(features, dtype=np.float32)
+        else:
+            matrix = np.column_stack([np.asarray(features[c], dtype=np.float32) for c in self.feature_columns])
+        result = np.empty((len(matrix), 2))
+        if not len(matrix):
+            return result
+        keys = [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in matrix]
+
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    result[i] = cached
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return result
+
+        proba = self.booster.inplace_predict(matrix[missing])
+        if proba.ndim == 1:
+            proba = np.column_stack([1 - proba, proba])
+        result[missing] = proba
+        if self.cache_entries:
+            with self._lock:
+                for i, row in zip(missing, proba.tolist()):
+                    self._cache[keys[i]] = row
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return result
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache),
+                    "max_entries": self.cache_entries}
+
+
+def load_artifact(path=None, cache_entries=PREDICTION_CACHE_ENTRIES):
+    """
+    The process-wide ModelArtifact for `path`, loaded on first use.
+
+    Args:
+        path: Artifact directory; defaults to $TRUCK_MODEL_ARTIFACT
+
+    Returns:
+        ModelArtifact, shared by every caller in the process
+    """
+    path = os.path.abspath(path or os.environ[ARTIFACT_ENV])
+    with _loaded_lock:
+        artifact = _loaded.get(path)
+        if artifact is None:
+            artifact = _loaded[path] = ModelArtifact.load(path, cache_entries)
+        return artifact
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,328 @@
+"""
+Online scoring of single telemetry readings, as they arrive.
+
+OnlineScorer keeps a TruckWindow per truck: ring buffers of the truck's last
+WINDOW_ROWS + 1 sensor readings with running sums and monotonic min/max
+deques, so each new reading updates the 30 features in constant time and
+gives the same values as features.compute_features() over the whole stream
+(checked by benchmarks/bench_online_scoring.py). Readings must arrive in time
+order per truck; older or repeated timestamps are rejected.
+
+Scoring goes through a micro-batching queue: score() computes the reading's
+features at once and queues them, and a single batcher task takes everything
+queued by concurrent callers (up to max_batch) into one model call, run in a
+worker thread so the next batch can gather meanwhile. The model (a native
+XGBoost file or model_artifact.py artifact, see batch_scoring.load_model()) is
+loaded once per process.
+
+serve() exposes the scorer over a small HTTP/1.1 API (keep-alive, no
+dependencies beyond the standard library):
+
+    POST /score   {"TRUCK_ID": 7, "TIMESTAMP": "2025-04-07T15:05:00", "EXHAUST_GAS_TEMP": 351.2, ...}
+                  -> {"TRUCK_ID": 7, "TIMESTAMP": "...", "PREDICT_PROBA_0": 0.98, "PREDICT_PROBA_1": 0.02}
+                  (a JSON list of readings returns a list of results)
+    GET  /health  -> trucks tracked, readings and model calls so far
+
+    python online_scoring.py --model model.json --port 8765 --warm-start recent_readings.parquet
+"""
+import argparse
+import asyncio
+import json
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from batch_scoring import load_model, predict_proba, read_chunks
+from features import FEATURE_COLUMNS, MIN_MAX_COLUMNS, RAW_COLUMNS, SENSOR_COLUMNS, WINDOW_ROWS
+
+# Largest number of queued readings scored in one model call
+MAX_BATCH = 256
+
+# Extra time the batcher waits for more readings before a model call (0: only those already queued)
+MAX_WAIT_SECONDS = 0.0
+
+# Positions of the windowed sensors within RAW_COLUMNS
+_SENSOR_INDEX = [RAW_COLUMNS.index(c) for c in SENSOR_COLUMNS]
+_MIN_MAX_INDEX = [SENSOR_COLUMNS.index(c) for c in MIN_MAX_COLUMNS]
+
+
+class TruckWindow:
+    """
+    One truck's recent readings and the running state of its window features.
+
+    The rolling window covers the current and WINDOW_ROWS preceding readings.
+    Running sums are re-added exactly from the ring each time it wraps, so
+    rounding cannot accumulate over a long stream.
+    """
+
+    __slots__ = ("ring", "head", "seen", "sums", "counts", "lows", "highs", "previous", "last_timestamp")
+
+    def __init__(self):
+        width = WINDOW_ROWS + 1
+        self.ring = [[math.nan] * width for _ in SENSOR_COLUMNS]
+        self.head = 0
+        self.seen = 0
+        self.sums = [0.0] * len(SENSOR_COLUMNS)
+        self.counts = [0] * len(SENSOR_COLUMNS)
+        # (reading number, value) with values increasing (lows) or decreasing (highs) front to back
+        self.lows = [deque() for _ in MIN_MAX_COLUMNS]
+        self.highs = [deque() for _ in MIN_MAX_COLUMNS]
+        self.previous = None
+        self.last_timestamp = None
+
+    def update(self, timestamp, raw):
+        """
+        Add one reading and return its features.
+
+        Args:
+            timestamp: datetime of the reading, newer than the previous one
+            raw: Values of RAW_COLUMNS, NaN where missing
+
+        Returns:
+            List of FEATURE_COLUMNS values
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            raise ValueError(f"reading at {timestamp} is not newer than {self.last_timestamp}")
+        sensors = [raw[i] for i in _SENSOR_INDEX]
+        head, number = self.head, self.seen
+        for s, value in enumerate(sensors):
+            ring = self.ring[s]
+            old = ring[head]
+            if old == old:
+                self.sums[s] -= old
+                self.counts[s] -= 1
+            ring[head] = value
+            if value == value:
+                self.sums[s] += value
+                self.counts[s] += 1
+        self.head = (head + 1) % len(self.ring[0])
+        if self.head == 0:
+            for s, ring in enumerate(self.ring):
+                self.sums[s] = math.fsum(v for v in ring if v == v)
+
+        for m, s in enumerate(_MIN_MAX_INDEX):
+            value = sensors[s]
+            for window, worse in ((self.lows[m], float.__ge__), (self.highs[m], float.__le__)):
+                while window and window[0][0] <= number - WINDOW_ROWS - 1:
+                    window.popleft()
+                if value == value:
+                    while window and worse(window[-1][1], value):
+                        window.pop()
+                    window.append((number, value))
+        self.seen = number + 1
+
+        lags = self.previous or [math.nan] * len(SENSOR_COLUMNS)
+        self.previous, self.last_timestamp = sensors, timestamp
+        features = list(raw)
+        features += lags
+        features += [total / count if count else math.nan for total, count in zip(self.sums, self.counts)]
+        for m in range(len(MIN_MAX_COLUMNS)):
+            features.append(self.lows[m][0][1] if self.lows[m] else math.nan)
+            features.append(self.highs[m][0][1] if self.highs[m] else math.nan)
+        features += [value - lag for value, lag in zip(sensors, lags)]
+        features.append(timestamp.hour)
+        return features
+
+
+class OnlineScorer:
+    """
+    Per-truck feature state plus a micro-batching queue in front of the model.
+
+    Args:
+        model: Loaded model (xgboost.Booster), see batch_scoring.load_model()
+        max_batch: Most readings per model call
+        max_wait: Seconds the batcher waits for more readings before a call
+    """
+
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait=MAX_WAIT_SECONDS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.windows = {}
+        self.readings = 0
+        self.model_calls = 0
+        self._queue = None
+        self._batcher = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="online-scoring")
+
+    def features(self, reading):
+        """
+        Update the reading's truck and return (truck id, timestamp, features).
+
+        Args:
+            reading: Mapping with TRUCK_ID, TIMESTAMP (datetime or ISO string)
+                     and RAW_COLUMNS (upper or lower case; missing or None as NaN)
+        """
+        reading = {key.upper(): value for key, value in reading.items()}
+        truck = int(reading["TRUCK_ID"])
+        timestamp = reading["TIMESTAMP"]
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        raw = [_float(reading.get(c)) for c in RAW_COLUMNS]
+        window = self.windows.get(truck)
+        if window is None:
+            window = self.windows[truck] = TruckWindow()
+        features = window.update(timestamp, raw)
+        self.readings += 1
+        return truck, timestamp, features
+
+    def warm_start(self, readings):
+        """
+        Load recent history so the first live readings have complete windows.
+
+        Args:
+            readings: DataFrame of earlier readings (the last WINDOW_ROWS per truck suffice)
+
+        Returns:
+            Number of readings loaded
+        """
+        readings = readings.sort_values(["TRUCK_ID", "TIMESTAMP"])
+        for reading in readings.to_dict("records"):
+            reading["TIMESTAMP"] = reading["TIMESTAMP"].to_pydatetime()
+            self.features(reading)
+        return len(readings)
+
+    def score_batch(self, readings):
+        """Score readings synchronously, in one model call; returns a result dict per reading."""
+        rows = [self.features(reading) for reading in readings]
+        return self._results(rows, self._predict([features for _, _, features in rows]))
+
+    async def score(self, reading):
+        """Score one reading; concurrent calls are coalesced into one model call."""
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._run_batcher())
+        truck, timestamp, features = self.features(reading)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((truck, timestamp, features, future))
+        return await future
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        self._executor.shutdown()
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Let callers that are ready run first, so their readings join this call
+            await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                proba = await loop.run_in_executor(self._executor, self._predict,
+                                                   [item[2] for item in batch])
+            except Exception as error:
+                for item in batch:
+                    if not item[3].done():
+                        item[3].set_exception(error)
+                continue
+            for item, result in zip(batch, self._results(batch, proba)):
+                if not item[3].done():
+                    item[3].set_result(result)
+
+    def _predict(self, rows):
+        matrix = np.array(rows, dtype=np.float32)
+        self.model_calls += 1
+        return predict_proba(self.model, {c: matrix[:, i] for i, c in enumerate(FEATURE_COLUMNS)})
+
+    @staticmethod
+    def _results(rows, proba):
+        return [
+            {"TRUCK_ID": row[0], "TIMESTAMP": row[1], "PREDICT_PROBA_0": float(p[0]), "PREDICT_PROBA_1": float(p[1])}
+            for row, p in zip(rows, proba)
+        ]
+
+
+async def serve(scorer, host="127.0.0.1", port=8765):
+    """Start the HTTP API; returns the asyncio server (already listening)."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await _respond(scorer, method, path, body)
+                data = json.dumps(payload, default=_json_default).encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _respond(scorer, method, path, body):
+    if method == "GET" and path == "/health":
+        return "200 OK", {"trucks": len(scorer.windows), "readings": scorer.readings,
+                          "model_calls": scorer.model_calls}
+    if method != "POST" or path != "/score":
+        return "404 Not Found", {"error": f"{method} {path} not found"}
+    try:
+        reading = json.loads(body)
+        if isinstance(reading, list):
+            return "200 OK", await asyncio.gather(*(scorer.score(r) for r in reading))
+        return "200 OK", await scorer.score(reading)
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        return "400 Bad Request", {"error": f"{type(error).__name__}: {error}"}
+
+
+def _float(value):
+    return math.nan if value is None else float(value)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def _main(args):
+    scorer = OnlineScorer(load_model(args.model), args.max_batch, args.max_wait)
+    if args.warm_start:
+        loaded = sum(scorer.warm_start(chunk) for chunk in read_chunks(args.warm_start))
+        print(f"Loaded {loaded} readings for {len(scorer.windows)} trucks")
+    server = await serve(scorer, args.host, args.port)
+    print(f"Scoring on http://{args.host}:{args.port}/score")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve online failure predictions for single readings.")
+    parser.add_argument("--model", required=True, help="Native XGBoost model file (.json or .ubj) or artifact directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warm-start", help="CSV/Parquet file or directory of recent readings")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT_SECONDS, help="Seconds")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
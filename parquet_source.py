@@ -0,0 +1,338 @@
+"""
+Offline data source: TURBO_DATA_PREDICTIONS_NEW snapshots in partitioned Parquet.
+
+A snapshot directory holds the prediction table partitioned by reading date
+and truck bucket (hive layout, TRUCK_BUCKET = TRUCK_ID % buckets), a small
+file with each truck's first and last reading, the alert episode table and a
+manifest recording the bucket count:
+
+    snapshot/
+        TURBO_DATA_PREDICTIONS_NEW/DATE=2025-04-07/TRUCK_BUCKET=3/part-0-0.parquet
+        TURBO_DATA_PREDICTIONS_NEW_FIRST_LAST.parquet
+        TURBO_ALERT_EPISODES.parquet
+        snapshot.json
+
+ParquetSession serves the dashboard's SQL like LocalSession, but loads the
+prediction table lazily: before a statement runs, only the date partitions
+overlapping its TIMESTAMP bind values (and, for truck-restricted queries, only
+those trucks' buckets) are read, memory-mapped, and added to SQLite. The
+first/last rows answer the whole-table time-bounds and truck-list queries
+without reading any partition. Point $TRUCK_PARQUET_SNAPSHOT at a snapshot to
+run the dashboard without a Snowflake session.
+
+Create a snapshot from the warehouse (or any session) with export_snapshot(),
+or from the command line:
+
+    python parquet_source.py snapshot/ --predictions-csv predictions.csv
+    python parquet_source.py snapshot/ --connection my_connection --start 2025-04-01
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from data_access import ALERT_EPISODE_TABLE, PREDICTION_TABLE
+from local_session import LocalSession, _format_timestamp, _prepare_frame
+
+# Environment variable selecting offline mode in dashboard.py
+SNAPSHOT_ENV = "TRUCK_PARQUET_SNAPSHOT"
+
+# Raw prediction-table columns the dashboard reads (FAILURE_PROB is derived from PREDICT_PROBA_1)
+SNAPSHOT_COLUMNS = (
+    "TIMESTAMP",
+    "TRUCK_ID",
+    "EXHAUST_GAS_TEMP",
+    "OIL_PRESSURE",
+    "BOOST_PRESSURE",
+    "OIL_CONTAMINATION",
+    "ENGINE_BOOST_RATIO",
+    "PREDICT_PROBA_1",
+)
+
+# Trucks are spread over this many buckets per date partition
+TRUCK_BUCKETS = 16
+
+MANIFEST_FILE = "snapshot.json"
+
+# finish_snapshot() folds the first/last rows it has collected once they exceed this many
+FIRST_LAST_FOLD_ROWS = 1_000_000
+
+PARTITIONING = ds.partitioning(pa.schema([("DATE", pa.string()), ("TRUCK_BUCKET", pa.int32())]), flavor="hive")
+
+
+def write_snapshot(df, path, table=PREDICTION_TABLE, buckets=TRUCK_BUCKETS, part=0):
+    """
+    Write prediction rows into a snapshot directory.
+
+    May be called repeatedly with successive batches (incrementing `part`);
+    call finish_snapshot() once all rows are written.
+
+    Args:
+        df: Prediction rows with at least TIMESTAMP and TRUCK_ID
+        path: Snapshot directory
+        table: Prediction table name
+        buckets: Number of truck buckets
+        part: Batch number, used to keep file names unique
+
+    Returns:
+        Each truck's first and last row in this batch, for finish_snapshot()
+    """
+    df = df.copy()
+    df.columns = [c.upper() for c in df.columns]
+    df["TIMESTAMP"] = pd.to_datetime(df["TIMESTAMP"])
+    df = df.sort_values(["TRUCK_ID", "TIMESTAMP"], kind="stable")
+    df["DATE"] = df["TIMESTAMP"].dt.strftime("%Y-%m-%d")
+    df["TRUCK_BUCKET"] = (df["TRUCK_ID"].astype(np.int64) % buckets).astype(np.int32)
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        os.path.join(path, table),
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{part}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return _first_and_last(df.drop(columns=["DATE", "TRUCK_BUCKET"]))
+
+
+def _first_and_last(frame):
+    """Each truck's first and last row by TIMESTAMP (one row for single-reading trucks)."""
+    frame = frame.sort_values(["TRUCK_ID", "TIMESTAMP"], kind="stable")
+    grouped = frame.groupby("TRUCK_ID", sort=True)
+    return pd.concat([grouped.head(1), grouped.tail(1)]).drop_duplicates()
+
+
+def _first_last_positions(data):
+    """Row positions of each truck's first and last reading in a record batch or table."""
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    trucks = data.column("TRUCK_ID").to_numpy(zero_copy_only=False)
+    order = np.lexsort((data.column("TIMESTAMP").to_numpy(zero_copy_only=False), trucks))
+    sorted_trucks = trucks[order]
+    starts = np.flatnonzero(np.r_[True, sorted_trucks[1:] != sorted_trucks[:-1]])
+    ends = np.r_[starts[1:] - 1, len(order) - 1]
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def _scan_first_and_last(dataset):
+    """Each truck's first and last row, reading the dataset one record batch at a time."""
+    schema = pa.schema([field for field in dataset.schema if field.name not in ("DATE", "TRUCK_BUCKET")])
+    candidates, pending = [], 0
+    for batch in dataset.to_batches(columns=schema.names, batch_readahead=1, fragment_readahead=1):
+        candidates.append(batch.take(_first_last_positions(batch)))
+        pending += len(candidates[-1])
+        # Reduce the kept rows once they outgrow a few copies of the fleet
+        if pending > FIRST_LAST_FOLD_ROWS:
+            kept = pa.Table.from_batches(candidates)
+            candidates = kept.take(_first_last_positions(kept)).to_batches()
+            pending = sum(len(b) for b in candidates)
+    kept = pa.Table.from_batches(candidates, schema=schema)
+    return _first_and_last(kept.to_pandas())
+
+
+def finish_snapshot(path, table=PREDICTION_TABLE, buckets=TRUCK_BUCKETS, first_last=None):
+    """
+    Store each truck's first and last reading (for whole-table queries) and the manifest.
+
+    Args:
+        path: Snapshot directory
+        table: Prediction table name
+        buckets: Number of truck buckets
+        first_last: First/last rows collected from write_snapshot() calls; if
+                    omitted the written partitions are scanned batch by batch
+    """
+    if first_last is None:
+        first_last = _scan_first_and_last(open_dataset(path, table))
+    first_last.to_parquet(os.path.join(path, f"{table}_FIRST_LAST.parquet"), index=False)
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump({"table": table, "truck_buckets": buckets}, f)
+
+
+def export_snapshot(session, path, start=None, end=None, table=PREDICTION_TABLE,
+                    columns=SNAPSHOT_COLUMNS, buckets=TRUCK_BUCKETS):
+    """
+    Copy the prediction table (optionally one time range) and alert episodes to Parquet.
+
+    Rows are streamed with to_pandas_batches() and written batch by batch, so
+    the export never holds the whole table in memory; only each truck's first
+    and last row are carried between batches. A previous export of the table
+    in `path` is removed first, along with its manifest, so the snapshot can
+    only be opened once this export has finished.
+
+    Args:
+        session: Snowpark session or LocalSession
+        path: Snapshot directory (created if missing)
+        start: Optional inclusive lower TIMESTAMP bound
+        end: Optional inclusive upper TIMESTAMP bound
+        table: Prediction table
+        columns: Columns to export
+        buckets: Number of truck buckets
+
+    Returns:
+        Number of rows written
+    """
+    predicates, params = [], []
+    if start is not None:
+        predicates.append("TIMESTAMP >= ?")
+        params.append(_format_timestamp(start))
+    if end is not None:
+        predicates.append("TIMESTAMP <= ?")
+        params.append(_format_timestamp(end))
+    where = f"where {' and '.join(predicates)}" if predicates else ""
+    query = f"select {', '.join(columns)} from {table} {where}"
+
+    # Part files of an earlier (larger) export would otherwise be read back as duplicates
+    shutil.rmtree(os.path.join(path, table), ignore_errors=True)
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        os.remove(os.path.join(path, MANIFEST_FILE))
+    os.makedirs(path, exist_ok=True)
+
+    rows = 0
+    first_last = None
+    for part, batch in enumerate(session.sql(query, params=params).to_pandas_batches()):
+        batch_first_last = write_snapshot(batch, path, table, buckets, part=part)
+        first_last = _first_and_last(pd.concat([first_last, batch_first_last]))
+        rows += len(batch)
+    if rows:
+        finish_snapshot(path, table, buckets, first_last)
+
+    try:
+        episodes = session.sql(f"select * from {ALERT_EPISODE_TABLE}").to_pandas()
+    except Exception:
+        # The episode table is optional (section 13 of the notebook may not have run)
+        episodes = None
+    if episodes is not None:
+        episodes.to_parquet(os.path.join(path, f"{ALERT_EPISODE_TABLE}.parquet"), index=False)
+    return rows
+
+
+def open_dataset(path, table=PREDICTION_TABLE):
+    """The snapshot's prediction table as a memory-mapped pyarrow dataset."""
+    return ds.dataset(
+        os.path.join(path, table),
+        format="parquet",
+        partitioning=PARTITIONING,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+
+
+class ParquetSession(LocalSession):
+    """
+    LocalSession whose prediction table is loaded from a Parquet snapshot on demand.
+
+    Statements on the prediction table load the partitions their TIMESTAMP
+    bind values touch: [min, max] of the bound values, or everything from the
+    bound onwards for a single lower bound (the tail query). Statements with
+    no TIMESTAMP bounds see the loaded partitions plus every truck's first and
+    last reading, which is exact for the time-bounds and truck-list queries.
+    Loading does not bump LAST_ALTERED, so the dashboard's caches stay valid.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        table = manifest["table"]
+        self.path = path
+        self.table = table.upper()
+        self.buckets = manifest["truck_buckets"]
+        self.dataset = open_dataset(path, table)
+        self.partitions_loaded = set()  # (date, bucket) pairs read from Parquet
+        self.partition_reads = 0
+
+        dates = set()
+        for fragment in self.dataset.get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            dates.add(keys["DATE"])
+        self.dates = sorted(dates)
+
+        # First/last rows stand in for unloaded partitions in whole-table queries
+        self.register(self.table, pd.read_parquet(os.path.join(path, f"{table}_FIRST_LAST.parquet")))
+        episodes = os.path.join(path, f"{ALERT_EPISODE_TABLE}.parquet")
+        if os.path.exists(episodes):
+            self.register(ALERT_EPISODE_TABLE, pd.read_parquet(episodes))
+
+    def sql(self, query, params=None):
+        query_upper = query.upper()
+        if self.table in query_upper:
+            self._load_partitions(query_upper, params or [])
+        return super().sql(query, params)
+
+    def _load_partitions(self, query_upper, params):
+        bounds = [pd.Timestamp(p) for p in params if isinstance(p, str) and _TIMESTAMP_PATTERN.match(p)]
+        if not bounds or not self.dates:
+            return
+        lo = min(bounds).strftime("%Y-%m-%d")
+        hi = max(bounds).strftime("%Y-%m-%d") if len(bounds) > 1 else self.dates[-1]
+
+        # Truck-restricted statements (TRUCK_ID in (...)) only need those trucks' buckets
+        buckets = range(self.buckets)
+        if "TRUCK_ID IN" in query_upper:
+            buckets = sorted({int(p) % self.buckets for p in params if isinstance(p, (int, np.integer))})
+
+        with self._lock:
+            missing = {}
+            for date in self.dates:
+                if lo <= date <= hi:
+                    needed = [b for b in buckets if (date, b) not in self.partitions_loaded]
+                    if needed:
+                        missing[date] = needed
+            if not missing:
+                return
+
+            # Partition pruning: only the missing (date, bucket) directories are opened
+            condition = None
+            for date, needed in missing.items():
+                term = (ds.field("DATE") == date) & ds.field("TRUCK_BUCKET").isin(needed)
+                condition = term if condition is None else condition | term
+            rows = self.dataset.to_table(filter=condition).to_pandas()
+            self.partition_reads += 1
+
+            # Drop first/last stand-in rows that the loaded partitions also contain
+            for date, needed in missing.items():
+                day = pd.Timestamp(date)
+                self._conn.execute(
+                    f"delete from {self.table} where TIMESTAMP >= ? and TIMESTAMP < ? "
+                    f"and TRUCK_ID % {int(self.buckets)} in ({', '.join(str(int(b)) for b in needed)})",
+                    [_format_timestamp(day), _format_timestamp(day + pd.Timedelta(days=1))],
+                )
+            _prepare_frame(rows.drop(columns=["DATE", "TRUCK_BUCKET"])).to_sql(
+                self.table, self._conn, if_exists="append", index=False)
+            self._conn.commit()
+            self.partitions_loaded.update((date, b) for date, needed in missing.items() for b in needed)
+
+
+# Bind values the data layer formats with data_access._format_timestamp
+_TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Parquet snapshot of the prediction table.")
+    parser.add_argument("path", help="Snapshot directory")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--predictions-csv", help=f"CSV export of {PREDICTION_TABLE}")
+    source.add_argument("--connection", help="Snowflake connection name (connections.toml)")
+    parser.add_argument("--start", help="Only export readings from this time")
+    parser.add_argument("--end", help="Only export readings up to this time")
+    parser.add_argument("--buckets", type=int, default=TRUCK_BUCKETS)
+    args = parser.parse_args()
+
+    if args.predictions_csv:
+        session = LocalSession.from_csv({PREDICTION_TABLE: args.predictions_csv})
+    else:
+        from snowflake.snowpark import Session
+        session = Session.builder.config("connection_name", args.connection).create()
+
+    rows = export_snapshot(session, args.path, args.start, args.end, buckets=args.buckets)
+    print(f"Wrote {rows} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
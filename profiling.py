@@ -0,0 +1,229 @@
+"""
+Lightweight timing of the dashboard's sections.
+
+A Profiler is created and activated at the top of every rerun. The page's
+top-level sections run one after another, so they are timed with
+checkpoint(name), which closes the section ending at that point without
+re-indenting the page code; nested work uses the span(name) context manager.
+Each span records wall time, optional rows in/out and the change in process
+memory (resident set size, where the platform exposes it).
+
+Helper modules time their own phases with the module-level span(), which
+records into the profiler active in the current thread (or context) and is a
+no-op otherwise, e.g. in the shared store's background refresher:
+
+    with profiling.span("fetch.sort", rows_in=len(df)) as s:
+        ...
+        s.rows_out = len(result)
+
+dashboard.py shows the spans in a collapsed "Performance" panel, keeps the
+profile in st.session_state.last_profile (read by benchmarks/bench_dashboard.py),
+and emits it as one structured log record per rerun. Set $TRUCK_PROFILE_OTEL
+to also export the spans through OpenTelemetry (needs opentelemetry-api and a
+configured tracer provider).
+"""
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Environment variable enabling the OpenTelemetry export
+OTEL_ENV = "TRUCK_PROFILE_OTEL"
+
+logger = logging.getLogger("truck_dashboard.profiling")
+
+_active = ContextVar("truck_dashboard_profiler", default=None)
+
+
+class Span:
+    """One timed section: start offset and duration in seconds, rows and memory delta in bytes."""
+
+    __slots__ = ("name", "start", "seconds", "rows_in", "rows_out", "memory_delta")
+
+    def __init__(self, name, start=0.0, seconds=0.0, rows_in=None, rows_out=None, memory_delta=None):
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.memory_delta = memory_delta
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "memory_delta": self.memory_delta,
+        }
+
+
+class Profiler:
+    """
+    Wall-clock spans for one rerun.
+
+    Args:
+        clock: Time source, injectable for tests
+        memory: Returns the current memory use in bytes (or None when unknown)
+    """
+
+    def __init__(self, clock=time.perf_counter, memory=None):
+        self._clock = clock
+        self._memory = memory or resident_memory
+        self.started = clock()
+        self.started_wall_ns = time.time_ns()
+        self._last = self.started
+        self._last_memory = self._memory()
+        self.spans = []
+
+    def activate(self):
+        """Make this the profiler module-level span() records into (in the current context)."""
+        _active.set(self)
+        return self
+
+    def checkpoint(self, name, rows_in=None, rows_out=None):
+        """Record the time since the previous checkpoint (or the start) as `name`."""
+        now, memory = self._clock(), self._memory()
+        self.spans.append(Span(name, self._last - self.started, now - self._last, rows_in, rows_out,
+                               _delta(self._last_memory, memory)))
+        self._last, self._last_memory = now, memory
+
+    @contextmanager
+    def span(self, name, rows_in=None):
+        """
+        Time the enclosed block as `name`; use dotted names for nested work.
+
+        Yields the Span, so the block can set rows_out once it knows it.
+        """
+        start, memory = self._clock(), self._memory()
+        record = Span(name, start - self.started, rows_in=rows_in)
+        try:
+            yield record
+        finally:
+            record.seconds = self._clock() - start
+            record.memory_delta = _delta(memory, self._memory())
+            self.spans.append(record)
+
+    @property
+    def elapsed(self):
+        """Seconds since the profiler was created."""
+        return self._clock() - self.started
+
+    def totals(self):
+        """Seconds per span name, summed over repeats, in first-seen order."""
+        totals = OrderedDict()
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.seconds
+        return totals
+
+    def table(self):
+        """
+        One row per span name (repeats summed, e.g. per result batch) for display.
+
+        Returns:
+            List of dicts with section, calls, ms, rows in/out and memory delta in MB
+        """
+        rows = OrderedDict()
+        for span in self.spans:
+            row = rows.setdefault(span.name, {"section": span.name, "calls": 0, "ms": 0.0,
+                                              "rows_in": None, "rows_out": None, "memory_mb": None})
+            row["calls"] += 1
+            row["ms"] += span.seconds * 1000
+            row["rows_in"] = _add(row["rows_in"], span.rows_in)
+            row["rows_out"] = _add(row["rows_out"], span.rows_out)
+            if span.memory_delta is not None:
+                row["memory_mb"] = _add(row["memory_mb"], span.memory_delta / 1e6)
+        return list(rows.values())
+
+    def log(self, slow_seconds=None, **fields):
+        """
+        Emit the profile as one JSON log record.
+
+        Reruns slower than `slow_seconds` are logged at WARNING, others at DEBUG,
+        so slow pages are visible without turning on debug logging.
+
+        Args:
+            slow_seconds: Threshold for WARNING level, None to always log at DEBUG
+            **fields: Extra context to include (e.g. session id, window)
+        """
+        elapsed = self.elapsed
+        level = logging.WARNING if slow_seconds is not None and elapsed > slow_seconds else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        record = {"event": "dashboard_rerun", "seconds": round(elapsed, 6), **fields,
+                  "spans": [span.as_dict() for span in self.spans]}
+        logger.log(level, json.dumps(record, default=str))
+
+    def export_otel(self, tracer_name="truck_dashboard", **attributes):
+        """
+        Export the spans through OpenTelemetry, as children of one "dashboard.rerun" span.
+
+        Does nothing unless $TRUCK_PROFILE_OTEL is set. The exporter and
+        tracer provider come from the application's OpenTelemetry setup.
+
+        Returns:
+            True if the spans were exported
+        """
+        if not os.environ.get(OTEL_ENV):
+            return False
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("%s is set but opentelemetry-api is not installed", OTEL_ENV)
+            return False
+
+        def wall_ns(offset):
+            return self.started_wall_ns + int(offset * 1e9)
+
+        tracer = trace.get_tracer(tracer_name)
+        root = tracer.start_span("dashboard.rerun", start_time=self.started_wall_ns,
+                                 attributes={k: v for k, v in attributes.items() if v is not None})
+        context = trace.set_span_in_context(root)
+        for span in self.spans:
+            child_attributes = {
+                key: value for key, value in (("rows_in", span.rows_in), ("rows_out", span.rows_out),
+                                              ("memory_delta", span.memory_delta))
+                if value is not None
+            }
+            child = tracer.start_span(span.name, context=context, start_time=wall_ns(span.start),
+                                      attributes=child_attributes)
+            child.end(end_time=wall_ns(span.start + span.seconds))
+        root.end(end_time=wall_ns(self.elapsed))
+        return True
+
+
+@contextmanager
+def span(name, rows_in=None):
+    """Time the block into the active profiler; without one, yields a discarded Span."""
+    profiler = _active.get()
+    if profiler is None:
+        yield Span(name, rows_in=rows_in)
+        return
+    with profiler.span(name, rows_in=rows_in) as record:
+        yield record
+
+
+def resident_memory():
+    """Resident set size of this process in bytes, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _delta(before, after):
+    return None if before is None or after is None else after - before
+
+
+def _add(total, value):
+    if value is None:
+        return total
+    return value if total is None else total + value
@@ -0,0 +1,125 @@
+"""
+Latest Sensor Readings table rendering.
+
+Threshold classification runs once per column over whole arrays, rows are
+ordered by severity (or truck) before paging, and only the requested page is
+turned into HTML, so the browser payload stays bounded by the page size no
+matter how large the fleet is.
+"""
+import html
+
+import numpy as np
+import pandas as pd
+
+from thresholds import DEFAULT_REGISTRY
+
+SORT_OPTIONS = ("Severity", "Truck ID")
+
+
+def table_columns(registry=DEFAULT_REGISTRY, prob_col="FAILURE_PROB"):
+    """Table columns in display order as (column, header, value format)."""
+    columns = [
+        ("TRUCK_ID", "Truck ID", "{:.0f}"),
+        ("TIMESTAMP", "Timestamp", None),
+        (prob_col, "Failure Probability", "{:.2%}"),
+    ]
+    for column, threshold in registry.thresholds.items():
+        header = f"{threshold.label} ({threshold.unit})" if threshold.unit else threshold.label
+        columns.append((column, header, threshold.fmt))
+    return columns
+
+
+def classify_readings(df, failure_threshold, prob_col="FAILURE_PROB", registry=DEFAULT_REGISTRY):
+    """
+    CSS highlight class for every cell that is out of range.
+
+    Args:
+        df: Latest readings, one row per truck
+        failure_threshold: Failure probability above which the cell is red
+        prob_col: Name of the failure probability column
+        registry: ThresholdRegistry with the sensor limits
+
+    Returns:
+        Dict of column -> NumPy array of class names ('' when in range)
+    """
+    status = registry.classify(df)
+    css = np.array(["blue-highlight", "", "red-highlight"])
+    classes = {column: css[status[:, j] + 1] for j, column in enumerate(registry.columns)}
+    prob = df[prob_col].to_numpy(dtype=float)
+    classes[prob_col] = np.where(prob > failure_threshold, "red-highlight", "")
+    return classes
+
+
+def severity_order(df, classes, prob_col="FAILURE_PROB"):
+    """
+    Row order with the most severe trucks first.
+
+    Trucks in alert come first, then by number of out-of-range sensors, then
+    by failure probability, with TRUCK_ID as the final tie-breaker.
+    """
+    alert = classes[prob_col] != ""
+    exceptions = np.zeros(len(df), dtype=int)
+    for column, css in classes.items():
+        if column != prob_col:
+            exceptions += css != ""
+    prob = np.nan_to_num(df[prob_col].to_numpy(dtype=float), nan=-1.0)
+    # np.lexsort sorts by the last key first, ascending
+    return np.lexsort((df["TRUCK_ID"].to_numpy(), -prob, -exceptions, -alert.astype(int)))
+
+
+def paginate(n_rows, page, page_size):
+    """
+    Clamp a 1-based page number and return its row slice.
+
+    Returns:
+        Tuple of (page, n_pages, slice)
+    """
+    n_pages = max(1, -(-n_rows // page_size))
+    page = min(max(1, int(page)), n_pages)
+    start = (page - 1) * page_size
+    return page, n_pages, slice(start, min(start + page_size, n_rows))
+
+
+def render_table_html(df, classes, registry=DEFAULT_REGISTRY, prob_col="FAILURE_PROB"):
+    """
+    Build the table HTML for the given rows with a single join.
+
+    Args:
+        df: Rows to render (already sorted and paged)
+        classes: Output of classify_readings() for the same rows
+        registry: ThresholdRegistry providing sensor headers and formats
+        prob_col: Name of the failure probability column
+
+    Returns:
+        HTML string
+    """
+    columns = table_columns(registry, prob_col)
+    header = "".join(
+        f'<th style="text-align: center; font-weight: bold;">{html.escape(title)}</th>'
+        for _, title, _ in columns
+    )
+
+    cells = []
+    for column, _, fmt in columns:
+        if column == "TIMESTAMP":
+            text = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+        else:
+            text = np.array([fmt.format(v) for v in df[column].to_numpy(dtype=float)], dtype=object)
+        css = classes.get(column)
+        if css is None:
+            cells.append(np.char.add(np.char.add("<td>", text.astype(str)), "</td>"))
+        else:
+            opening = np.char.add(np.char.add("<td class='", css.astype(str)), "'>")
+            cells.append(np.char.add(np.char.add(opening, text.astype(str)), "</td>"))
+
+    rows = "".join(f"<tr>{''.join(row)}</tr>" for row in zip(*cells)) if len(df) else ""
+    return f"""
+            <div class="scrollable-table">
+                <table>
+                    <thead>
+                        <tr>{header}</tr>
+                    </thead>
+                    <tbody>{rows}</tbody>
+                </table>
+            </div>
+            """
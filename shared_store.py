@@ -0,0 +1,226 @@
+"""
+Process-wide recent data shared by every dashboard session.
+
+Each browser tab used to keep its own TailBuffer, so N open dashboards meant N
+identical tail queries per refresh and N copies of the same rows in memory.
+SharedStore holds one TailBuffer for the whole Streamlit process. Sessions take
+a lease on it and read immutable TailSnapshot objects, so the only per-session
+state left is the selected window and trucks. A single background thread keeps
+the tail current while at least one lease is live, and the buffers are dropped
+once the last lease expires or is released.
+
+Snapshot frames are frozen (their NumPy buffers are marked read-only): a
+session that tries to modify one in place gets an error instead of silently
+changing what every other session sees.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_access import PREDICTION_COLUMNS, PREDICTION_TABLE, TailBuffer
+
+
+class TailSnapshot:
+    """
+    Immutable view of the shared tail at one point in time.
+
+    Exposes the same read API as TailBuffer (frame, latest, fleet, hwm, start,
+    loaded, covers), so the dashboard reads either interchangeably.
+    """
+
+    def __init__(self, frame=None, latest=None, fleet=None, hwm=None, start=None, generation=0):
+        self.frame = frame
+        self.latest = latest
+        self.fleet = fleet
+        self.hwm = hwm
+        self.start = start
+        self.generation = generation
+
+    @property
+    def loaded(self):
+        return self.hwm is not None
+
+    def covers(self, start):
+        """True if every row from `start` up to the high-water mark is in the snapshot."""
+        return self.loaded and pd.Timestamp(start) >= self.start
+
+
+class SharedStore:
+    """
+    One TailBuffer per process, leased by sessions and refreshed in the background.
+
+    Sessions call acquire() on every rerun, which renews their lease; leases
+    not renewed within `lease_seconds` lapse, so tabs that were closed without
+    notice stop counting. The background thread only refreshes a tail that
+    some session has loaded (via refresh()), matching the per-session
+    behaviour where the tail was fetched on demand.
+
+    Args:
+        span: Time span held by the tail
+        columns: Columns to load
+        table: Prediction table
+        refresh_seconds: Background refresh interval
+        lease_seconds: Lease lifetime; must exceed the longest live-mode interval
+        min_refresh_seconds: Throttle for on-demand refresh() calls
+        background: Start the refresher thread on the first acquire()
+        clock: Time source, injectable for tests
+    """
+
+    def __init__(self, span=pd.Timedelta(hours=12), columns=PREDICTION_COLUMNS, table=PREDICTION_TABLE,
+                 refresh_seconds=30, lease_seconds=600, min_refresh_seconds=10, background=True,
+                 clock=time.monotonic):
+        self.span = pd.Timedelta(span)
+        self.columns = tuple(columns)
+        self.table = table
+        self.refresh_seconds = refresh_seconds
+        self.lease_seconds = lease_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.background = background
+        self._clock = clock
+        self._tail = self._new_tail()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # refresh + publish, so snapshots are consistent
+        self._leases = {}  # lease key -> last renewal
+        self._session = None
+        self._snapshot = TailSnapshot()
+        self._thread = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.last_error = None
+
+    def acquire(self, key, session):
+        """
+        Take or renew a lease for one dashboard session.
+
+        Args:
+            key: Stable per-session identifier (e.g. a UUID kept in st.session_state)
+            session: Snowpark session used for refreshes
+
+        Returns:
+            Number of live leases
+        """
+        with self._lock:
+            self._leases[key] = self._clock()
+            self._session = session
+            self._expire()
+            if self.background and self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="shared-store-refresh", daemon=True)
+                self._thread.start()
+            return len(self._leases)
+
+    def release(self, key):
+        """Give up a lease; the buffers are dropped when none remain."""
+        with self._lock:
+            self._leases.pop(key, None)
+            self._expire()
+
+    def snapshot(self):
+        """The most recently published TailSnapshot."""
+        return self._snapshot
+
+    def refresh(self, force=False):
+        """
+        Bring the shared tail up to date now and publish it.
+
+        Concurrent callers are serialized and throttled by `min_refresh_seconds`
+        unless `force` is set, so many sessions asking at once cost one query.
+
+        Returns:
+            The current TailSnapshot
+        """
+        with self._lock:
+            session, tail = self._session, self._tail
+        if session is None:
+            return self._snapshot
+        with self._refresh_lock:
+            tail.refresh(session, force=force)
+            self.refreshes += 1
+            return self._publish(tail)
+
+    def stop(self):
+        """Stop the refresher thread (it restarts on the next acquire)."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    @property
+    def stats(self):
+        """Lease count and size of the shared data."""
+        snapshot = self._snapshot
+        frame = snapshot.frame
+        with self._lock:
+            leases = len(self._leases)
+        return {
+            "leases": leases,
+            "generation": snapshot.generation,
+            "rows": 0 if frame is None else len(frame),
+            "bytes": 0 if frame is None else int(frame.memory_usage(deep=True).sum()),
+            "refreshes": self.refreshes,
+        }
+
+    def _new_tail(self):
+        return TailBuffer(self.span, self.columns, self.table,
+                          min_refresh_seconds=self.min_refresh_seconds, clock=self._clock)
+
+    def _publish(self, tail):
+        with self._lock:
+            if tail is not self._tail:
+                # Dropped by _expire() while refreshing
+                return self._snapshot
+            current = self._snapshot
+            if current.loaded == tail.loaded and current.frame is tail.frame:
+                return current
+            frame = _freeze(tail.frame) if tail.loaded else None
+            self._snapshot = TailSnapshot(
+                frame=frame,
+                latest=tail.latest.copy() if tail.loaded else None,
+                fleet=tail.fleet.copy() if tail.loaded else None,
+                hwm=tail.hwm,
+                start=tail.start,
+                generation=current.generation + 1,
+            )
+            return self._snapshot
+
+    def _expire(self):
+        # Called with self._lock held
+        now = self._clock()
+        for key in [k for k, seen in self._leases.items() if now - seen > self.lease_seconds]:
+            del self._leases[key]
+        if not self._leases and self._tail.loaded:
+            # A fresh buffer rather than reset(), so a refresh still running on
+            # the old one cannot repopulate it
+            self._tail = self._new_tail()
+            self._snapshot = TailSnapshot(generation=self._snapshot.generation + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_seconds):
+            with self._lock:
+                self._expire()
+                if not self._leases:
+                    self._thread = None
+                    return
+                loaded = self._tail.loaded
+            if not loaded:
+                continue
+            try:
+                self.refresh(force=True)
+                self.last_error = None
+            except Exception as error:
+                # Keep serving the last snapshot; the next tick retries
+                self.last_error = error
+        with self._lock:
+            self._thread = None
+
+
+def _freeze(df):
+    """Mark the NumPy buffers behind `df` read-only (in place) and return it."""
+    for column in df.columns:
+        values = df[column].to_numpy()
+        while isinstance(values, np.ndarray):
+            values.flags.writeable = False
+            values = values.base
+    return df
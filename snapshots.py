@@ -0,0 +1,101 @@
+"""
+Per-truck "latest state" for the Latest Sensor Readings table.
+
+The table shows, for each truck, the result of
+`df.sort_values('TIMESTAMP').groupby('TRUCK_ID').last()`: the most recent
+non-null value of every column. LatestSnapshot maintains that incrementally as
+rows are appended, so building the table costs O(trucks) instead of a sort of
+every reading in the window.
+"""
+import numpy as np
+import pandas as pd
+
+
+def is_time_ordered(df):
+    """True if TIMESTAMP never decreases within a truck, in row order."""
+    if len(df) < 2:
+        return True
+    timestamps = df["TIMESTAMP"].to_numpy()
+    if df["TIMESTAMP"].is_monotonic_increasing:
+        return True
+    trucks = df["TRUCK_ID"].to_numpy()
+    if not df["TRUCK_ID"].is_monotonic_increasing:
+        return False
+    same_truck = trucks[1:] == trucks[:-1]
+    return bool(np.all(timestamps[1:][same_truck] >= timestamps[:-1][same_truck]))
+
+
+def latest_readings(df):
+    """
+    Latest non-null value of every column per truck.
+
+    Same result as `df.sort_values('TIMESTAMP').groupby('TRUCK_ID').last().reset_index()`,
+    but skips the sort when rows are already time-ordered within each truck
+    (true for both the windowed loader and the tail buffer).
+    """
+    if df.empty:
+        return df.groupby("TRUCK_ID").last().reset_index()
+    if not is_time_ordered(df):
+        df = df.sort_values("TIMESTAMP", kind="stable")
+    return df.groupby("TRUCK_ID", sort=True).last().reset_index()
+
+
+class LatestSnapshot:
+    """
+    Latest non-null value of every column per truck, updated from appended rows.
+
+    Alongside each value the snapshot keeps the TIMESTAMP it was observed at,
+    so `window(start)` can reproduce exactly what a groupby over only the rows
+    from `start` onwards would return, including columns that are NaN there.
+    """
+
+    def __init__(self):
+        self.values = None  # TRUCK_ID -> latest non-null value per column
+        self.as_of = None   # TRUCK_ID -> TIMESTAMP of that value per column
+
+    def copy(self):
+        """Independent snapshot; cheap because update() replaces frames rather than mutating them."""
+        other = LatestSnapshot()
+        other.values, other.as_of = self.values, self.as_of
+        return other
+
+    def update(self, rows):
+        """
+        Fold newly appended rows into the snapshot.
+
+        Rows must not be older than those already folded in for the same truck.
+        """
+        if rows.empty:
+            return
+        if not is_time_ordered(rows):
+            rows = rows.sort_values("TIMESTAMP", kind="stable")
+
+        columns = [c for c in rows.columns if c != "TRUCK_ID"]
+        trucks = rows["TRUCK_ID"]
+        values = rows.groupby(trucks, sort=True)[columns].last()
+        timestamps = rows["TIMESTAMP"]
+        as_of = pd.DataFrame(
+            {c: timestamps.where(rows[c].notna()) for c in columns}
+        ).groupby(trucks, sort=True).last()
+
+        if self.values is None:
+            self.values, self.as_of = values, as_of
+        else:
+            self.values = values.combine_first(self.values)[columns]
+            self.as_of = as_of.combine_first(self.as_of)[columns]
+
+    def window(self, start=None):
+        """
+        Latest readings considering only rows at or after `start`.
+
+        Returns:
+            DataFrame shaped like latest_readings() output
+        """
+        if self.values is None:
+            return pd.DataFrame(columns=["TRUCK_ID"])
+        values = self.values
+        if start is not None:
+            start = pd.Timestamp(start)
+            values = values.where(self.as_of >= start)
+            values = values[self.as_of["TIMESTAMP"] >= start]
+        return values.reset_index()
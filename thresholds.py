@@ -0,0 +1,176 @@
+"""
+Sensor threshold registry shared by the dashboard's table, charts and alerts.
+
+Each sensor's acceptable operating range is declared once here. The registry
+compiles the ranges into NumPy arrays so classifying a whole window of readings
+is a single vectorized comparison, and it can be tuned per fleet (and per truck
+model) from a JSON file instead of code edits:
+
+    {
+        "sensors": {"OIL_PRESSURE": {"low": 260, "high": 490}},
+        "models": {"T800": {"EXHAUST_GAS_TEMP": {"high": 420}}}
+    }
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# label/unit: table header and guide text; title/y_label: chart text;
+# low/high: acceptable range; domain: chart y-axis limits; fmt: value format
+SensorThreshold = namedtuple(
+    "SensorThreshold", ["label", "unit", "title", "y_label", "low", "high", "domain", "fmt"]
+)
+
+SENSOR_THRESHOLDS = {
+    "EXHAUST_GAS_TEMP": SensorThreshold(
+        "Exhaust Gas Temp", "°C", "Exhaust Gas Temperature", "Temperature (°C)",
+        290, 400, (240, 450), "{:.1f}"),
+    "OIL_PRESSURE": SensorThreshold(
+        "Oil Pressure", "kPa", "Oil Pressure", "Pressure (kPa)",
+        275, 480, (200, 550), "{:.1f}"),
+    "BOOST_PRESSURE": SensorThreshold(
+        "Boost Pressure", "kPa", "Boost Pressure", "Pressure (kPa)",
+        100, 205, (50, 250), "{:.1f}"),
+    "OIL_CONTAMINATION": SensorThreshold(
+        "Oil Contamination", "ppm", "Oil Contamination", "Contamination (ppm)",
+        0, 25, (0, 30), "{:.1f}"),
+    "ENGINE_BOOST_RATIO": SensorThreshold(
+        "Engine Boost Ratio", "", "Engine Boost Ratio", "Ratio",
+        0.85, 1.15, (0.7, 1.3), "{:.3f}"),
+}
+
+# Environment variable naming an optional JSON file of threshold overrides
+THRESHOLDS_FILE_ENV = "TRUCK_THRESHOLDS_FILE"
+
+
+class ThresholdRegistry:
+    """
+    Compiled sensor thresholds with optional per-truck-model overrides.
+
+    Args:
+        thresholds: Mapping of column -> SensorThreshold
+        model_overrides: Mapping of truck model -> {column: {"low": .., "high": ..}}
+    """
+
+    def __init__(self, thresholds=None, model_overrides=None):
+        self.thresholds = dict(SENSOR_THRESHOLDS if thresholds is None else thresholds)
+        self.model_overrides = dict(model_overrides or {})
+        self.columns = list(self.thresholds)
+        self.low = np.array([t.low for t in self.thresholds.values()], dtype=float)
+        self.high = np.array([t.high for t in self.thresholds.values()], dtype=float)
+
+    def __getitem__(self, column):
+        return self.thresholds[column]
+
+    def __contains__(self, column):
+        return column in self.thresholds
+
+    def limits(self, column, model=None):
+        """(low, high) for a sensor, applying the model's override if any."""
+        threshold = self.thresholds[column]
+        override = self.model_overrides.get(model, {}).get(column, {})
+        return override.get("low", threshold.low), override.get("high", threshold.high)
+
+    def compile(self, models=None):
+        """
+        Low/high limit arrays for all sensors.
+
+        Args:
+            models: Optional per-row truck model values (array-like)
+
+        Returns:
+            Tuple of (low, high). Shape (n_sensors,) without models, or
+            (n_rows, n_sensors) with one row of limits per reading.
+        """
+        if models is None or not self.model_overrides:
+            return self.low, self.high
+
+        models = pd.Series(np.asarray(models))
+        low = np.tile(self.low, (len(models), 1))
+        high = np.tile(self.high, (len(models), 1))
+        for model in models.unique():
+            if model not in self.model_overrides:
+                continue
+            rows = (models == model).to_numpy()
+            for j, column in enumerate(self.columns):
+                low[rows, j], high[rows, j] = self.limits(column, model)
+        return low, high
+
+    def classify(self, df, model_col=None):
+        """
+        Out-of-range status for every sensor reading in one comparison.
+
+        Args:
+            df: Readings containing all registry columns
+            model_col: Optional column holding each truck's model
+
+        Returns:
+            int8 array of shape (n_rows, n_sensors): 1 above range, -1 below
+            range, 0 in range or missing. Columns follow `self.columns`.
+        """
+        values = df[self.columns].to_numpy()
+        if not np.issubdtype(values.dtype, np.floating):
+            values = values.astype(float)
+        models = df[model_col].to_numpy() if model_col is not None and model_col in df else None
+        # Compare at the readings' own precision so a float32 reading equal to a
+        # limit (e.g. 1.8) is not pushed across it by widening
+        low, high = (limit.astype(values.dtype) for limit in self.compile(models))
+        status = np.zeros(values.shape, dtype=np.int8)
+        status[values > high] = 1
+        status[values < low] = -1
+        return status
+
+    def exception_counts(self, df, model_col=None):
+        """Number of out-of-range readings per sensor column."""
+        if df.empty:
+            return {column: 0 for column in self.columns}
+        counts = np.count_nonzero(self.classify(df, model_col), axis=0)
+        return dict(zip(self.columns, counts.tolist()))
+
+    def describe_ranges(self):
+        """Markdown bullet list of the acceptable ranges, for the chart guide."""
+        lines = []
+        for column, threshold in self.thresholds.items():
+            lines.append(f"- {threshold.label}: {_with_unit(threshold.low, threshold.unit)} "
+                         f"to {_with_unit(threshold.high, threshold.unit)}")
+        return "\n".join(lines)
+
+
+def _with_unit(value, unit):
+    if not unit:
+        return f"{value}"
+    return f"{value}{unit}" if unit.startswith("°") else f"{value} {unit}"
+
+
+def load_registry(path=None):
+    """
+    Build a registry from the defaults plus an optional JSON overrides file.
+
+    Args:
+        path: JSON file; defaults to $TRUCK_THRESHOLDS_FILE. Missing files are
+              ignored so the defaults apply.
+
+    Returns:
+        ThresholdRegistry
+    """
+    path = path or os.environ.get(THRESHOLDS_FILE_ENV)
+    if not path or not os.path.exists(path):
+        return ThresholdRegistry()
+
+    with open(path) as f:
+        config = json.load(f)
+
+    thresholds = dict(SENSOR_THRESHOLDS)
+    for column, override in config.get("sensors", {}).items():
+        if column not in thresholds:
+            raise ValueError(f"Unknown sensor in {path}: {column}")
+        thresholds[column] = thresholds[column]._replace(
+            **{k: tuple(v) if k == "domain" else v for k, v in override.items()}
+        )
+    return ThresholdRegistry(thresholds, config.get("models"))
+
+
+DEFAULT_REGISTRY = ThresholdRegistry()